@@ -1,229 +1,262 @@
 # algorithms.py
-import math
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, NamedTuple
 
 import cv2
 import numpy as np
 
+from borders import BORDER_OVERWRITE, overwrite_border, filter_with_border
+from convolution import apply_kernel, apply_kernel_constant_border
+from histogram_statistics import histogram_percentile
+from rank_filter import rank_filter
+
 
 # Dla Lab1 - zadanie 2
-def generate_lut_histogram(image_data: np.ndarray = None) -> None | np.ndarray | dict[str, np.ndarray]:
-    """Funkcja generująca tablicę lut dla histogramu"""
+# Liczba przedziałów histogramu dla obrazów 8-bitowych
+HISTOGRAM_BINS = 256
 
-    if image_data is None:
-        return None
+# Maksymalna ilość pixel-i w jednym paśmie. cv2.calcHist zwraca float32, który jest dokładny tylko do 2^24,
+# więc pasmo nie może być większe, aby żadna liczba w przedziale nie straciła precyzji
+HISTOGRAM_MAX_CHUNK_PIXELS = 2 ** 24
 
-    # Szaro-odcieniowy
-    if len(image_data.shape) == 2:
-        mono_lut = np.zeros(256, dtype=np.uint32)
 
-        for pixel_value in image_data.flat:
-            mono_lut[pixel_value] += 1
+def _histogram_chunk(chunk: np.ndarray, mask_chunk: np.ndarray | None) -> np.ndarray:
+    """
+    Liczy histogram wszystkich kanałów jednego pasma obrazu, jedno wywołanie cv2.calcHist (w C) na kanał
+    :param chunk: pasmo obrazu uint8 (2D lub 3D)
+    :param mask_chunk: pasmo maski (uint8, 0 - pomijany pixel) albo None
+    :return: tablica (kanały, 256) z ilością pixel-i
+    """
+    channels = 1 if chunk.ndim == 2 else chunk.shape[2]
 
-        return mono_lut
+    counts = np.empty((channels, HISTOGRAM_BINS), dtype=np.int64)
+    for c in range(channels):
+        counts[c] = cv2.calcHist([chunk], [c], mask_chunk, [HISTOGRAM_BINS], [0, HISTOGRAM_BINS]).ravel()
+    return counts
 
-    # RGB
-    if len(image_data.shape) == 3:
-        blue_lut = np.zeros(256, dtype=np.uint32)
-        green_lut = np.zeros(256, dtype=np.uint32)
-        red_lut = np.zeros(256, dtype=np.uint32)
 
-        blue_channel = image_data[:, :, 0]
-        green_channel = image_data[:, :, 1]
-        red_channel = image_data[:, :, 2]
+def generate_lut_histogram(image_data: np.ndarray = None, mask: np.ndarray | None = None,
+                           roi: tuple[int, int, int, int] | None = None,
+                           threads: int = 1) -> None | np.ndarray | dict[str, np.ndarray]:
+    """
+    Funkcja generująca tablicę lut dla histogramu
 
-        for blue_pixel_value in blue_channel.flat:
-            blue_lut[blue_pixel_value] += 1
-        for green_pixel_value in green_channel.flat:
-            green_lut[green_pixel_value] += 1
-        for red_pixel_value in red_channel.flat:
-            red_lut[red_pixel_value] += 1
+    Obraz jest dzielony na poziome pasma, w każdym paśmie kanały są zliczane przez cv2.calcHist. Pasma można
+    liczyć równolegle w wątkach (OpenCV zwalnia GIL), wyniki są na końcu sumowane.
 
-        return {
-            'blue': blue_lut,
-            'green': green_lut,
-            'red': red_lut,
-        }
+    :param image_data: tablica numpy z obrazem
+    :param mask: opcjonalna maska tego samego rozmiaru co obraz, liczone są tylko pixel-e, gdzie maska > 0
+    :param roi: opcjonalny prostokąt (x, y, szerokość, wysokość), z którego liczony jest histogram
+    :param threads: ilość wątków liczących pasma, 1 - bez wątków
+    :return: tablica 256 wartości dla obrazu szaroodcieniowego lub słownik 'blue', 'green', 'red'
+    """
 
+    if image_data is None:
+        return None
 
-# Dla Lab1 - zadanie 3
-def linear_streching_histogram(image_data: np.ndarray):
-    """
-    Funkcja przyjmuje originalny obraz (image_data) i wykonuje operacje rozciągnięcia liniowego
-    Najciemniejszy pixels staje się czarny a najaśniejszy biały
+    if image_data.ndim not in (2, 3):
+        return None
 
-    Wzór:
-    Nowy pixel = (stary_pixel - wartość_minimalna) / (wartość_maksymalna - wartość_minimalna) * zakres_jasności
+    # Histogram ma 256 przedziałów po jednej jasności, więc inne typy nie mają poprawnego przedziału
+    if image_data.dtype != np.uint8:
+        raise ValueError(f"Histogram jest liczony tylko dla obrazów uint8, podano {image_data.dtype}")
 
-    Zoptymalizowany wzór
-    Nowy pixel = (stary_pixel - wartość_minimalna) * (255 / wartość_maksymalna - wartość_minimalna)
+    # Wycięcie ROI jako widoku, bez kopiowania danych
+    if roi is not None:
+        x, y, roi_width, roi_height = roi
+        image_data = image_data[y:y + roi_height, x:x + roi_width]
+        if mask is not None:
+            mask = mask[y:y + roi_height, x:x + roi_width]
 
-    :param image_data: tablica numpy z obrazem
-    :return: zwraca nową np.ndarray
-    """
+    if mask is not None:
+        if mask.shape[:2] != image_data.shape[:2]:
+            raise ValueError(f"Maska ma wymiar {mask.shape[:2]}, a obraz {image_data.shape[:2]}")
+        mask = mask if mask.dtype == np.uint8 else (mask > 0).astype(np.uint8)
 
-    # Definicja pod nowy canvas
-    height = image_data.shape[0]
-    width = image_data.shape[1]
+    height, width = image_data.shape[:2]
+    channels = 1 if image_data.ndim == 2 else image_data.shape[2]
 
-    # Kopia obrazu
-    new_image = np.zeros_like(image_data)
+    # Podział na pasma wierszy
+    rows_per_chunk = max(1, HISTOGRAM_MAX_CHUNK_PIXELS // max(width, 1))
+    bands = [(start, min(start + rows_per_chunk, height)) for start in range(0, height, rows_per_chunk)]
 
-    # Szaroodcieniowy
-    if len(image_data.shape) == 2:
-        print("Rozciąganie liniowe - Szaroodcieniowe")
+    def count_band(band):
+        start, stop = band
+        mask_chunk = None if mask is None else mask[start:stop]
+        return _histogram_chunk(image_data[start:stop], mask_chunk)
 
-        min_value = np.min(image_data)
-        max_value = np.max(image_data)
+    counts = np.zeros((channels, HISTOGRAM_BINS), dtype=np.int64)
 
-        if min_value == max_value:
-            return image_data
+    if threads > 1 and len(bands) > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for band_counts in executor.map(count_band, bands):
+                counts += band_counts
+    else:
+        for band in bands:
+            counts += count_band(band)
 
-        scale = 255 / (max_value - min_value)
+    counts = counts.astype(np.uint32)
 
-        # Pętla po wierszach
-        for y in range(height):
-            # Pętla po kolumntach
-            for x in range(width):
-                # Wartość starego pixela
-                old_pixel = image_data[y, x]
+    # Szaro-odcieniowy
+    if image_data.ndim == 2:
+        return counts[0]
 
-                # Nowy pixel wg wzoru. Zamieniam na float, aby podczas obliczeń nie ucinać mnożenia np. dla 2.5,
-                # może uciąć do 2
-                new_pixel = (float(old_pixel) - min_value) * scale
+    # RGB
+    return {
+        'blue': counts[0],
+        'green': counts[1],
+        'red': counts[2],
+    }
 
-                # Przypisanie do nowego obrazu oraz konwercja do int
-                new_image[y, x] = int(new_pixel)
 
-                # BGR
-    elif len(image_data.shape) == 3:
-        print("Rozciąganie liniowe - Kolorowe")
-        channels = image_data.shape[2]
+def histogram_channels(image_data: np.ndarray) -> list[np.ndarray]:
+    """
+    Histogramy kanałów obrazu jako lista w kolejności kanałów (dla kolorowego B, G, R)
+    :param image_data: tablica numpy z obrazem
+    :return: lista histogramów po 256 wartości
+    """
+    histogram = generate_lut_histogram(image_data)
 
-        for c in range(channels):
-            # Iteracja po kanałach
+    if isinstance(histogram, dict):
+        return [histogram['blue'], histogram['green'], histogram['red']]
+    return [histogram]
 
-            # Wyliczenie maksymalnej i minimalnej wartości dla jednego z 3 kanałów
-            current_channel_data = image_data[:, :, c]
-            min_value = np.min(current_channel_data)
-            max_value = np.max(current_channel_data)
 
-            # Zabezpieczenie
-            if max_value == min_value:
-                scale = 0
-            else:
-                # Obliczenie drugiej części wzoru
-                scale = 255.0 / (max_value - min_value)
+# Dla Lab1 - zadanie 3
+def linear_streching_lut(histogram: np.ndarray) -> np.ndarray:
+    """
+    Tablica przekształcenia dla rozciągnięcia liniowego jednego kanału.
+    Wartość minimalna i maksymalna jest odczytywana z histogramu, a nie z obrazu.
 
-            # Iteracja po wierszach
-            for y in range(height):
-                # Iteracja po kolumnach
-                for x in range(width):
-                    old_pixel = image_data[y, x, c]
+    :param histogram: histogram kanału (256 wartości)
+    :return: tablica lut uint8 (256 wartości)
+    """
+    occupied = np.flatnonzero(histogram)
 
-                    # Nowy pixel wg wzoru. Zamieniam na float, aby podczas obliczeń nie ucinać mnożenia np. dla 2.5,
-                    # może uciąć do 2
-                    new_pixel = (float(old_pixel) - min_value) * scale
+    # Pusty lub jednolity kanał zostaje bez zmian
+    if occupied.size == 0 or occupied[0] == occupied[-1]:
+        return np.arange(HISTOGRAM_BINS, dtype=np.uint8)
 
-                    # Przypisanie do nowego obrazu oraz konwercja do int
-                    new_image[y, x, c] = int(new_pixel)
+    min_value = int(occupied[0])
+    max_value = int(occupied[-1])
+    scale = 255 / (max_value - min_value)
 
-    return new_image
+    # Ten sam wzór co dla pojedynczego pixel-a, ale policzony raz dla każdej jasności
+    new_values = (np.arange(HISTOGRAM_BINS, dtype=np.float64) - min_value) * scale
+    return np.clip(new_values, 0, 255).astype(np.uint8)
 
 
-# Dla Lab1 - zadanie 3
-def linear_saturation_streching_histogram(image_data: np.ndarray):
+def linear_streching_histogram(image_data: np.ndarray):
     """
-    Rozciąganie liniowe z przesyceniem (5%)
-    Ucina 2.5% najciemniejszych i 2.5% najjaśniejszych pikseli
+    Funkcja przyjmuje originalny obraz (image_data) i wykonuje operacje rozciągnięcia liniowego
+    Najciemniejszy pixels staje się czarny a najaśniejszy biały
 
-    Zoptymalizowany wzór:
-    nowy_pixel = (stary_pixel - próg_dolny) * 255 / (próg_górny - próg_dolny)
+    Wzór:
+    Nowy pixel = (stary_pixel - wartość_minimalna) / (wartość_maksymalna - wartość_minimalna) * zakres_jasności
 
-    :param image_data: np.ndarray zdjęcie cv2
-    :return: zwraca nowe zdjęcie
+    Zoptymalizowany wzór
+    Nowy pixel = (stary_pixel - wartość_minimalna) * (255 / wartość_maksymalna - wartość_minimalna)
+
+    Wzór jest liczony raz dla każdej z 256 jasności (linear_streching_lut), a obraz jest przekształcany jednym
+    przejściem cv2.LUT.
+
+    :param image_data: tablica numpy z obrazem
+    :return: zwraca nową np.ndarray
     """
+    print("Rozciąganie liniowe")
+    return apply_point_operations(image_data, [("linear_streching_histogram", {})])
 
-    # Definicja pod nowy canvas
-    height = image_data.shape[0]
-    width = image_data.shape[1]
 
-    # Kopia obrazu
-    new_image = np.zeros_like(image_data)
+# Dla Lab1 - zadanie 3
+def linear_saturation_streching_lut(histogram: np.ndarray, low_percent: float = 2.5,
+                                    high_percent: float = 97.5) -> np.ndarray:
+    """
+    Tablica przekształcenia dla rozciągnięcia liniowego z przesyceniem jednego kanału.
+    Progi są percentylami odczytanymi z histogramu (histogram_percentile).
 
-    if len(image_data.shape) == 2:
-        print("Rozciąganie z saturacją - Szare")
+    Gdy oba progi są równe, kanał zostaje bez zmian (tablica tożsamościowa), także w obrazie kolorowym.
+    Pierwotna pętla tak traktowała tylko obraz szary, a taki kanał obrazu kolorowego zerowała (scale = 0).
 
-        # Wyliczenie progu dolnego
-        min_threshold = np.percentile(image_data, 2.5)
+    :param histogram: histogram kanału (256 wartości)
+    :param low_percent: percentyl progu dolnego
+    :param high_percent: percentyl progu górnego
+    :return: tablica lut uint8 (256 wartości)
+    """
+    # Wyliczenie progu dolnego
+    min_threshold = histogram_percentile(histogram, low_percent)
 
-        # Wyliczenie progu górnego
-        max_threshold = np.percentile(image_data, 97.5)
+    # Wyliczenie progu górnego
+    max_threshold = histogram_percentile(histogram, high_percent)
 
-        if min_threshold == max_threshold:
-            return image_data
+    # Zabezpieczenie
+    if min_threshold == max_threshold:
+        return np.arange(HISTOGRAM_BINS, dtype=np.uint8)
 
-        scale = 255 / (max_threshold - min_threshold)
+    scale = 255 / (max_threshold - min_threshold)
 
-        # Pętla po wierszach
-        for y in range(height):
-            # Pętla po kolumntach
-            for x in range(width):
-                # Wartość starego pixela
-                old_pixel = image_data[y, x]
+    # Zapobieganie liczbom większym 255 i mniejszym niż 0
+    new_values = (np.arange(HISTOGRAM_BINS, dtype=np.float64) - min_threshold) * scale
+    return np.clip(new_values, 0, 255).astype(np.uint8)
 
-                # Nowy pixel wg wzoru. Zamieniam na float, aby podczas obliczeń nie ucinać mnożenia np. dla 2.5,
-                # może uciąć do 2
-                new_pixel = (float(old_pixel) - min_threshold) * scale
 
-                # Zapobieganie liczbom większym 255 i mniejszym niż 0
-                new_pixel = np.clip(new_pixel, 0, 255)
+# Dla Lab1 - zadanie 3
+def linear_saturation_streching_histogram(image_data: np.ndarray, low_percent: float = 2.5,
+                                          high_percent: float = 97.5):
+    """
+    Rozciąganie liniowe z przesyceniem (domyślnie 5%)
+    Ucina low_percent% najciemniejszych i (100 - high_percent)% najjaśniejszych pikseli
 
-                # Przypisanie do nowego obrazu oraz konwercja do int
-                new_image[y, x] = int(new_pixel)
+    Zoptymalizowany wzór:
+    nowy_pixel = (stary_pixel - próg_dolny) * 255 / (próg_górny - próg_dolny)
 
-                # BGR
-    elif len(image_data.shape) == 3:
-        print("Rozciąganie liniowe - Kolorowe")
-        channels = image_data.shape[2]
+    Progi są odczytywane z sumy narastającej histogramu, a wzór jest liczony raz dla każdej jasności i nakładany
+    na obraz przez cv2.LUT. Kanał z równymi progami (np. jednolity) zostaje bez zmian, również w obrazie
+    kolorowym, gdzie pierwotna wersja ustawiała go na 0.
 
-        for c in range(channels):
-            # Iteracja po kanałach
+    :param image_data: np.ndarray zdjęcie cv2
+    :param low_percent: percentyl progu dolnego (0-100)
+    :param high_percent: percentyl progu górnego (0-100)
+    :return: zwraca nowe zdjęcie
+    """
+    if not 0 <= low_percent < high_percent <= 100:
+        raise ValueError(f"Niepoprawne percentyle: {low_percent}, {high_percent}")
 
-            # Wyliczenie progów
-            current_channel_data = image_data[:, :, c]
-            # Wyliczenie progu dolnego
-            min_threshold = np.percentile(current_channel_data, 2.5)
-            # Wyliczenie progu górnego
-            max_threshold = np.percentile(current_channel_data, 97.5)
+    print("Rozciąganie z saturacją")
+    return apply_point_operations(image_data, [("linear_saturation_streching_histogram",
+                                                {"low_percent": low_percent, "high_percent": high_percent})])
 
-            # Zabezpieczenie
-            if max_threshold == min_threshold:
-                scale = 0
-            else:
-                # Obliczenie drugiej części wzoru
-                scale = 255.0 / (max_threshold - min_threshold)
 
-            # Iteracja po wierszach
-            for y in range(height):
-                # Iteracja po kolumnach
-                for x in range(width):
-                    old_pixel = image_data[y, x, c]
+# Dla Lab1 - zadanie 3
+def histogram_equalization_lut(histogram: np.ndarray) -> np.ndarray:
+    """
+    Tablica przekształcenia equalizacji dla jednego kanału, punkty 2-4 algorytmu z histogram_equalization
+    policzone wektorowo.
 
-                    # Nowy pixel wg wzoru. Zamieniam na float, aby podczas obliczeń nie ucinać mnożenia np. dla 2.5,
-                    # może uciąć do 2
-                    new_pixel = (float(old_pixel) - min_threshold) * scale
+    :param histogram: histogram kanału (256 wartości)
+    :return: tablica lut uint8 (256 wartości)
+    """
+    # Punkt 2 algorytmu: suma narastająca
+    cdf_array = np.cumsum(histogram, dtype=np.float64)
+    total_pixels = cdf_array[-1]
 
-                    # Zapobieganie liczbom większym 255 i mniejszym niż 0
-                    new_pixel = np.clip(new_pixel, 0, 255)
+    # Punkt 3 algorytmu: pierwsza niezerowa wartość dystrybuanty
+    occupied = np.flatnonzero(cdf_array)
+    if occupied.size == 0:
+        return np.arange(HISTOGRAM_BINS, dtype=np.uint8)
+    cdf_min = cdf_array[occupied[0]]
 
-                    # Przypisanie do nowego obrazu oraz konwercja do int
-                    new_image[y, x, c] = int(new_pixel)
+    # Jednolity kanał, mianownik wzoru byłby zerem
+    if total_pixels == cdf_min:
+        return np.arange(HISTOGRAM_BINS, dtype=np.uint8)
 
-    return new_image
+    # Punkt 4 algorytmu
+    new_lut_table = ((cdf_array - cdf_min) / (total_pixels - cdf_min)) * 255
+    return np.clip(new_lut_table, 0, 255).astype(np.uint8)
 
 
 # Dla Lab1 - zadanie 3
-def histogram_equalization(image_data: np.ndarray):
+def histogram_equalization(image_data: np.ndarray, luts: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
     """
     Wyrównanie histogramu (Equalizacja).
 
@@ -241,96 +274,49 @@ def histogram_equalization(image_data: np.ndarray):
         wzór na nową wartość jasności
     3. Znalezienie dystrybuanty minimalnej, czyli miejsca w tablicy sumy narastającej gdzie jest pierwsza wartość
         niezerowa
-    4.  Na tablicy sumy narastającej wykonuję pętlę ze wzorem iwpisuję tę wartość do nowej tablicy lut zawierającą
-        przekształcenie
-    5. Na podstawie nowej tablicy lut wykonuję przekształcenie na cały obrazie pixel po pixelu, np. pixel o wartości 5
-        zmienia się w pixel o wartości 15, jeżeli w nowej tablicy lut nowa_tablica_lut[5] = 15
-    """
-
-    height, width = image_data.shape[:2]  # do obliczenia total_pixel do wzoru oraz na pętlę
-    total_pixels = height * width  # mianownik wzoru
-    new_image = np.zeros_like(image_data)  # zarezerwowanie pamięci na nowy obrazek
-
-    # Szaroodcieniowy
-    if len(image_data.shape) == 2:
-        print("Equalizacja - Szaroodcieniowe")
-
-        # Punkt 1 algorytmu
-        lut_hist = generate_lut_histogram(image_data)
-
-        # Punkt 2 algorytmu
-        cdf_array = np.zeros(int(len(lut_hist)))
-
-        for brightness, contu in enumerate(lut_hist):
-            if brightness == 0:
-                cdf_array[brightness] = lut_hist[brightness]
-            else:
-                cdf_array[brightness] = cdf_array[brightness - 1] + lut_hist[brightness]
-
-        # Punkt 3 algorytmu
-        cdf_min = 0
-        for value in cdf_array:
-            if value > 0:
-                cdf_min = value
-                break
-
-        # Punkt 4 algorytmu
-        new_lut_table = np.zeros(int(len(lut_hist)))
+    4.  Na tablicy sumy narastającej wyliczam wzór dla wszystkich jasności naraz i wpisuję do nowej tablicy lut
+        zawierającej przekształcenie (histogram_equalization_lut)
+    5. Na podstawie nowej tablicy lut wykonuję przekształcenie całego obrazu jednym wywołaniem cv2.LUT, np. pixel
+        o wartości 5 zmienia się w pixel o wartości 15, jeżeli w nowej tablicy lut nowa_tablica_lut[5] = 15.
+        Dla obrazu kolorowego wszystkie 3 kanały są przekształcane w tym samym przejściu.
 
-        for index, cdf in enumerate(cdf_array):
-            new_lut_table[index] = ((cdf_array[index] - cdf_min) / (total_pixels - cdf_min)) * 255
+    Zwrócona tablica lut może być użyta ponownie dla innych obrazów (parametr luts), np. aby wyrównać serię klatek
+    jedną dystrybuantą obrazu referencyjnego (equalize_frames).
 
-        # Punkt 5 algorytmu
-        # Iteracja po wierszach pixeli obrazu
-        for x in range(height):
-            # Iteracja po kolumnach pixeli obrazu
-            for y in range(width):
-                current_pixel_value = image_data[x, y]
-                new_pixel_value = new_lut_table[current_pixel_value]
-                new_image[x, y] = new_pixel_value
-
-    # Kolorowy
-    if len(image_data.shape) == 3:
-        print("Equalizacja - Kolorowe")
-
-        # Dla każdego kanału należy obliczyć nową wartość, a nie dla ich sumy
-        for channel in range(image_data.shape[2]):
+    :param image_data: tablica numpy z obrazem
+    :param luts: gotowe tablice przekształcenia, jeżeli podane punkty 1-4 są pomijane
+    :return: krotka (nowy obraz, tablica lut (256,) dla szarego lub (kanały, 256) dla kolorowego)
+    """
+    if luts is None:
+        luts = compile_point_operations([("histogram_equalization", {})], histogram_channels(image_data))
 
-            # Punkt 1 algorytmu
-            lut_hist = generate_lut_histogram(image_data[:, :, channel])
+        # Dla obrazu szaroodcieniowego zwracam pojedynczą tablicę
+        if image_data.ndim == 2:
+            luts = luts[0]
 
-            # Punkt 2 algorytmu
-            cdf_array = np.zeros(int(len(lut_hist)))
+    return apply_lut(image_data, luts), luts
 
-            for brightness, contu in enumerate(lut_hist):
-                if brightness == 0:
-                    cdf_array[brightness] = lut_hist[brightness]
-                else:
-                    cdf_array[brightness] = cdf_array[brightness - 1] + lut_hist[brightness]
 
-            # Punkt 3 algorytmu
-            cdf_min = 0
-            for value in cdf_array:
-                if value > 0:
-                    cdf_min = value
-                    break
+# Dla Lab1 - zadanie 3
+def equalize_frames(frames: Iterable[np.ndarray], reference_image: np.ndarray) -> Iterator[np.ndarray]:
+    """
+    Wyrównuje serię klatek jedną dystrybuantą obrazu referencyjnego.
+    Tablica lut jest liczona raz, a każda klatka to tylko jedno przejście cv2.LUT.
 
-            # Punkt 4 algorytmu
-            new_lut_table = np.zeros(int(len(lut_hist)))
+    :param frames: klatki (lista lub generator) o tej samej ilości kanałów co obraz referencyjny
+    :param reference_image: obraz, z którego liczona jest dystrybuanta
+    :return: generator wyrównanych klatek
+    """
+    _, luts = histogram_equalization(reference_image)
 
-            for index, cdf in enumerate(cdf_array):
-                new_lut_table[index] = ((cdf_array[index] - cdf_min) / (total_pixels - cdf_min)) * 255
+    for frame in frames:
+        yield apply_lut(frame, luts)
 
-            # Punkt 5 algorytmu
-            # Iteracja po wierszach pixeli obrazu
-            for x in range(height):
-                # Iteracja po kolumnach pixeli obrazu
-                for y in range(width):
-                    current_pixel_value = image_data[x, y, channel]
-                    new_pixel_value = new_lut_table[current_pixel_value]
-                    new_image[x, y, channel] = new_pixel_value
 
-    return new_image
+# Dla Lab1 - zadanie 4
+def point_negation_lut() -> np.ndarray:
+    """Tablica przekształcenia dla negacji"""
+    return (255 - np.arange(HISTOGRAM_BINS)).astype(np.uint8)
 
 
 # Dla Lab1 - zadanie 4
@@ -342,8 +328,22 @@ def point_negation(image_data: np.ndarray):
     :return: Zwraca nowy obraz
     """
 
-    # Biblioteka numpy odejmuje 255 od każdego elementu w tablicy
-    return 255 - image_data
+    return apply_point_operations(image_data, [("point_negation", {})])
+
+
+# Dla Lab1 - zadanie 4
+def point_posterize_lut(levels: int) -> np.ndarray:
+    """
+    Tablica przekształcenia dla posteryzacji
+    :param levels: ilość poziomów
+    :return: tablica lut uint8 (256 wartości)
+    """
+    # Punkt 1 algorytmu
+    steps = ((255 / (levels - 1)) * np.arange(levels)).astype(np.uint8)
+
+    # Punkt 2 algorytmu, dla każdej jasności naraz
+    step_indexes = (np.arange(HISTOGRAM_BINS) * levels) // 256
+    return steps[step_indexes]
 
 
 # Dla Lab1 - zadanie 4
@@ -363,52 +363,20 @@ def point_posterize(image_data: np.ndarray, levels: int):
         Wzór do wyliczenia, do jakiego zakresu wpada pixel:
         index_zakresu = floor((stary_pixel * levels) / 256)
 
+    Punkt 2 jest liczony raz dla każdej jasności (point_posterize_lut), a nie dla każdego pixel-a.
 
     :param image_data: tablica z danym obrazu
     :param levels: podany przez użytkownika numer
     :return: Zwraca nowy obraz
     """
-    height, width = image_data.shape[:2]
-    new_image = np.zeros_like(image_data)
-
-    # Szaroodcieniowe
-    if len(image_data.shape) == 2:
-        print("Posteryzacja - Szaroodcieniowe")
-        # Punkt 1 algorytmu
-        steps = np.zeros(levels)
-
-        for index in range(len(steps)):
-            steps[index] = int((255 / (levels - 1)) * index)
+    print("Posteryzacja")
+    return apply_point_operations(image_data, [("point_posterize", {"levels": levels})])
 
-        # Punkt 2 algorytmu
-        for x in range(height):
-            for y in range(width):
-                # Przepisuję do zmiennej z int() ponieważ dane są w uint8, czyli podczas mnożenia
-                # dostanę resztę z dzielenia
-                old_pixel_value = int(image_data[x, y])
-                step = math.floor((old_pixel_value * levels) / 256)
-                new_image[x, y] = steps[step]
 
-    if len(image_data.shape) == 3:
-        print("Posteryzacja - Kolorowe")
-
-        for channel in range(image_data.shape[2]):
-            # Punkt 1 algorytmu
-            steps = np.zeros(levels)
-
-            for index in range(len(steps)):
-                steps[index] = int((255 / (levels - 1)) * index)
-
-            # Punkt 2 algorytmu
-            for x in range(height):
-                for y in range(width):
-                    # Przepisuję do zmiennej z int() ponieważ dane są w uint8, czyli podczas mnożenia dostanę
-                    # resztę z dzielenia
-                    old_pixel_value = int(image_data[x, y, channel])
-                    step = math.floor((old_pixel_value * levels) / 256)
-                    new_image[x, y, channel] = steps[step]
-
-    return new_image
+# Dla Lab1 - zadanie 4
+def point_binary_threshold_lut(threshold: int) -> np.ndarray:
+    """Tablica przekształcenia dla progowania binarnego"""
+    return np.where(np.arange(HISTOGRAM_BINS) > threshold, 255, 0).astype(np.uint8)
 
 
 # Dla Lab1 - zadanie 4
@@ -423,10 +391,41 @@ def point_binary_threshold(image_data: np.ndarray, threshold: int):
     :param threshold: próg podany przez użytkownika
     :return: zwraca nowy obraz
     """
-    # Biblioteka numpy dla każdego elementu wykonuje operację:
-    # np.where(warunek, jeżeli_tak, jeżeli_nie)
-    # dodatkowo należy dodać typ, w jakim zostanie zwrócona wartość
-    return np.where(image_data > threshold, 255, 0).astype(np.uint8)
+    return apply_point_operations(image_data, [("point_binary_threshold", {"threshold": threshold})])
+
+
+# Dla Lab1 - zadanie 4
+def otsu_threshold(histogram: np.ndarray) -> int:
+    """
+    Próg Otsu liczony z samego histogramu (256 wartości), bez przeglądania pixel-i.
+    Wybiera próg, dla którego wariancja międzyklasowa tła (<= próg) i obiektów (> próg) jest największa,
+    tak jak w point_binary_threshold.
+    :param histogram: histogram (256,)
+    :return: próg 0-255 do progowania binarnego
+    """
+    histogram = np.asarray(histogram, dtype=np.float64)
+    total = histogram.sum()
+    if total == 0:
+        return 0
+
+    # Waga i suma jasności tła dla każdego progu t (pixel-e o jasności <= t), obiekty to reszta
+    background_weight = np.cumsum(histogram)
+    background_sum = np.cumsum(histogram * np.arange(histogram.size))
+    foreground_weight = total - background_weight
+    foreground_sum = background_sum[-1] - background_sum
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between_variance = background_weight * foreground_weight * \
+            (background_sum / background_weight - foreground_sum / foreground_weight) ** 2
+
+    return int(np.nanargmax(np.nan_to_num(between_variance, nan=-1.0)))
+
+
+# Dla Lab1 - zadanie 4
+def point_keep_gray_threshold_lut(threshold: int) -> np.ndarray:
+    """Tablica przekształcenia dla progowania z zachowaniem poziomów szarości"""
+    brightness = np.arange(HISTOGRAM_BINS)
+    return np.where(brightness > threshold, brightness, 0).astype(np.uint8)
 
 
 # Dla Lab1 - zadanie 4
@@ -442,7 +441,7 @@ def point_keep_gray_threshold(image_data: np.ndarray, threshold: int):
     :return: zwraca nowy obraz
     """
 
-    return np.where(image_data > threshold, image_data, 0).astype(np.uint8)
+    return apply_point_operations(image_data, [("point_keep_gray_threshold", {"threshold": threshold})])
 
 
 # Dla Lab2 - zadanie 1
@@ -457,104 +456,329 @@ def check_compatibility(img1: np.ndarray, img2: np.ndarray) -> bool:
 
 
 # Dla Lab2 - zadanie 1
-def multi_image_addition(images: list[np.ndarray], saturate: bool = True):
+# Ile obrazów 8-bitowych mieści się w akumulatorze uint16 bez przepełnienia: 257 * 255 = 65535
+UINT16_ACCUMULATOR_LIMIT = 257
+
+# Ilość obrazów w toku (wczytywanych lub czekających na dodanie) na jeden wątek accumulate_images
+ACCUMULATE_TASKS_PER_WORKER = 2
+
+
+class ImageAccumulator:
     """
-    Algorytmy:
-    Dla saturacji pozytywnej:
-    Dodaję tablicę obrazów do siebie i na końcu obcinam wszystkie wartości do maksymalnej jasności
+    Akumulator do sumowania obrazów 8-bitowych jeden po drugim, bez kopii float32.
 
-    Dla saturacji negatywnej, czyli uśrednienie:
-    Dodaję również każdą tablicę do siebie, ale wartości każdej z nich dzielę przez ilość przekazanych obrazów,
-    dzięki czemu nie tracę danych podczas ucinania, ponieważ ucinać nie trzeba.
+    Dla wysycenia wystarcza akumulator uint8 i dodawanie z nasyceniem (cv2.add), ponieważ dla wartości nieujemnych
+    min(min(a + b, 255) + c, 255) = min(a + b + c, 255).
+    Dla uśrednienia suma jest liczona dokładnie w uint16, a po przekroczeniu 257 obrazów w uint32.
+    Wynikiem uśrednienia jest część całkowita z dokładnej średniej.
+    """
 
-    Funkcja dodająca obrazy do siebie
-    :param images: przekazana lista zdjęć z dialogu
-    :param saturate: True: Suma i obcięcie do 255, False: Uśrednianie, czyli skalowanie wagowe z uniknięciem wysycenia
-    :return: Zwraca gotowy obraz
+    def __init__(self, saturate: bool = True, reference_shape: tuple | None = None):
+        """
+        :param saturate: True: Suma i obcięcie do 255, False: Uśrednianie
+        :param reference_shape: wymiar, jaki muszą mieć wszystkie obrazy, domyślnie wymiar pierwszego obrazu
+        """
+        self.saturate = saturate
+        self.reference_shape = reference_shape
+        self.accumulator = None
+        self.count = 0
+
+    def add(self, image: np.ndarray, index: int | None = None) -> None:
+        """
+        Dodaje obraz do akumulatora w miejscu, bez tworzenia kopii obrazu
+        :param image: obraz uint8
+        :param index: numer obrazu do komunikatu o błędzie
+        """
+        if self.reference_shape is None:
+            self.reference_shape = image.shape
+
+        if image.shape != self.reference_shape:
+            number = self.count + 1 if index is None else index + 1
+            raise ValueError(f"Niezgodność rozmiarów! Pierwszy przekazany obraz ma {self.reference_shape}. Przekazany "
+                             f"{number} obraz ma wymiar {image.shape}")
+
+        if self.accumulator is None:
+            self.accumulator = image.copy() if self.saturate else image.astype(np.uint16)
+        elif self.saturate:
+            cv2.add(self.accumulator, image, dst=self.accumulator)
+        else:
+            self._ensure_capacity(self.count + 1)
+            np.add(self.accumulator, image, out=self.accumulator)
+
+        self.count += 1
+
+    def merge(self, other: "ImageAccumulator") -> "ImageAccumulator":
+        """Dołącza sumę innego akumulatora, np. policzonego w osobnym wątku lub procesie"""
+        if other.accumulator is None:
+            return self
+        if self.accumulator is None:
+            self.accumulator, self.count = other.accumulator, other.count
+            return self
+
+        if self.saturate:
+            cv2.add(self.accumulator, other.accumulator, dst=self.accumulator)
+        else:
+            self._ensure_capacity(self.count + other.count)
+            np.add(self.accumulator, other.accumulator, out=self.accumulator)
+
+        self.count += other.count
+        return self
+
+    def result(self) -> np.ndarray | None:
+        """Zwraca gotowy obraz uint8"""
+        if self.accumulator is None:
+            return None
+
+        if self.saturate:
+            return self.accumulator.copy()
+
+        return (self.accumulator // self.count).astype(np.uint8)
+
+    def _ensure_capacity(self, count: int) -> None:
+        # Zamiana akumulatora na uint32 dopiero wtedy, gdy suma mogłaby przekroczyć zakres uint16
+        if count > UINT16_ACCUMULATOR_LIMIT and self.accumulator.dtype == np.uint16:
+            self.accumulator = self.accumulator.astype(np.uint32)
+
+
+# Dla Lab2 - zadanie 1
+def accumulate_images(images: Iterable, saturate: bool = True, workers: int = 1,
+                      load: Callable[[object], np.ndarray] | None = None) -> np.ndarray | None:
+    """
+    Sumuje lub uśrednia strumień obrazów (lista albo generator), trzymając w pamięci tylko akumulator
+    i aktualnie dodawane obrazy.
+
+    Zamiast gotowych obrazów można przekazać elementy (np. ścieżki plików) i funkcję load, która zamienia element
+    na obraz. Przy workers > 1 load (wczytanie i dekodowanie) działa równolegle w wątkach, a blokada obejmuje
+    tylko dodanie gotowego obrazu do wspólnego akumulatora. Elementy są pobierane ze strumienia w wątku
+    wywołującym, najwyżej ACCUMULATE_TASKS_PER_WORKER * workers naraz, więc strumień nie trafia do pamięci w całości.
+
+    :param images: obrazy uint8 o tym samym wymiarze albo elementy zamieniane na obrazy przez load
+    :param saturate: True: Suma i obcięcie do 255, False: Uśrednianie
+    :param workers: ilość wątków
+    :param load: opcjonalna funkcja zwracająca obraz dla elementu, np. cv2.imread dla ścieżek
+    :return: gotowy obraz albo None, jeżeli nie przekazano obrazów
     """
+    def read(item) -> np.ndarray:
+        return item if load is None else load(item)
 
-    if not images:
+    numbered_items = enumerate(images)
+
+    # Pierwszy obraz ustala wymiar, z którym są porównywane kolejne
+    first = next(numbered_items, None)
+    if first is None:
         return None
 
-    # Walidacja rozmiarów
-    reference_image = images[0]
+    accumulator = ImageAccumulator(saturate)
+    accumulator.add(read(first[1]), first[0])
 
-    # Iteracja po liście zdjęć bez pierwszeg o porównanie ich między sobą
-    for index, image in enumerate(images[1:]):
-        if not check_compatibility(reference_image, image):
-            raise ValueError(f"Niezgodność rozmiarów! Pierwszy przekazany obraz ma {reference_image.shape}. Przekazany "
-                             f"{index + 2} obraz ma wymiar {image.shape}")
+    if workers <= 1:
+        for index, item in numbered_items:
+            accumulator.add(read(item), index)
+        return accumulator.result()
 
-    # Konwertuję na float dla precyzji obliczeń
-    result_image_float = np.zeros_like(reference_image, dtype=np.float32)
+    lock = threading.Lock()
 
-    images_count = len(images)
+    def add_item(index: int, item) -> None:
+        # Wczytanie poza blokadą, więc wątki dekodują obrazy równolegle
+        image = read(item)
+        with lock:
+            accumulator.add(image, index)
 
-    # Dla wysycenia
-    if saturate:
-        # Zsumowanie wartości
-        for image in images:
-            result_image_float += image.astype(np.float32)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for index, item in numbered_items:
+            if len(pending) >= ACCUMULATE_TASKS_PER_WORKER * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    # Przekazuje dalej ewentualny wyjątek, np. niezgodność rozmiarów
+                    future.result()
+            pending.add(executor.submit(add_item, index, item))
 
-        # Obcięcie wartości nadmiarowych
-        result_image_float = np.clip(result_image_float, 0, 255)
+        for future in pending:
+            future.result()
 
-    # Bez wysycenia
-    if not saturate:
-        # Zsumowanie wartości, ale podzielenie przez sumę przekazanych obrazów
-        for image in images:
-            result_image_float += (image.astype(np.float32) / images_count)
+    return accumulator.result()
 
-        # Dla pewności klipuję
-        result_image_float = np.clip(result_image_float, 0, 255)
 
-    # Konwertuję na odpowiedni typ danych
-    result_image_uint8 = result_image_float.astype(np.uint8)
+# Dla Lab2 - zadanie 1
+def multi_image_addition(images: Iterable[np.ndarray], saturate: bool = True, workers: int = 1):
+    """
+    Algorytmy:
+    Dla saturacji pozytywnej:
+    Dodaję obrazy do siebie z nasyceniem, czyli każda suma jest od razu obcinana do maksymalnej jasności.
+    Wynik jest taki sam jak przy obcięciu na końcu, ponieważ jasności są nieujemne.
 
-    return result_image_uint8
+    Dla saturacji negatywnej, czyli uśrednienie:
+    Dodaję każdy obraz do dokładnej sumy całkowitej (uint16/uint32) i na końcu dzielę przez ilość obrazów,
+    dzięki czemu nie tracę danych podczas ucinania, ponieważ ucinać nie trzeba.
+
+    Obrazy są dodawane strumieniowo (ImageAccumulator), więc zamiast listy można przekazać generator.
+
+    Funkcja dodająca obrazy do siebie
+    :param images: przekazana lista zdjęć z dialogu lub generator obrazów
+    :param saturate: True: Suma i obcięcie do 255, False: Uśrednianie, czyli skalowanie wagowe z uniknięciem wysycenia
+    :param workers: ilość wątków sumujących (accumulate_images)
+    :return: Zwraca gotowy obraz
+    """
+    return accumulate_images(images, saturate=saturate, workers=workers)
 
 
 # Dla Lab2 - zadanie 1
-def scalar_operation(image_data: np.ndarray, value: int, operation: str, saturate: bool):
+def scalar_operation_lut(value: int, operation: str, saturate: bool) -> np.ndarray:
     """
-    Operacje skalarne, czyli wykonanie operacji matematycznych na jasności obrazu np. dodawanie, odejmowanie, dzielenie,
-    ale z użyciem liczby
+    Tablica przekształcenia dla operacji skalarnej. Wzory są te same co dla obrazu, tylko liczone na 256 jasnościach.
 
-    :param image_data: przekazany obraz
     :param value: wartość, o którą należy zmienić obraz
-    :param operation: 'add', 'multiply', 'division'
+    :param operation: 'addition', 'multiplication', 'division'
     :param saturate: True / False
-    :return: zwraca nowy obraz
+    :return: tablica lut uint8 (256 wartości)
     """
-    # Przepisanie obrazu ze zmianą typu danych dla dokładniejszych obliczeń matematycznych
-    image_float = image_data.astype(np.float32)
-    result_image = None
-
-    if image_data is None:
-        return None
+    # float32 tak jak wcześniej dla całego obrazu, żeby zaokrąglenia wyszły identycznie
+    brightness = np.arange(HISTOGRAM_BINS, dtype=np.float32)
 
     if operation == 'addition':
         if saturate:
             # Tutaj dodaję a na końcu i tak klipuję każdą operację
-            result_image = image_float + value
+            result_lut = brightness + value
         else:
-            result_image = (image_float * 0.5) + (value * 0.5)
+            result_lut = (brightness * 0.5) + (value * 0.5)
 
     elif operation == 'multiplication':
         if saturate:
-            result_image = image_float * value
+            result_lut = brightness * value
         else:
             # Obraz wynikowy się nie zmieni, ale to dodaję ze względu na uwagę
-            result_image = (image_float / value) * value
+            result_lut = (brightness / value) * value
     elif operation == 'division':
         if value == 0:
-            return image_float  # Nie można dzielić przez 0
+            return np.arange(HISTOGRAM_BINS, dtype=np.uint8)  # Nie można dzielić przez 0
 
         # Nie potrzeba if-a dla saturacji, ponieważ wartości podczas dzielenia nigdy nie przekroczy 255
-        result_image = image_float / value
+        result_lut = brightness / value
+    else:
+        raise ValueError(f"Nieznana operacja skalarna: {operation}")
 
-    result_image = np.clip(result_image, 0, 255)
-    return result_image.astype(np.uint8)
+    return np.clip(result_lut, 0, 255).astype(np.uint8)
+
+
+# Dla Lab2 - zadanie 1
+def scalar_operation(image_data: np.ndarray, value: int, operation: str, saturate: bool):
+    """
+    Operacje skalarne, czyli wykonanie operacji matematycznych na jasności obrazu np. dodawanie, odejmowanie, dzielenie,
+    ale z użyciem liczby
+
+    :param image_data: przekazany obraz
+    :param value: wartość, o którą należy zmienić obraz
+    :param operation: 'addition', 'multiplication', 'division'
+    :param saturate: True / False
+    :return: zwraca nowy obraz
+    """
+    if image_data is None:
+        return None
+
+    return apply_point_operations(image_data, [("scalar_operation", {"value": value,
+                                                                     "operation": operation,
+                                                                     "saturate": saturate})])
+
+
+# Kompilator operacji punktowych
+# Każda operacja punktowa na obrazie 8-bitowym to funkcja jasność -> jasność, więc da się ją zapisać jako tablicę
+# 256 wartości. Łańcuch takich operacji to złożenie tablic, a obraz wystarczy przekształcić raz, na końcu.
+
+# Nazwa operacji: (funkcja tworząca tablicę lut, czy potrzebuje histogramu kanału)
+POINT_OPERATION_LUTS = {
+    "point_negation": (point_negation_lut, False),
+    "point_posterize": (point_posterize_lut, False),
+    "point_binary_threshold": (point_binary_threshold_lut, False),
+    "point_keep_gray_threshold": (point_keep_gray_threshold_lut, False),
+    "scalar_operation": (scalar_operation_lut, False),
+    "linear_streching_histogram": (linear_streching_lut, True),
+    "linear_saturation_streching_histogram": (linear_saturation_streching_lut, True),
+    "histogram_equalization": (histogram_equalization_lut, True),
+}
+
+
+def compile_point_operations(operations: list[tuple[str, dict]],
+                             histograms: list[np.ndarray] | None = None,
+                             channels: int = 1) -> np.ndarray:
+    """
+    Składa łańcuch operacji punktowych w jedną tablicę lut na kanał.
+
+    Operacje zależne od obrazu (rozciąganie, equalizacja) dostają histogram obrazu po wszystkich poprzednich
+    krokach. Histogram nie jest liczony na nowo z pixel-i, tylko przenoszony przez tablicę:
+    nowy_histogram[lut[i]] += histogram[i]
+
+    :param operations: lista par (nazwa operacji z POINT_OPERATION_LUTS, słownik parametrów)
+    :param histograms: histogram każdego kanału obrazu wejściowego, wymagany dla operacji zależnych od obrazu
+    :param channels: ilość kanałów, używana, gdy nie przekazano histogramów
+    :return: tablica uint8 o wymiarze (kanały, 256)
+    """
+    if histograms is not None:
+        channels = len(histograms)
+        histograms = [np.asarray(histogram, dtype=np.float64) for histogram in histograms]
+
+    # Na start tablica tożsamościowa dla każdego kanału
+    luts = np.tile(np.arange(HISTOGRAM_BINS, dtype=np.uint8), (channels, 1))
+
+    for name, params in operations:
+        if name not in POINT_OPERATION_LUTS:
+            raise ValueError(f"Nieznana operacja punktowa: {name}")
+
+        build_lut, needs_histogram = POINT_OPERATION_LUTS[name]
+
+        if needs_histogram and histograms is None:
+            raise ValueError(f"Operacja {name} wymaga histogramu obrazu")
+
+        for c in range(channels):
+            step_lut = build_lut(histograms[c], **params) if needs_histogram else build_lut(**params)
+
+            # Przeniesienie histogramu przez ten krok, aby kolejne kroki widziały obraz po przekształceniu
+            if histograms is not None:
+                histograms[c] = np.bincount(step_lut, weights=histograms[c], minlength=HISTOGRAM_BINS)
+
+            # Złożenie: najpierw dotychczasowy łańcuch, potem nowy krok
+            luts[c] = step_lut[luts[c]]
+
+    return luts
+
+
+def apply_lut(image_data: np.ndarray, luts: np.ndarray) -> np.ndarray:
+    """
+    Przekształca obraz tablicą lut jednym przejściem po pamięci (cv2.LUT)
+    :param image_data: obraz uint8 (szaroodcieniowy lub kolorowy)
+    :param luts: tablica (256,) wspólna dla kanałów albo (kanały, 256) osobna dla każdego kanału
+    :return: nowy obraz
+    """
+    luts = np.asarray(luts, dtype=np.uint8)
+
+    if luts.ndim == 1 or image_data.ndim == 2:
+        return cv2.LUT(image_data, luts.reshape(-1)[:HISTOGRAM_BINS])
+
+    # cv2.LUT oczekuje dla wielu kanałów tablicy (1, 256, kanały)
+    return cv2.LUT(image_data, np.ascontiguousarray(luts.T).reshape(1, HISTOGRAM_BINS, -1))
+
+
+def apply_point_operations(image_data: np.ndarray, operations: list[tuple[str, dict]],
+                           histograms: list[np.ndarray] | None = None) -> np.ndarray:
+    """
+    Wykonuje łańcuch operacji punktowych jednym przejściem po obrazie
+    :param image_data: obraz uint8
+    :param operations: lista par (nazwa operacji, słownik parametrów), np.
+        [("point_negation", {}), ("point_posterize", {"levels": 4}), ("linear_streching_histogram", {})]
+    :param histograms: wcześniej policzony histogram każdego kanału tego obrazu (np. z VersionedImage),
+        wtedy obraz nie jest przeglądany drugi raz
+    :return: nowy obraz
+    """
+    if image_data is None:
+        return None
+
+    channels = 1 if image_data.ndim == 2 else image_data.shape[2]
+
+    if histograms is None and any(POINT_OPERATION_LUTS.get(name, (None, False))[1] for name, _ in operations):
+        histograms = histogram_channels(image_data)
+
+    luts = compile_point_operations(operations, histograms, channels)
+    return apply_lut(image_data, luts)
 
 
 # Dla Lab2 - zadanie 1
@@ -770,42 +994,36 @@ def apply_linear_filter(image: np.ndarray, kernel: np.ndarray, border_type: int,
     padding_width = kernel.shape[1] // 2  # dzielenie całkowite przez 2
 
     # Wypełnienie ramki stałą wartością n.
-    # 9999 dla BORDER_OVERWRITE
-    if border_type == 9999:
-        result_image = cv2.filter2D(src=image, ddepth=-1, kernel=kernel, borderType=cv2.BORDER_REPLICATE)
-
-        # Nadpisanie ramki
-        if padding_height > 0:
-            # Nadpisuję do x np. 1 i wszystkie kolumny
-            result_image[:padding_height, :] = border_value
-            # Nadpisuję od x np. -1 - czyli od przedostatniego elementu do końca i wszystkie kolumny
-            result_image[-padding_height:, :] = border_value
-        if padding_width > 0:
-            # Wszystkie wiersze i do np. 1 kolumny y
-            result_image[:, :padding_width] = border_value
-            # Wszsytkie wiersze i od np. przed ostatniego do końca
-            result_image[:, -padding_width:] = border_value
-
-        return result_image
-
-    # Obramówka stała
+    if border_type == BORDER_OVERWRITE:
+        result_image = apply_kernel(image, kernel, -1, cv2.BORDER_REPLICATE)
+
+        # Nadpisanie ramki w miejscu, np. dla maski 3x3 pierwszy i ostatni wiersz oraz pierwsza i ostatnia kolumna
+        return overwrite_border(result_image, padding_height, padding_height, padding_width, padding_width,
+                                border_value)
+
+    # Obramówka stała, pasy przy krawędziach są liczone osobno bez powiększania całego zdjęcia
     elif border_type == cv2.BORDER_CONSTANT:
-        # Powiększam zdjęcie o margines jasności podanej przez użytkownika
-        padded_image = cv2.copyMakeBorder(
-            image,
-            top=padding_height, bottom=padding_height, left=padding_width, right=padding_width,
-            borderType=cv2.BORDER_CONSTANT,
-            value=border_value
-        )
-        # Wykonuję operacje na powiększonym zdjęciu
-        result_padded_image = cv2.filter2D(src=padded_image, ddepth=-1, kernel=kernel, borderType=border_type)
-
-        # Zwracam kopie wyciętego obrazka. Wyciętego dlatego, aby zachował oryginalny rozmiar.
-        return result_padded_image[padding_height: -padding_height, padding_width:-padding_width].copy()
+        return apply_kernel_constant_border(image, kernel, -1, border_value)
 
     # W wypadku BORDER_REFLECT po prostu przekazuję to do metody opencv
     else:
-        return cv2.filter2D(src=image, ddepth=-1, kernel=kernel, borderType=border_type)
+        return apply_kernel(image, kernel, -1, border_type)
+
+
+def sharpening_kernel(kernel: np.ndarray) -> np.ndarray:
+    """
+    Składa wyostrzanie w jedną maskę: obraz +/- krawędzie = filtr(obraz, tożsamość +/- maska Laplace'a)
+    Jeżeli środek maski jest ujemny (np. -4), to krawędzie są odejmowane, w przeciwnym wypadku dodawane.
+    :param kernel: maska Laplace'a
+    :return: maska wyostrzająca float32
+    """
+    kernel = np.asarray(kernel, dtype=np.float32)
+    center = (kernel.shape[0] // 2, kernel.shape[1] // 2)
+
+    fused_kernel = -kernel if kernel[center] < 0 else kernel.copy()
+    fused_kernel[center] += 1
+
+    return fused_kernel
 
 
 def apply_laplacian_sharpening(image: np.ndarray, kernel: np.ndarray, border_type: int, border_value: int):
@@ -815,79 +1033,145 @@ def apply_laplacian_sharpening(image: np.ndarray, kernel: np.ndarray, border_typ
     Algorytm:
     Obraz wyostrzony = obraz oryginalny + wykryte krawędzie
 
+    Oryginał i krawędzie są złożone w jedną maskę (sharpening_kernel), więc obraz jest filtrowany raz
+    i od razu zapisywany jako uint8 z obcięciem do 0-255, bez pośrednich obrazów float32.
+
     :param image: przekazane zdjęcie
     :param kernel: wybrana macierz do wykonania operacji
     :param border_type: typ uzupełnienia krawędzi zdjęcia
     :param border_value określa, z jaką wartością ma być wypełniona ramka lub jaką wartość marginesów ma brać
     :return: zwraca nowe zdjęcie
     """
-    # Konwersja podobnie jak w funkcjach powyżej, aby nie tracić wartości ujemnych przy filtracji
-    image_float = image.astype(np.float32)
+    fused_kernel = sharpening_kernel(kernel)
 
-    # Sprawdzenie, jaka jest wartość środkowa
-    center_value = kernel[1, 1]
+    # Dla masek całkowitych wynik filtracji jest liczbą całkowitą, więc OpenCV może od razu zapisać uint8.
+    # Dla innych masek wynik jest obcinany (nie zaokrąglany), tak jak przy rzutowaniu float32 na uint8
+    integer_kernel = np.array_equal(fused_kernel, np.round(fused_kernel))
+    ddepth = -1 if integer_kernel else cv2.CV_32F
 
     padding_height = kernel.shape[0] // 2  # dzielenie całkowite przez 2
     padding_width = kernel.shape[1] // 2  # dzielenie całkowite przez 2
 
     # Wypełnienie ramki stałą wartością n.
-    # 9999 dla BORDER_OVERWRITE
-    if border_type == 9999:
-
-        # Obliczenie krawędzi
-        # cv2.CV_32F to jest oznaczenie typu pamięci, jakie ma wykorzystać opencv
-        # Wyżej przekonwertowałem do float32 więc tutaj muszę też użyć float32
-        edges = cv2.filter2D(image_float, cv2.CV_32F, kernel, borderType=cv2.BORDER_REPLICATE)
-
-        # Jeżeli środek macierzy jest na minusie -4 to odejmuję krawędzie,
-        # ponieważ edges zawiera krawędzie jako wartości
-        # ujemne, więc żeby je dodać do obrazu należy odjąć
-        if center_value < 0:
-            result_image = image_float - edges
-        # Na odwró†
-        else:
-            result_image = image_float + edges
+    if border_type == BORDER_OVERWRITE:
+        result_image = apply_kernel(image, fused_kernel, ddepth, cv2.BORDER_REPLICATE)
+    elif border_type == cv2.BORDER_CONSTANT:
+        result_image = apply_kernel_constant_border(image, fused_kernel, ddepth, border_value)
+    else:
+        result_image = apply_kernel(image, fused_kernel, ddepth, border_type)
 
+    if not integer_kernel:
         # Ucinam mniejsze od zera i większe od 255
-        result_image_clipped = np.clip(result_image, 0, 255).astype(np.uint8)
+        np.clip(result_image, 0, 255, out=result_image)
+        result_image = result_image.astype(np.uint8)
 
-        # Nadpisanie ramki
-        if padding_height > 0:
-            result_image_clipped[:padding_height, :] = border_value
-            result_image_clipped[-padding_height:, :] = border_value
-        if padding_width > 0:
-            result_image_clipped[:, :padding_width] = border_value
-            result_image_clipped[:, -padding_width:] = border_value
+    if border_type == BORDER_OVERWRITE:
+        overwrite_border(result_image, padding_height, padding_height, padding_width, padding_width, border_value)
 
-        return result_image_clipped
+    return result_image
 
-    elif border_type == cv2.BORDER_CONSTANT:
-        padded_image = cv2.copyMakeBorder(
-            image,
-            top=padding_height, bottom=padding_height, left=padding_width, right=padding_width,
-            borderType=cv2.BORDER_CONSTANT,
-            value=border_value
-        )
-        edges = cv2.filter2D(padded_image, cv2.CV_32F, kernel, borderType=border_type)
-
-        if center_value < 0:
-            result_padded_image = padded_image.astype(np.float32) - edges
-        # Na odwró†
-        else:
-            result_padded_image = padded_image.astype(np.float32) + edges
 
-        result_clipped = np.clip(result_padded_image, 0, 255).astype(np.uint8)
+# Dla Lab 2 - zadanie 3
+def apply_kernel_bank(image: np.ndarray, kernels: list[np.ndarray], border_type: int,
+                      border_value: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Nakłada cały zestaw masek (np. 8 kierunków Prewitta) i dla każdego pixel-a zostawia największą odpowiedź
+    oraz numer maski, która ją dała.
 
-        return result_clipped[padding_height: -padding_height, padding_width:-padding_width].copy()
+    Algorytm:
+    1. Maski przeciwne (np. N i S, E i W) różnią się tylko znakiem, więc filtrowana jest tylko jedna z każdej pary,
+       a odpowiedź drugiej to ta sama odpowiedź z minusem. Dla kompasu Prewitta to 4 filtracje zamiast 8
+    2. Odpowiedzi są liczone w int16 (lub float32 dla dużych masek), więc ujemne wartości nie są ucinane
+    3. Każda odpowiedź od razu aktualizuje bieżące maksimum i numer kierunku (dla obu znaków) i jest zwalniana,
+       bez trzymania wszystkich odpowiedzi naraz. Przy remisie wygrywa maska wcześniejsza na liście
 
-    else:
-        edges = cv2.filter2D(image_float, cv2.CV_32F, kernel, borderType=border_type)
-        if center_value < 0:
-            result_padded_image = image_float - edges
-        # Na odwró†
+    :param image: obraz wejściowy (grayscale)
+    :param kernels: lista masek o tym samym rozmiarze
+    :param border_type: typ uzupełnienia krawędzi zdjęcia
+    :param border_value: wartość ramki dla BORDER_CONSTANT i BORDER_OVERWRITE
+    :return: krotka (największa odpowiedź obcięta do 0-255 jako uint8, numer maski jako uint8)
+    """
+    kernels = [np.asarray(kernel, dtype=np.float32) for kernel in kernels]
+
+    # Każdy kierunek to (numer filtrowanej maski, znak odpowiedzi)
+    unique_kernels = []
+    directions = []
+    for kernel in kernels:
+        for index, unique_kernel in enumerate(unique_kernels):
+            if np.array_equal(kernel, unique_kernel):
+                directions.append((index, 1))
+                break
+            if np.array_equal(kernel, -unique_kernel):
+                directions.append((index, -1))
+                break
+        else:
+            unique_kernels.append(kernel)
+            directions.append((len(unique_kernels) - 1, 1))
+
+    # int16 wystarcza, jeżeli maska jest całkowita i największa możliwa odpowiedź mieści się w zakresie
+    integer_kernels = all(np.array_equal(kernel, np.round(kernel)) for kernel in unique_kernels)
+    largest_response = max(np.abs(kernel).sum() for kernel in unique_kernels) * 255
+    ddepth = cv2.CV_16S if integer_kernels and largest_response <= np.iinfo(np.int16).max else cv2.CV_32F
+
+    filter_border = cv2.BORDER_REPLICATE if border_type == BORDER_OVERWRITE else border_type
+
+    # Bieżące maksimum zaczyna od wartości mniejszej od każdej odpowiedzi, numer kierunku od wartości większej
+    # od każdego numeru, więc pierwszy kierunek zawsze wygrywa
+    response_type = np.int16 if ddepth == cv2.CV_16S else np.float32
+    best = np.full(image.shape, np.iinfo(np.int16).min if ddepth == cv2.CV_16S else -np.inf, dtype=response_type)
+    direction_index = np.full(image.shape, np.iinfo(np.uint8).max, dtype=np.uint8)
+    candidate = np.empty(image.shape, dtype=response_type)
+    better = np.empty(image.shape, dtype=np.bool_)
+    tie = np.empty(image.shape, dtype=np.bool_)
+
+    # Każda odpowiedź jest od razu wliczana do maksimum (ze znakiem + i -) i zwalniana przed liczeniem następnej,
+    # więc w pamięci jest najwyżej jedna odpowiedź naraz
+    for response_index, kernel in enumerate(unique_kernels):
+        if filter_border == cv2.BORDER_CONSTANT:
+            response = apply_kernel_constant_border(image, kernel, ddepth, border_value)
         else:
-            result_padded_image = image_float + edges
-        return np.clip(result_padded_image, 0, 255).astype(np.uint8)
+            response = apply_kernel(image, kernel, ddepth, filter_border)
+
+        for index, (direction_response, sign) in enumerate(directions):
+            if direction_response != response_index:
+                continue
+
+            signed_response = response
+            if sign < 0:
+                np.negative(response, out=candidate)
+                signed_response = candidate
+
+            # Kierunki nie są sprawdzane w kolejności listy, więc remis wygrywa kierunek o mniejszym numerze
+            np.greater(signed_response, best, out=better)
+            np.equal(signed_response, best, out=tie)
+            tie &= direction_index > index
+            better |= tie
+
+            np.copyto(best, signed_response, where=better)
+            direction_index[better] = index
+
+        del response
+
+    np.clip(best, 0, 255, out=best)
+    max_response = best.astype(np.uint8)
+
+    # Nadpisanie ramki, tak jak dla pojedynczej maski
+    if border_type == BORDER_OVERWRITE:
+        padding_height = kernels[0].shape[0] // 2
+        padding_width = kernels[0].shape[1] // 2
+        overwrite_border(max_response, padding_height, padding_height, padding_width, padding_width, border_value)
+        overwrite_border(direction_index, padding_height, padding_height, padding_width, padding_width, 0)
+
+    return max_response, direction_index
+
+
+# Dla Lab 2 - zadanie 3
+def apply_compass_edge_detection(image: np.ndarray, kernels: list[np.ndarray], border_type: int,
+                                 border_value: int) -> np.ndarray:
+    """
+    Detekcja krawędzi wszystkimi maskami kompasowymi naraz, zwraca tylko największą odpowiedź (apply_kernel_bank)
+    """
+    return apply_kernel_bank(image, kernels, border_type, border_value)[0]
 
 
 # Dla Lab 2 - zadanie 4
@@ -900,37 +1184,92 @@ def apply_median_filter(image: np.ndarray, kernel_size: int, border_type, border
     :param border_value:
     :return:
     """
+    # cv2.medianBlur dla obrazów 16-bitowych obsługuje tylko maski 3 i 5, większe maski i inne typy
+    # liczy filtr rankingowy
+    if image.dtype != np.uint8 and not (image.dtype == np.uint16 and kernel_size <= 5):
+        return apply_rank_filter(image, kernel_size, 50, border_type, border_value)
+
     padding = kernel_size // 2
 
     # Wypełnienie ramki konkretną wartością
-    if border_type == 9999:
+    if border_type == BORDER_OVERWRITE:
         result_image = cv2.medianBlur(image, kernel_size)
 
         # Zrobienie obramowania
-        if padding > 0:
-            result_image[:padding, :] = border_value    # góra
-            result_image[-padding:, :] = border_value   # dół
-            result_image[:, :padding] = border_value    # lewo
-            result_image[:, -padding:] = border_value   # prawo
-
-        return result_image
+        return overwrite_border(result_image, padding, padding, padding, padding, border_value)
 
     # Dla BORDER_CONSTANT i BORDER_REFLECT
-    else:
-        # Zrobienie obramowania
-        padded_image = cv2.copyMakeBorder(
-            image,
-            padding, padding, padding, padding,
-            borderType=border_type,
-            value=border_value
-        )
-        padded_result_image = cv2.medianBlur(padded_image, kernel_size)
+    # cv2.medianBlur zawsze powiela krawędź, więc cały obraz jest liczony raz, a pasy przy krawędziach
+    # jeszcze raz z małych wycinków z właściwym obramowaniem
+    return filter_with_border(image, lambda region, _: cv2.medianBlur(region, kernel_size), (padding,) * 4,
+                              border_type, border_value, full_border_type=cv2.BORDER_REPLICATE)
+
+
+# Dla Lab 2 - zadanie 4
+def apply_rank_filter(image: np.ndarray, kernel_size: int, percentile: float, border_type, border_value: int):
+    """
+    Filtr statystyczny dla dowolnego percentyla: 0 - minimum, 50 - mediana, 100 - maksimum.
+    W przeciwieństwie do cv2.medianBlur działa dla dowolnie dużej nieparzystej maski i obrazów 16-bitowych.
+    :param image: obraz wejściowy
+    :param kernel_size: bok maski, nieparzysty
+    :param percentile: percentyl z otoczenia pixel-a
+    :param border_type: typ uzupełnienia krawędzi zdjęcia
+    :param border_value: wartość ramki dla BORDER_CONSTANT i BORDER_OVERWRITE
+    :return: zwraca nowe zdjęcie
+    """
+    padding = kernel_size // 2
+
+    # Wypełnienie ramki konkretną wartością, tak jak dla mediany liczone z powieleniem krawędzi
+    if border_type == BORDER_OVERWRITE:
+        result_image = rank_filter(image, kernel_size, percentile, cv2.BORDER_REPLICATE)
+        return overwrite_border(result_image, padding, padding, padding, padding, border_value)
 
-        return padded_result_image[padding:-padding, padding:-padding].copy()
+    return rank_filter(image, kernel_size, percentile, border_type, border_value)
+
+
+# Dla Lab 2 - zadanie 3
+class Gradients(NamedTuple):
+    """
+    Pochodne obrazu z operatora Sobela w int16, bez ucinania wartości ujemnych
+    dx - pochodna pozioma (Sobel X), dy - pochodna pionowa (Sobel Y)
+    """
+    dx: np.ndarray
+    dy: np.ndarray
+
+
+# Dla Lab 2 - zadanie 3
+def sobel_gradients(image: np.ndarray) -> Gradients:
+    """
+    Liczy Sobel X i Sobel Y jeden raz. Obramowanie BORDER_REPLICATE jest takie samo jak wewnątrz cv2.Canny,
+    więc te same pochodne można przekazać do apply_canny_edge_detection.
+    :param image: obraz wejściowy (grayscale)
+    :return: pochodne dx i dy
+    """
+    dx = cv2.Sobel(image, cv2.CV_16S, 1, 0, ksize=3, borderType=cv2.BORDER_REPLICATE)
+    dy = cv2.Sobel(image, cv2.CV_16S, 0, 1, ksize=3, borderType=cv2.BORDER_REPLICATE)
+    return Gradients(dx, dy)
+
+
+# Dla Lab 2 - zadanie 3
+def gradient_magnitude_orientation(gradients: Gradients) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Moduł gradientu sqrt(dx^2 + dy^2) i jego kierunek w stopniach 0-360
+    :param gradients: pochodne z sobel_gradients
+    :return: krotka (moduł float32, kierunek float32 w stopniach)
+    """
+    return cv2.cartToPolar(gradients.dx.astype(np.float32), gradients.dy.astype(np.float32), angleInDegrees=True)
+
+
+# Dla Lab 2 - zadanie 3
+def apply_gradient_magnitude(image: np.ndarray) -> np.ndarray:
+    """Moduł gradientu Sobela obcięty do 0-255"""
+    magnitude, _ = gradient_magnitude_orientation(sobel_gradients(image))
+    return np.clip(magnitude, 0, 255).astype(np.uint8)
 
 
 # Dla Lab 2 - zadanie 5
-def apply_canny_edge_detection(image: np.ndarray, threshold1: int, threshold2: int):
+def apply_canny_edge_detection(image: np.ndarray, threshold1: int, threshold2: int,
+                               gradients: Gradients | None = None):
     """
     Jak działą?
 
@@ -947,6 +1286,11 @@ def apply_canny_edge_detection(image: np.ndarray, threshold1: int, threshold2: i
     :param image: obraz wejściowy (grayscale)
     :param threshold1: górny decyduje o tym, jakie krawędzie na pewno nimi są
     :param threshold2: wykrywa co ma nie być krawędzią w szumie
+    :param gradients: wcześniej policzone pochodne z sobel_gradients dla tego samego obrazu,
+        wtedy Canny nie liczy operatora Sobela drugi raz
     :return: Obraz binarny z krawędziami
     """
+    if gradients is not None:
+        return cv2.Canny(gradients.dx, gradients.dy, threshold1, threshold2)
+
     return cv2.Canny(image, threshold1, threshold2)
\ No newline at end of file
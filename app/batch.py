@@ -0,0 +1,136 @@
+# batch.py
+"""
+Przetwarzanie wsadowe bez GUI (nie importuje PyQt6).
+
+Użycie:
+    python app/batch.py pipeline.json katalog_wejściowy katalog_wyjściowy [--workers 4]
+
+Przykładowy plik pipeline.json:
+    {
+        "steps": [
+            {"step": "histogram_equalization"},
+            {"step": "point_posterize", "levels": 4},
+            {"step": "apply_median_filter", "kernel_size": 5, "border_type": "BORDER_REFLECT"},
+            {"step": "apply_canny_edge_detection", "threshold1": 50, "threshold2": 150}
+        ]
+    }
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import cv2
+
+from image_io import smart_image_read
+from pipeline import Pipeline
+
+# Rozszerzenia plików, które są brane z katalogu wejściowego (te same co w oknie otwierania pliku)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+def load_pipeline(spec_path) -> Pipeline:
+    """
+    Wczytuje i sprawdza plik JSON z listą kroków (format pipeline.step_from_spec)
+    Obraz kolorowy jest automatycznie zamieniany na szary przed krokami, które tego wymagają.
+
+    :param spec_path: ścieżka do pliku JSON
+    :return: łańcuch kroków
+    """
+    with open(spec_path, encoding="utf-8") as file:
+        spec = json.load(file)
+
+    return Pipeline.from_spec(spec, coerce_grayscale=True)
+
+
+def process_file(input_path: str, output_path: str, pipeline: Pipeline) -> tuple[str, float, str | None]:
+    """
+    Przetwarza jeden plik, wywoływana w procesie roboczym
+    :return: krotka (ścieżka wejściowa, czas w sekundach, opis błędu albo None)
+    """
+    start = time.perf_counter()
+
+    try:
+        image = smart_image_read(input_path)
+        if image is None:
+            raise ValueError("Nie udało się wczytać obrazu")
+
+        result = pipeline.apply(image)
+
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        if not cv2.imwrite(output_path, result):
+            raise ValueError("Nie udało się zapisać obrazu")
+
+    except Exception as e:
+        return input_path, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+    return input_path, time.perf_counter() - start, None
+
+
+def init_worker(threads: int) -> None:
+    """Ustawia ilość wątków OpenCV w procesie roboczym, aby procesy razem nie używały więcej wątków niż rdzeni"""
+    cv2.setNumThreads(threads)
+
+
+def find_images(input_dir: Path) -> list[Path]:
+    """Wszystkie obrazy w katalogu i podkatalogach"""
+    return sorted(path for path in input_dir.rglob("*") if path.suffix.lower() in IMAGE_EXTENSIONS)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Przetwarzanie wsadowe obrazów według pliku JSON z krokami")
+    parser.add_argument("pipeline", help="plik JSON z listą kroków")
+    parser.add_argument("input_dir", help="katalog z obrazami wejściowymi")
+    parser.add_argument("output_dir", help="katalog na obrazy wynikowe (struktura podkatalogów jest zachowana)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="ilość procesów roboczych")
+    args = parser.parse_args(argv)
+
+    try:
+        pipeline = load_pipeline(args.pipeline)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Błąd pliku pipeline: {e}", file=sys.stderr)
+        return 2
+
+    input_dir = Path(args.input_dir)
+    output_dir = Path(args.output_dir)
+    images = find_images(input_dir)
+
+    if not images:
+        print(f"Brak obrazów w katalogu {input_dir}", file=sys.stderr)
+        return 2
+
+    failures = 0
+    start = time.perf_counter()
+
+    # Rdzenie są dzielone pomiędzy procesy: wątki filtrów (process_in_bands) i OpenCV w jednym procesie
+    # to tylko jego część rdzeni, zamiast wszystkich rdzeni w każdym procesie
+    processes = max(1, args.workers)
+    threads = max(1, (os.cpu_count() or 1) // processes)
+    pipeline = pipeline.with_workers(threads)
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=init_worker, initargs=(threads,)) as executor:
+        futures = [
+            executor.submit(process_file, str(path), str(output_dir / path.relative_to(input_dir)), pipeline)
+            for path in images
+        ]
+
+        # Raport dla każdego pliku w kolejności zakończenia
+        for future in as_completed(futures):
+            input_path, seconds, error = future.result()
+            if error is None:
+                print(f"OK    {seconds:8.3f} s  {input_path}")
+            else:
+                failures += 1
+                print(f"BŁĄD  {seconds:8.3f} s  {input_path}: {error}")
+
+    print(f"Przetworzono {len(images) - failures}/{len(images)} plików w {time.perf_counter() - start:.2f} s, "
+          f"błędy: {failures}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+# borders.py
+from typing import Callable
+
+import cv2
+import numpy as np
+
+# Wartość ustalona dla rozróżnienia obramowania nadpisującego krawędź obrazu (nie istnieje w OpenCV)
+BORDER_OVERWRITE = 9999
+
+
+def overwrite_border(image: np.ndarray, top: int, bottom: int, left: int, right: int, value) -> np.ndarray:
+    """
+    BORDER_OVERWRITE: nadpisuje w miejscu pasy przy krawędziach obrazu stałą wartością
+    :param image: obraz wynikowy, zmieniany w miejscu
+    :param top: ilość wierszy u góry
+    :param bottom: ilość wierszy na dole
+    :param left: ilość kolumn z lewej
+    :param right: ilość kolumn z prawej
+    :param value: wartość ramki
+    :return: ten sam obraz
+    """
+    if top > 0:
+        image[:top, :] = value
+    if bottom > 0:
+        image[-bottom:, :] = value
+    if left > 0:
+        image[:, :left] = value
+    if right > 0:
+        image[:, -right:] = value
+
+    return image
+
+
+def filter_with_border(image: np.ndarray, operation: Callable[[np.ndarray, int], np.ndarray],
+                       margins: tuple[int, int, int, int], border_type: int, border_value=0,
+                       full_border_type: int | None = None) -> np.ndarray:
+    """
+    Wykonuje operację sąsiedztwa z dowolnym obramowaniem OpenCV bez powiększania kopii całego obrazu.
+
+    Algorytm:
+    1. Operacja jest wykonywana na całym obrazie z obramowaniem, które sama obsługuje (full_border_type),
+       np. cv2.medianBlur zawsze powiela krawędź. Środek obrazu nie widzi ramki, więc jest już poprawny
+    2. Jeżeli ramka ma być inna, to tylko pasy przy krawędziach (szerokości marginesu maski) są liczone ponownie
+       z małych wycinków z otoczeniem (indeksy cv2.borderInterpolate) i wpisywane w widoki obrazu wynikowego
+
+    :param image: obraz wejściowy
+    :param operation: funkcja (obraz, typ obramowania OpenCV) -> obraz wynikowy tego samego rozmiaru
+    :param margins: margines maski (góra, dół, lewo, prawo), dla maski k x k to (k // 2,) * 4
+    :param border_type: żądany typ obramowania OpenCV
+    :param border_value: jasność ramki dla BORDER_CONSTANT; skalar dla obrazu kolorowego wypełnia wszystkie
+        kanały (v, v, v), tak jak overwrite_border, a krotka ustawia każdy kanał osobno
+    :param full_border_type: obramowanie dla przejścia po całym obrazie, domyślnie border_type
+    :return: obraz wynikowy
+    """
+    if full_border_type is None:
+        full_border_type = border_type
+
+    result = operation(image, full_border_type)
+
+    # Operacja sama obsłużyła żądane obramowanie (dla BORDER_CONSTANT OpenCV zawsze wypełnia zerami)
+    if full_border_type == border_type and (border_type != cv2.BORDER_CONSTANT or not np.any(border_value)):
+        return result
+
+    top, bottom, left, right = margins
+    height, width = image.shape[:2]
+
+    # Dla bardzo małych obrazów pasy przy krawędziach pokrywają prawie cały obraz
+    if height <= 2 * (top + bottom) or width <= 2 * (left + right):
+        strips = [(slice(0, height), slice(0, width))]
+    else:
+        strips = [
+            (slice(0, top), slice(0, width)),                   # góra
+            (slice(height - bottom, height), slice(0, width)),  # dół
+            (slice(top, height - bottom), slice(0, left)),      # lewo
+            (slice(top, height - bottom), slice(width - right, width)),  # prawo
+        ]
+
+    for strip in strips:
+        if strip[0].start < strip[0].stop and strip[1].start < strip[1].stop:
+            result[strip] = _filter_region(image, operation, margins, border_type, border_value, strip)
+
+    return result
+
+
+def _filter_region(image: np.ndarray, operation: Callable[[np.ndarray, int], np.ndarray],
+                   margins: tuple[int, int, int, int], border_type: int, border_value,
+                   region: tuple[slice, slice]) -> np.ndarray:
+    """Wynik operacji dla fragmentu obrazu: otoczenie z obrazu, a poza obrazem ramka typu border_type"""
+    top, bottom, left, right = margins
+    height, width = image.shape[:2]
+    rows, columns = region
+
+    # Wycinek z otoczeniem jest składany z indeksów cv2.borderInterpolate liczonych względem całego obrazu, więc
+    # ramka każdego typu (również BORDER_WRAP, który sięga na drugą stronę obrazu) jest taka sama jak dla całego
+    # obrazu. Dla BORDER_CONSTANT pozycje poza obrazem mają indeks -1
+    row_indexes = _border_indexes(rows.start - top, rows.stop + bottom, height, border_type)
+    column_indexes = _border_indexes(columns.start - left, columns.stop + right, width, border_type)
+    padded = image[np.ix_(np.maximum(row_indexes, 0), np.maximum(column_indexes, 0))]
+
+    if border_type == cv2.BORDER_CONSTANT:
+        # Wartość skalarna dla obrazu kolorowego dotyczy wszystkich kanałów (v, v, v), tak jak overwrite_border,
+        # a krotka ustawia każdy kanał osobno
+        value = np.asarray(border_value)
+        if value.ndim > 0:
+            value = value[:image.shape[2]] if image.ndim == 3 else value[0]
+        padded[row_indexes < 0] = value
+        padded[:, column_indexes < 0] = value
+
+    # Obramowanie tego przejścia już nie ma znaczenia, bo potrzebny fragment widzi tylko pixel-e wycinka
+    filtered = operation(padded, cv2.BORDER_REPLICATE)
+    return filtered[top:top + rows.stop - rows.start, left:left + columns.stop - columns.start]
+
+
+def _border_indexes(start: int, stop: int, length: int, border_type: int) -> np.ndarray:
+    """Indeksy w obrazie dla pozycji start .. stop - 1, także poza obrazem (cv2.borderInterpolate)"""
+    return np.array([cv2.borderInterpolate(position, length, border_type) for position in range(start, stop)],
+                    dtype=np.intp)
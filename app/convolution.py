@@ -0,0 +1,242 @@
+# convolution.py
+from functools import lru_cache
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+from borders import filter_with_border
+
+# Względny próg wartości osobliwych. Mniejsze wartości to błąd zaokrągleń float32, a nie prawdziwa składowa maski
+SVD_TOLERANCE = 1e-6
+
+# Ilość różnych masek, dla których rozkład jest pamiętany
+KERNEL_CACHE_SIZE = 128
+
+# Maksymalny rząd maski, dla którego suma przejść separowalnych jest szybsza od cv2.filter2D. Przy większym
+# rzędzie koszt sumowania pośrednich obrazów float32 zjada zysk z mniejszej ilości mnożeń
+LOW_RANK_MAX_RANK = 2
+
+# Próg przejścia na filtrację w dziedzinie częstotliwości (pole maski w pixel-ach). Zmierzony dla obrazu 2000x2000 RGB:
+# dla maski 21x21 cv2.filter2D i FFT są porównywalne, od 31x31 FFT jest szybsze, a dla 63x63 i 127x127 ok. 1.7 raza
+FFT_MIN_KERNEL_AREA = 31 * 31
+
+# Bok bloku wynikowego dla FFT. Blok jest co najmniej FFT_BLOCK_TO_KERNEL razy większy od maski, aby margines
+# (kh - 1, kw - 1) nie dominował nad użyteczną częścią transformaty
+FFT_BLOCK_SIZE = 512
+FFT_BLOCK_TO_KERNEL = 4
+
+# Typy numpy odpowiadające ddepth OpenCV
+DEPTH_TYPES = {
+    cv2.CV_8U: np.uint8,
+    cv2.CV_16U: np.uint16,
+    cv2.CV_16S: np.int16,
+    cv2.CV_32F: np.float32,
+    cv2.CV_64F: np.float64,
+}
+
+
+class KernelDecomposition(NamedTuple):
+    """
+    Rozkład maski na sumę masek separowalnych: kernel = suma(columns[i] (pionowo) x rows[i] (poziomo))
+    rank - ilość składowych, 1 oznacza maskę separowalną
+    columns - maski pionowe (kh,) dla kolejnych składowych
+    rows - maski poziome (kw,) dla kolejnych składowych
+    """
+    rank: int
+    columns: tuple[np.ndarray, ...]
+    rows: tuple[np.ndarray, ...]
+
+    @property
+    def separable(self) -> bool:
+        return self.rank == 1
+
+    def cost(self) -> int:
+        """Ilość mnożeń na pixel przy filtracji wierszami i kolumnami"""
+        return sum(column.size + row.size for column, row in zip(self.columns, self.rows))
+
+
+def analyze_kernel(kernel: np.ndarray) -> KernelDecomposition:
+    """
+    Rozkłada maskę przez SVD na sumę masek separowalnych. Wynik jest zapamiętywany dla każdej maski,
+    więc ponowne użycie tej samej maski (np. z KERNELS) nie liczy SVD drugi raz.
+
+    Algorytm:
+    1. kernel = U * S * Vt
+    2. Rząd maski to ilość wartości osobliwych większych niż SVD_TOLERANCE * największa
+    3. Każda składowa i to maska pionowa U[:, i] * sqrt(S[i]) i pozioma Vt[i] * sqrt(S[i])
+
+    :param kernel: maska 2D
+    :return: rozkład maski
+    """
+    kernel = np.asarray(kernel, dtype=np.float32)
+    return _analyze_kernel_cached(kernel.tobytes(), kernel.shape)
+
+
+@lru_cache(maxsize=KERNEL_CACHE_SIZE)
+def _analyze_kernel_cached(kernel_bytes: bytes, shape: tuple[int, int]) -> KernelDecomposition:
+    kernel = np.frombuffer(kernel_bytes, dtype=np.float32).reshape(shape).astype(np.float64)
+
+    u, s, vt = np.linalg.svd(kernel)
+    if s.size == 0 or s[0] == 0:
+        # Maska zerowa, wystarczy jedna składowa z samych zer
+        return KernelDecomposition(1, (np.zeros(shape[0], np.float32),), (np.zeros(shape[1], np.float32),))
+
+    rank = int(np.count_nonzero(s > SVD_TOLERANCE * s[0]))
+    scale = np.sqrt(s[:rank])
+
+    columns = tuple((u[:, i] * scale[i]).astype(np.float32) for i in range(rank))
+    rows = tuple((vt[i] * scale[i]).astype(np.float32) for i in range(rank))
+
+    return KernelDecomposition(rank, columns, rows)
+
+
+def apply_kernel(image: np.ndarray, kernel: np.ndarray, ddepth: int = -1,
+                 border_type: int = cv2.BORDER_REFLECT_101) -> np.ndarray:
+    """
+    Odpowiednik cv2.filter2D, który sam wybiera najtańszy sposób filtracji:
+    - maska separowalna: jedno przejście wierszami i jedno kolumnami (cv2.sepFilter2D), O(k) zamiast O(k^2)
+    - maska niskiego rzędu: suma kilku przejść separowalnych, jeżeli jest tańsza niż pełna maska
+    - duża maska pełnego rzędu (od FFT_MIN_KERNEL_AREA): filtracja w dziedzinie częstotliwości (fft_filter)
+    - pozostałe maski: cv2.filter2D
+
+    :param image: obraz wejściowy
+    :param kernel: maska
+    :param ddepth: typ wyniku jak w cv2.filter2D, -1 oznacza typ obrazu wejściowego
+    :param border_type: typ obramowania OpenCV
+    :return: obraz po filtracji
+    """
+    decomposition = analyze_kernel(kernel)
+
+    if decomposition.separable:
+        return cv2.sepFilter2D(image, ddepth, decomposition.rows[0], decomposition.columns[0], borderType=border_type)
+
+    kernel_area = kernel.shape[0] * kernel.shape[1]
+
+    if decomposition.rank <= LOW_RANK_MAX_RANK and decomposition.cost() * 2 <= kernel_area:
+        # Składowe są sumowane we float32, zaokrąglenie i obcięcie do typu wyniku dopiero na końcu
+        result = None
+        for column, row in zip(decomposition.columns, decomposition.rows):
+            part = cv2.sepFilter2D(image, cv2.CV_32F, row, column, borderType=border_type)
+            if result is None:
+                result = part
+            else:
+                result += part
+
+    elif kernel_area >= FFT_MIN_KERNEL_AREA and image.shape[0] >= kernel.shape[0] and image.shape[1] >= kernel.shape[1]:
+        result = fft_filter(image, kernel, border_type)
+
+    else:
+        return cv2.filter2D(image, ddepth, kernel, borderType=border_type)
+
+    return _to_depth(result, image.dtype if ddepth == -1 else DEPTH_TYPES[ddepth])
+
+
+def fft_filter(image: np.ndarray, kernel: np.ndarray, border_type: int = cv2.BORDER_REFLECT_101) -> np.ndarray:
+    """
+    Filtracja maską w dziedzinie częstotliwości metodą overlap-save, wynik taki jak cv2.filter2D z ddepth=CV_32F.
+
+    Algorytm:
+    1. Obramowanie obrazu o promień maski (tym samym typem obramowania co cv2.filter2D)
+    2. Podział na bloki. Każdy blok z marginesem (kh - 1, kw - 1) jest transformowany (cv2.dft), mnożony
+       przez widmo maski i transformowany z powrotem (cv2.idft)
+    3. Z wyniku zostaje tylko część bez zawinięcia cyklicznego, czyli blok bez marginesu
+
+    Rozmiar transformaty i widmo maski są zapamiętywane, więc ta sama maska na kolejnych obrazach
+    nie liczy już swojego widma.
+
+    :param image: obraz wejściowy (1 lub więcej kanałów)
+    :param kernel: maska 2D
+    :param border_type: typ obramowania OpenCV
+    :return: obraz float32 po filtracji
+    """
+    kernel = np.asarray(kernel, dtype=np.float32)
+    kernel_height, kernel_width = kernel.shape
+    height, width = image.shape[:2]
+
+    # Punkt zaczepienia maski jak w cv2.filter2D: środek, dla parzystych rozmiarów k // 2
+    anchor_y, anchor_x = kernel_height // 2, kernel_width // 2
+    padded = cv2.copyMakeBorder(image, anchor_y, kernel_height - 1 - anchor_y, anchor_x, kernel_width - 1 - anchor_x,
+                                border_type)
+
+    block = max(FFT_BLOCK_SIZE, FFT_BLOCK_TO_KERNEL * max(kernel_height, kernel_width))
+    dft_height = _optimal_dft_size(min(block, height) + kernel_height - 1)
+    dft_width = _optimal_dft_size(min(block, width) + kernel_width - 1)
+    block_height = dft_height - kernel_height + 1
+    block_width = dft_width - kernel_width + 1
+
+    spectrum = _kernel_spectrum(kernel.tobytes(), kernel.shape, dft_height, dft_width)
+
+    channels = 1 if image.ndim == 2 else image.shape[2]
+    result = np.empty(image.shape, dtype=np.float32)
+    buffer = np.empty((dft_height, dft_width), dtype=np.float32)
+
+    for channel in range(channels):
+        source = padded if image.ndim == 2 else padded[:, :, channel]
+        target = result if image.ndim == 2 else result[:, :, channel]
+
+        for top in range(0, height, block_height):
+            rows = min(block_height, height - top)
+            for left in range(0, width, block_width):
+                columns = min(block_width, width - left)
+
+                # Reszta bufora musi być zerami, inaczej ostatnie bloki widziałyby dane z poprzednich
+                buffer.fill(0)
+                buffer[:rows + kernel_height - 1, :columns + kernel_width - 1] = \
+                    source[top:top + rows + kernel_height - 1, left:left + columns + kernel_width - 1]
+
+                # cv2.filter2D liczy korelację, więc widmo maski jest sprzężone
+                block_spectrum = cv2.dft(buffer, nonzeroRows=rows + kernel_height - 1)
+                block_spectrum = cv2.mulSpectrums(block_spectrum, spectrum, 0, conjB=True)
+                filtered = cv2.idft(block_spectrum, flags=cv2.DFT_REAL_OUTPUT | cv2.DFT_SCALE)
+
+                target[top:top + rows, left:left + columns] = filtered[:rows, :columns]
+
+    return result
+
+
+@lru_cache(maxsize=None)
+def _optimal_dft_size(size: int) -> int:
+    return cv2.getOptimalDFTSize(size)
+
+
+@lru_cache(maxsize=KERNEL_CACHE_SIZE)
+def _kernel_spectrum(kernel_bytes: bytes, shape: tuple[int, int], dft_height: int, dft_width: int) -> np.ndarray:
+    """Widmo maski dopełnionej zerami do rozmiaru transformaty (format CCS z cv2.dft)"""
+    padded_kernel = np.zeros((dft_height, dft_width), dtype=np.float32)
+    padded_kernel[:shape[0], :shape[1]] = np.frombuffer(kernel_bytes, dtype=np.float32).reshape(shape)
+    return cv2.dft(padded_kernel)
+
+
+def _to_depth(result: np.ndarray, output_depth) -> np.ndarray:
+    """Zaokrąglenie i obcięcie wyniku float32 do typu wynikowego, tak jak robi to OpenCV (saturate_cast)"""
+    if np.issubdtype(output_depth, np.integer):
+        limits = np.iinfo(output_depth)
+        np.rint(result, out=result)
+        np.clip(result, limits.min, limits.max, out=result)
+
+    return result.astype(output_depth, copy=False)
+
+
+def apply_kernel_constant_border(image: np.ndarray, kernel: np.ndarray, ddepth: int = -1,
+                                 border_value: int = 0) -> np.ndarray:
+    """
+    Filtracja z ramką o stałej jasności border_value bez tworzenia powiększonej kopii całego obrazu.
+    cv2.filter2D dla BORDER_CONSTANT wypełnia ramkę zerami, więc przy innej jasności ramki
+    pasy przy krawędziach są liczone ponownie (borders.filter_with_border).
+
+    :param image: obraz wejściowy
+    :param kernel: maska
+    :param ddepth: typ wyniku jak w cv2.filter2D
+    :param border_value: jasność ramki
+    :return: obraz po filtracji
+    """
+    return filter_with_border(image, lambda region, border_type: apply_kernel(region, kernel, ddepth, border_type),
+                              kernel_margins(kernel), cv2.BORDER_CONSTANT, border_value)
+
+
+def kernel_margins(kernel: np.ndarray) -> tuple[int, int, int, int]:
+    """Margines maski (góra, dół, lewo, prawo) dla punktu zaczepienia jak w cv2.filter2D"""
+    kernel_height, kernel_width = kernel.shape
+    anchor_y, anchor_x = kernel_height // 2, kernel_width // 2
+    return anchor_y, kernel_height - 1 - anchor_y, anchor_x, kernel_width - 1 - anchor_x
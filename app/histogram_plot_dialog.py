@@ -1,13 +1,13 @@
 # histogram_plot_dialog.py
 # Importy dla PyQt
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QComboBox, QLabel, QPushButton, QSizePolicy
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QComboBox, QLabel, QPushButton, QSizePolicy, QCheckBox
 from PyQt6.QtCore import Qt
 
-# Importy dla Matplotlib
 import numpy as np
 from typing import Dict, Union
 
-from mpl_canvas import MplCanvas
+from histogram_statistics import histogram_statistics
+from histogram_widget import HistogramWidget
 from multi_lut_dialog import MultiLutDialog
 from single_lut_dialog import SingleLutDialog
 
@@ -44,6 +44,11 @@ class HistogramPlotDialog(QDialog):
         self.channel_selector.currentIndexChanged.connect(self.update_plot)  # Łączy przełączenie kanału z metodą
         control_layout.addWidget(self.channel_selector)
 
+        # Przełącznik skali logarytmicznej osi Y
+        self.log_scale_checkbox = QCheckBox("Skala logarytmiczna")
+        self.log_scale_checkbox.toggled.connect(lambda checked: self.statsChart.set_log_scale(checked))
+        control_layout.addWidget(self.log_scale_checkbox)
+
         # Automatyczna odstęp pomiędzy tytułem i przełącznikiem kanału
         control_layout.addStretch(1)
 
@@ -65,7 +70,7 @@ class HistogramPlotDialog(QDialog):
             background-color: #999999;
         }
         """)
-        lut_button.clicked.connect(lambda: self.show_lut_tables(lut_data))
+        lut_button.clicked.connect(lambda: self.show_lut_tables(self.raw_lut_data))
         control_layout.addWidget(lut_button)
 
         # Tytuł paska z przełącznikiem kanałów
@@ -74,8 +79,8 @@ class HistogramPlotDialog(QDialog):
         # Dodanie górnego paska do QVBoxLayout
         main_layout.addLayout(control_layout)
 
-        # Tworzy instancję
-        self.statsChart = MplCanvas(self, width=8, height=6, dpi=100)
+        # Tworzy instancję widżetu histogramu rysowanego przez QPainter
+        self.statsChart = HistogramWidget(self)
         main_layout.addWidget(self.statsChart)
 
         # Label dla wykrsu
@@ -127,6 +132,25 @@ class HistogramPlotDialog(QDialog):
                 lambda: self._child_luts.remove(lut_dialog) if lut_dialog in self._child_luts else None
             )
 
+    def set_histogram_data(self, lut_data: Union[np.ndarray, Dict[str, np.ndarray]]):
+        """
+        Podmienia dane histogramu i odświeża wykres bez zamykania okna, z zachowaniem wybranego kanału.
+        Wywoływana np. po zmianie fragmentu obrazu, którego histogram jest pokazywany.
+        :param lut_data: histogram w formacie generate_lut_histogram
+        """
+        current_index = self.channel_selector.currentIndex()
+
+        self.raw_lut_data = lut_data
+
+        # Bez blokowania sygnałów każde dodanie pozycji do listy rysowałoby wykres od nowa
+        self.channel_selector.blockSignals(True)
+        self._setup_channel_selector()
+        if 0 <= current_index < self.channel_selector.count():
+            self.channel_selector.setCurrentIndex(current_index)
+        self.channel_selector.blockSignals(False)
+
+        self.update_plot()
+
     def _setup_channel_selector(self):
         """
         Metoda wypełniająca widget QComboBox dostępnymi opcjami dla wyświetlenia histogramu
@@ -154,27 +178,22 @@ class HistogramPlotDialog(QDialog):
     @staticmethod
     def calculate_stats(lut_data: np.ndarray) -> str:
 
-        pixel_values = np.repeat(np.arange(lut_data.size), lut_data)
+        # Statystyki liczone z 256 przedziałów histogramu, bez odtwarzania tablicy wszystkich pixel-i
+        stats = histogram_statistics(lut_data)
 
-        if pixel_values.size == 0:
+        if stats.count == 0:
             return "Brak pikseli."
 
-        # Podstawowe statystyki
-        mean_brightness = np.mean(pixel_values)
-        standard_deviaton = np.std(pixel_values)
-        median = np.median(pixel_values)
-        min_value = np.min(pixel_values)
-        max_value = np.max(pixel_values)
-        total_pixels = pixel_values.size
-
         # Tekst do wyświetlenia
         stats_text = (
-            f"Statystyki (Liczba pikseli: {total_pixels:,}):\n"
-            f"  Średnia jasność: {mean_brightness:.2f}\n"
-            f"  Odchylenie Standardowe - jasności: {standard_deviaton:.2f}\n"
-            f"  Mediana:       {median:.2f}\n"
-            f"  Min:           {min_value}\n"
-            f"  Max:           {max_value}"
+            f"Statystyki (Liczba pikseli: {stats.count:,}):\n"
+            f"  Średnia jasność: {stats.mean:.2f}\n"
+            f"  Odchylenie Standardowe - jasności: {stats.std:.2f}\n"
+            f"  Mediana:       {stats.median:.2f}\n"
+            f"  Min:           {stats.minimum}\n"
+            f"  Max:           {stats.maximum}\n"
+            f"  Dominanta:     {stats.mode}\n"
+            f"  Entropia:      {stats.entropy:.3f} bit"
         )
         return stats_text
 
@@ -186,9 +205,6 @@ class HistogramPlotDialog(QDialog):
         # Pobranie wyświetlanego tekstu-jest on nazwą kanału
         channel_name = self.channel_selector.currentText()
 
-        # Wyczyszczenie canvasu matplotlib
-        self.statsChart.axes.clear()
-
         # Sprawdzenie, czy zaznaczone dane są tablicą-rysowanie pojedyńczego kanału
         if isinstance(selected_data, np.ndarray):
             # Ustawienie aktualnych danych do wyświetlenia jako te z przekazane z opcji
@@ -199,8 +215,8 @@ class HistogramPlotDialog(QDialog):
             if 'Gray' in channel_name or 'Luminancja' in channel_name:
                 color = 'gray'
 
-            # Narysowanie histogramu za pomocą klasy MplCanvas
-            self.statsChart.draw_manual_histogram(selected_data, color)
+            # Widżet rysuje wykres od nowa tylko raz, przy najbliższym odświeżeniu okna
+            self.statsChart.set_histograms([selected_data], [color], f"Histogram - Kanał: {color.capitalize()}")
             self.stats_label.setText(self.calculate_stats(selected_data))
 
         # Sprawdzenie, czy zaznaczone dane są słownikiem-rysowanie wszystkich kanałów naraz
@@ -210,24 +226,14 @@ class HistogramPlotDialog(QDialog):
             first_lut_array = all_lut_arrays[0]
 
             all_pixels = np.zeros(first_lut_array.size, dtype=np.int64)
-            # Iteracja po przekazanym słowniku
-            for name, data_array in selected_data.items():
-                color = name
-
-                # Nadpisuje tu histogram
-                self.statsChart.draw_manual_histogram(data_array, color)
-
-                # Sumowanie wektorowe, czyli operacja += jest wywoływana dla każdego [i] z dwóch tablic
+            # Sumowanie wektorowe, czyli operacja += jest wywoływana dla każdego [i] z dwóch tablic
+            for data_array in all_lut_arrays:
                 all_pixels += data_array
 
-            self.statsChart.axes.set_title("Histogram - Wszystkie Kanały (Nakładanie)")
-            self.statsChart.draw()
-
-            # Dodanie legendy
-            self.statsChart.axes.legend(['Red', 'Green', 'Blue'], loc='upper right')
-            # Dodanie tytułu
-            self.statsChart.axes.set_title("Histogram - Wszystkie Kanały (Nakładanie)")
-            self.statsChart.draw()
+            # Wszystkie kanały nałożone na siebie, z legendą
+            names = list(selected_data.keys())
+            self.statsChart.set_histograms(all_lut_arrays, names, "Histogram - Wszystkie Kanały (Nakładanie)",
+                                           labels=[name.capitalize() for name in names])
 
             # Wyświetlenie statystyk
             stats_output = self.calculate_stats(all_pixels)
@@ -0,0 +1,154 @@
+# histogram_statistics.py
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+
+class HistogramStatistics(NamedTuple):
+    """
+    Statystyki jasności obrazu odczytane z histogramu
+    count - ilość pixel-i
+    mean, variance, std - średnia, wariancja i odchylenie standardowe (populacji, jak np.var i np.std)
+    median - mediana (jak np.median)
+    minimum, maximum - najmniejsza i największa jasność
+    mode - najczęstsza jasność (najmniejsza, gdy kilka ma tę samą ilość)
+    entropy - entropia w bitach
+    """
+    count: int
+    mean: float
+    variance: float
+    std: float
+    median: float
+    minimum: int
+    maximum: int
+    mode: int
+    entropy: float
+
+
+def _moments(histogram: np.ndarray) -> tuple[int, int, int]:
+    """
+    Suma wag, suma jasności i suma kwadratów jasności jako liczby całkowite Pythona,
+    więc wynik jest dokładny niezależnie od ilości pixel-i
+    """
+    counts = np.asarray(histogram, dtype=np.int64)
+    levels = np.arange(counts.size, dtype=np.int64)
+
+    count = int(counts.sum())
+    total = int(np.dot(levels, counts))
+    total_squares = int(np.dot(levels * levels, counts))
+    return count, total, total_squares
+
+
+def histogram_mean(histogram: np.ndarray) -> float:
+    """Średnia jasność z histogramu, 0 dla pustego histogramu"""
+    count, total, _ = _moments(histogram)
+    return total / count if count else 0.0
+
+
+def histogram_variance(histogram: np.ndarray) -> float:
+    """
+    Wariancja jasności z histogramu: (n * suma(i^2 * h[i]) - suma(i * h[i])^2) / n^2
+    Licznik jest liczony na liczbach całkowitych, więc nie ma utraty precyzji przy odejmowaniu
+    """
+    count, total, total_squares = _moments(histogram)
+    if count == 0:
+        return 0.0
+    return (count * total_squares - total * total) / (count * count)
+
+
+# Dla Lab1 - zadanie 3
+def histogram_percentile(histogram: np.ndarray, percent: float) -> float:
+    """
+    Percentyl jasności odczytany z histogramu, bez sortowania pixel-i.
+    Daje ten sam wynik co np.percentile (interpolacja liniowa) na obrazie, z którego policzono histogram.
+
+    Algorytm:
+    1. Pozycja percentyla w posortowanym obrazie: indeks = procent / 100 * (ilość_pixeli - 1)
+    2. Jasność pixel-a o numerze k w posortowanym obrazie to pierwsza jasność, dla której suma narastająca
+        histogramu jest większa od k
+    3. Interpolacja liniowa pomiędzy jasnościami pixel-i floor(indeks) i ceil(indeks)
+
+    :param histogram: histogram kanału (256 wartości)
+    :param percent: percentyl w zakresie 0-100
+    :return: wartość percentyla
+    """
+    cdf_array = np.cumsum(histogram, dtype=np.int64)
+    total_pixels = int(cdf_array[-1])
+
+    if total_pixels == 0:
+        return 0.0
+
+    # Punkt 1 algorytmu
+    virtual_index = (percent / 100) * (total_pixels - 1)
+    lower_index = math.floor(virtual_index)
+    upper_index = min(lower_index + 1, total_pixels - 1)
+    fraction = virtual_index - lower_index
+
+    # Punkt 2 algorytmu
+    lower_value, upper_value = np.searchsorted(cdf_array, [lower_index, upper_index], side='right').astype(np.float64)
+
+    # Punkt 3 algorytmu, w tej samej postaci co w numpy, aby wynik był identyczny
+    difference = upper_value - lower_value
+    if fraction >= 0.5:
+        return float(upper_value - difference * (1 - fraction))
+    return float(lower_value + difference * fraction)
+
+
+def histogram_median(histogram: np.ndarray) -> float:
+    """Mediana z histogramu, dla parzystej ilości pixel-i średnia dwóch środkowych (jak np.median)"""
+    cdf_array = np.cumsum(histogram, dtype=np.int64)
+    total_pixels = int(cdf_array[-1])
+
+    if total_pixels == 0:
+        return 0.0
+
+    lower_value, upper_value = np.searchsorted(cdf_array, [(total_pixels - 1) // 2, total_pixels // 2], side='right')
+    return (int(lower_value) + int(upper_value)) / 2
+
+
+def histogram_mode(histogram: np.ndarray) -> int:
+    """Najczęstsza jasność, przy remisie najmniejsza"""
+    return int(np.argmax(histogram))
+
+
+def histogram_entropy(histogram: np.ndarray) -> float:
+    """
+    Entropia Shannona rozkładu jasności w bitach: -suma(p * log2(p)) dla p = h[i] / n > 0
+    0 dla obrazu jednolitego, 8 dla obrazu 8-bitowego o płaskim histogramie
+    """
+    counts = np.asarray(histogram, dtype=np.float64)
+    total = counts.sum()
+    if total == 0:
+        return 0.0
+
+    probabilities = counts[counts > 0] / total
+    return float(-np.dot(probabilities, np.log2(probabilities)))
+
+
+def histogram_statistics(histogram: np.ndarray) -> HistogramStatistics:
+    """
+    Wszystkie statystyki z HistogramStatistics liczone bezpośrednio z ilości pixel-i w przedziałach.
+    Koszt i pamięć zależą od ilości przedziałów (256), a nie od ilości pixel-i obrazu.
+
+    :param histogram: histogram kanału lub suma histogramów kilku kanałów
+    :return: statystyki, dla pustego histogramu count = 0 i pozostałe wartości zerowe
+    """
+    count, total, total_squares = _moments(histogram)
+    if count == 0:
+        return HistogramStatistics(0, 0.0, 0.0, 0.0, 0.0, 0, 0, 0, 0.0)
+
+    variance = (count * total_squares - total * total) / (count * count)
+    occupied = np.flatnonzero(histogram)
+
+    return HistogramStatistics(
+        count=count,
+        mean=total / count,
+        variance=variance,
+        std=math.sqrt(variance),
+        median=histogram_median(histogram),
+        minimum=int(occupied[0]),
+        maximum=int(occupied[-1]),
+        mode=histogram_mode(histogram),
+        entropy=histogram_entropy(histogram),
+    )
@@ -0,0 +1,199 @@
+# histogram_widget.py
+import numpy as np
+from PyQt6.QtCore import QPointF, QRectF, Qt
+from PyQt6.QtGui import QColor, QPainter, QPaintEvent, QPen, QPixmap, QPolygonF, QResizeEvent
+from PyQt6.QtWidgets import QSizePolicy, QWidget
+
+# Marginesy obszaru wykresu w pixel-ach: lewo (etykiety osi Y), góra (tytuł), prawo, dół (etykiety osi X)
+PLOT_MARGINS = (70, 30, 15, 45)
+
+# Przeźroczystość słupków (0-255), nakładające się kanały pozostają widoczne
+BAR_ALPHA = 179
+
+# Jasności podpisane na osi X
+X_TICKS = (0, 64, 128, 192, 255)
+
+# Ilość podziałek osi Y
+Y_TICKS = 5
+
+
+class HistogramWidget(QWidget):
+    """
+    Natywny widżet Qt rysujący histogram (jeden kanał lub kilka nałożonych kanałów) przez QPainter.
+
+    Wysokości słupków są trzymane w tablicy numpy przydzielonej raz (kanały x przedziały). Wykres jest rysowany
+    do pixmap-y tylko przy zmianie danych, skali lub rozmiaru, a paintEvent jedynie ją kopiuje, więc przełączanie
+    kanałów i odświeżanie okna nie przelicza geometrii od nowa.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.setMinimumSize(320, 240)
+
+        # Bufor wysokości słupków, powiększany tylko gdy przyjdzie więcej kanałów lub przedziałów
+        self._counts = np.zeros((3, 256), dtype=np.float64)
+        self._series = 0
+        self._bins = 256
+        self._colors: list[str] = []
+        self._labels: list[str] = []
+        self._title = ""
+        self._log_scale = False
+
+        # Narysowany wykres, None oznacza, że trzeba go narysować ponownie
+        self._chart: QPixmap | None = None
+
+    def set_histograms(self, histograms: list[np.ndarray], colors: list[str], title: str = "",
+                       labels: list[str] | None = None) -> None:
+        """
+        Ustawia dane wykresu, kilka histogramów jest rysowanych jeden na drugim
+        :param histograms: histogramy kanałów, każdy tej samej długości
+        :param colors: kolor każdego histogramu (nazwa koloru Qt, np. 'red', 'gray')
+        :param title: tytuł wykresu
+        :param labels: opisy do legendy, domyślnie bez legendy
+        """
+        series = len(histograms)
+        bins = histograms[0].size if series else 0
+
+        if series > self._counts.shape[0] or bins > self._counts.shape[1]:
+            self._counts = np.zeros((max(series, self._counts.shape[0]), max(bins, self._counts.shape[1])))
+
+        for index, histogram in enumerate(histograms):
+            self._counts[index, :bins] = histogram
+
+        self._series = series
+        self._bins = bins
+        self._colors = list(colors)
+        self._labels = list(labels) if labels else []
+        self._title = title
+        self.invalidate()
+
+    def set_log_scale(self, enabled: bool) -> None:
+        """Skala logarytmiczna osi Y (log(1 + ilość)), pokazuje rzadkie jasności obok dominujących"""
+        if enabled != self._log_scale:
+            self._log_scale = enabled
+            self.invalidate()
+
+    def log_scale(self) -> bool:
+        return self._log_scale
+
+    def invalidate(self) -> None:
+        """Wymusza narysowanie wykresu od nowa przy najbliższym odświeżeniu"""
+        self._chart = None
+        self.update()
+
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        self._chart = None
+        super().resizeEvent(event)
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        if self._chart is None or self._chart.size() != self.size():
+            self._chart = self._render_chart()
+
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._chart)
+        painter.end()
+
+    def _render_chart(self) -> QPixmap:
+        pixmap = QPixmap(self.size())
+        pixmap.fill(Qt.GlobalColor.white)
+
+        painter = QPainter(pixmap)
+        left, top, right, bottom = PLOT_MARGINS
+        plot = QRectF(left, top, max(self.width() - left - right, 1), max(self.height() - top - bottom, 1))
+
+        painter.drawText(QRectF(0, 0, self.width(), top), Qt.AlignmentFlag.AlignCenter,
+                         self._title if self._series else "Brak danych histogramu")
+
+        if self._series and self._bins:
+            counts = self._counts[:self._series, :self._bins]
+            values = np.log1p(counts) if self._log_scale else counts
+
+            # Oś Y od zera do maksimum * 105%, jak wcześniej w wykresie matplotlib
+            y_max = float(values.max()) * 1.05 or 1.0
+            self._draw_axes(painter, plot, y_max)
+
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+            painter.setPen(Qt.PenStyle.NoPen)
+            for index in range(self._series):
+                color = QColor(self._colors[index] if index < len(self._colors) else "gray")
+                color.setAlpha(BAR_ALPHA)
+                painter.setBrush(color)
+                painter.drawPolygon(self._bars_polygon(values[index], plot, y_max))
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+
+            self._draw_legend(painter, plot)
+
+        painter.end()
+        return pixmap
+
+    def _bars_polygon(self, values: np.ndarray, plot: QRectF, y_max: float) -> QPolygonF:
+        """
+        Obrys słupków jako jeden wielokąt schodkowy: każdy przedział to odcinek poziomy na swojej wysokości.
+        Jeden wielokąt zamiast osobnego prostokąta na przedział to jedno wywołanie rysowania na kanał
+        """
+        # Oś X od -1 do ilości przedziałów, tak jak wcześniej, żeby skrajne słupki nie leżały na osi
+        x_scale = plot.width() / (self._bins + 1)
+        edges = plot.left() + (np.arange(self._bins + 1) + 0.5) * x_scale
+        heights = plot.bottom() - values / y_max * plot.height()
+
+        xs = np.repeat(edges, 2)[1:-1]
+        ys = np.repeat(heights, 2)
+
+        points = [QPointF(plot.left() + 0.5 * x_scale, plot.bottom())]
+        points.extend(QPointF(x, y) for x, y in zip(xs.tolist(), ys.tolist()))
+        points.append(QPointF(edges[-1], plot.bottom()))
+        return QPolygonF(points)
+
+    def _draw_axes(self, painter: QPainter, plot: QRectF, y_max: float) -> None:
+        painter.setPen(QPen(QColor("black")))
+        painter.drawRect(plot)
+
+        metrics = painter.fontMetrics()
+        x_scale = plot.width() / (self._bins + 1)
+
+        for tick in X_TICKS:
+            if tick >= self._bins:
+                continue
+            x = plot.left() + (tick + 1) * x_scale
+            painter.drawLine(QPointF(x, plot.bottom()), QPointF(x, plot.bottom() + 4))
+            painter.drawText(QRectF(x - 20, plot.bottom() + 5, 40, metrics.height()), Qt.AlignmentFlag.AlignHCenter,
+                             str(tick))
+
+        for step in range(Y_TICKS + 1):
+            value = y_max * step / Y_TICKS
+            y = plot.bottom() - step / Y_TICKS * plot.height()
+            count = np.expm1(value) if self._log_scale else value
+            painter.drawLine(QPointF(plot.left() - 4, y), QPointF(plot.left(), y))
+            painter.drawText(QRectF(0, y - metrics.height() / 2, plot.left() - 6, metrics.height()),
+                             Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, f"{count:,.0f}")
+
+        painter.drawText(QRectF(plot.left(), plot.bottom() + 5 + metrics.height(), plot.width(), metrics.height()),
+                         Qt.AlignmentFlag.AlignHCenter, "Poziom Jasności (0-255)")
+
+        painter.save()
+        painter.translate(12, plot.center().y())
+        painter.rotate(-90)
+        painter.drawText(QRectF(-plot.height() / 2, -metrics.height() / 2, plot.height(), metrics.height()),
+                         Qt.AlignmentFlag.AlignCenter, "Liczba Pixeli (log)" if self._log_scale else "Liczba Pixeli")
+        painter.restore()
+
+    def _draw_legend(self, painter: QPainter, plot: QRectF) -> None:
+        if not self._labels:
+            return
+
+        metrics = painter.fontMetrics()
+        row_height = metrics.height() + 2
+        width = max(metrics.horizontalAdvance(label) for label in self._labels) + 30
+        x = plot.right() - width - 5
+        y = plot.top() + 5
+
+        painter.setPen(QPen(QColor("black")))
+        painter.setBrush(QColor(255, 255, 255, 220))
+        painter.drawRect(QRectF(x, y, width, row_height * len(self._labels) + 4))
+
+        for index, label in enumerate(self._labels):
+            color = QColor(self._colors[index] if index < len(self._colors) else "gray")
+            row = y + 2 + index * row_height
+            painter.fillRect(QRectF(x + 5, row + 3, 15, row_height - 6), color)
+            painter.drawText(QRectF(x + 25, row, width - 25, row_height), Qt.AlignmentFlag.AlignVCenter, label)
@@ -0,0 +1,213 @@
+# image_io.py
+import struct
+
+import cv2
+import numpy as np
+
+# Tagi TIFF potrzebne do odczytania nieskompresowanego obrazu
+TIFF_IMAGE_WIDTH = 256
+TIFF_IMAGE_LENGTH = 257
+TIFF_BITS_PER_SAMPLE = 258
+TIFF_COMPRESSION = 259
+TIFF_PHOTOMETRIC = 262
+TIFF_STRIP_OFFSETS = 273
+TIFF_SAMPLES_PER_PIXEL = 277
+TIFF_STRIP_BYTE_COUNTS = 279
+TIFF_PLANAR_CONFIGURATION = 284
+TIFF_TILE_WIDTH = 322
+
+# Typ pola TIFF: (format struct, ilość bajtów)
+TIFF_FIELD_TYPES = {
+    1: ("B", 1),  # BYTE
+    3: ("H", 2),  # SHORT
+    4: ("I", 4),  # LONG
+}
+
+
+def smart_image_read(file_path, use_memmap: bool = False):
+    """
+    Wczytuje obraz i automatycznie decyduje, czy zwrócić go jako obraz kolorowy (BGR) czy szaroodcieniowy (Grayscale)
+
+    :param file_path: ścieżka do pliku
+    :param use_memmap: jeżeli True, to nieskompresowane pliki BMP/TIFF są mapowane z dysku (memmap_image_read)
+        zamiast dekodowane do pamięci. Taki obraz jest tylko do odczytu i zmienia się razem z plikiem, więc jest
+        przeznaczony do przetwarzania wsadowego i kafelkowego, a nie do edycji w oknie z zapisem do tego samego pliku.
+    """
+    if use_memmap:
+        mapped_image = memmap_image_read(file_path)
+        if mapped_image is not None:
+            # Szary obraz zapisany jako BGR to widok na jeden kanał mapowania, bez kopiowania do pamięci
+            if _is_gray_bgr(mapped_image):
+                return mapped_image[:, :, 0]
+            return mapped_image
+
+    img = cv2.imread(file_path)
+
+    if img is None:
+        return None
+
+    if _is_gray_bgr(img):
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+    return img
+
+
+def _is_gray_bgr(image: np.ndarray) -> bool:
+    """Czy obraz ma trzy identyczne kanały"""
+    if image.ndim != 3 or image.shape[2] != 3:
+        return False
+
+    b, g, r = image[:, :, 0], image[:, :, 1], image[:, :, 2]
+    return np.array_equal(b, g) and np.array_equal(g, r)
+
+
+def memmap_image_read(file_path) -> np.memmap | None:
+    """
+    Mapuje nieskompresowany obraz 8-bitowy (BMP, TIFF) bezpośrednio z dysku jako np.memmap.
+    Otwarcie nie czyta pixel-i, system wczytuje strony pliku dopiero przy pierwszym dostępie.
+
+    :param file_path: ścieżka do pliku
+    :return: tablica tylko do odczytu (szaroodcieniowa lub BGR) albo None, jeżeli pliku nie da się zmapować
+    """
+    try:
+        with open(file_path, "rb") as file:
+            header = file.read(4)
+    except OSError:
+        return None
+
+    try:
+        if header[:2] == b"BM":
+            return _memmap_bmp(file_path)
+        if header in (b"II*\x00", b"MM\x00*"):
+            return _memmap_tiff(file_path)
+    except (struct.error, ValueError, KeyError):
+        # Uszkodzony nagłówek albo brak wymaganego tagu TIFF (np. StripOffsets), plik wczyta cv2.imread
+        return None
+
+    return None
+
+
+def memmap_raw_read(file_path, height: int, width: int, channels: int = 1, offset: int = 0) -> np.memmap:
+    """
+    Mapuje surowe dane obrazu (bez nagłówka) o znanym wymiarze
+    :param file_path: ścieżka do pliku
+    :param height: wysokość obrazu
+    :param width: szerokość obrazu
+    :param channels: 1 dla szaroodcieniowego, 3 dla BGR
+    :param offset: ilość bajtów do pominięcia na początku pliku
+    :return: tablica np.memmap tylko do odczytu
+    """
+    shape = (height, width) if channels == 1 else (height, width, channels)
+    return np.memmap(file_path, dtype=np.uint8, mode="r", offset=offset, shape=shape)
+
+
+def _memmap_bmp(file_path) -> np.memmap | None:
+    """Mapowanie BMP: tylko BI_RGB 24-bit oraz 8-bit z paletą szarości"""
+    with open(file_path, "rb") as file:
+        header = file.read(54)
+        data_offset, = struct.unpack_from("<I", header, 10)
+        dib_size, width, height, _, bits_per_pixel, compression = struct.unpack_from("<IiiHHI", header, 14)
+        colors_used, = struct.unpack_from("<I", header, 46)
+
+        if compression != 0 or bits_per_pixel not in (8, 24) or width <= 0 or height == 0:
+            return None
+
+        # Dla 8-bit paleta musi być szarością 0..255, inaczej wartości pixel-i to indeksy kolorów
+        if bits_per_pixel == 8:
+            palette_size = colors_used or 256
+            file.seek(14 + dib_size)
+            palette = np.frombuffer(file.read(4 * palette_size), dtype=np.uint8).reshape(-1, 4)
+            expected = np.arange(palette_size, dtype=np.uint8)
+            if not all(np.array_equal(palette[:, c], expected) for c in range(3)):
+                return None
+
+    channels = bits_per_pixel // 8
+
+    # Każdy wiersz BMP jest wyrównany do 4 bajtów
+    row_stride = ((width * bits_per_pixel + 31) // 32) * 4
+    rows = abs(height)
+
+    raw = np.memmap(file_path, dtype=np.uint8, mode="r", offset=data_offset, shape=(rows, row_stride))
+    image = raw[:, :width * channels]
+
+    if channels == 3:
+        # BMP przechowuje BGR, czyli tak samo jak OpenCV
+        image = image.reshape(rows, width, 3)
+
+    # Dodatnia wysokość oznacza wiersze zapisane od dołu, odwracam widokiem bez kopiowania
+    return image[::-1] if height > 0 else image
+
+
+def _memmap_tiff(file_path) -> np.memmap | None:
+    """Mapowanie TIFF: tylko nieskompresowane, 8-bit, 1 lub 3 kanały, paski ułożone jeden za drugim"""
+    with open(file_path, "rb") as file:
+        byte_order = "<" if file.read(2) == b"II" else ">"
+        file.seek(4)
+        ifd_offset, = struct.unpack(byte_order + "I", file.read(4))
+
+        file.seek(ifd_offset)
+        entries_count, = struct.unpack(byte_order + "H", file.read(2))
+        entries = file.read(12 * entries_count)
+
+        tags = {}
+        for index in range(entries_count):
+            tag, field_type, count = struct.unpack_from(byte_order + "HHI", entries, 12 * index)
+            if field_type not in TIFF_FIELD_TYPES:
+                continue
+
+            value_format, value_size = TIFF_FIELD_TYPES[field_type]
+            value_format = f"{byte_order}{count}{value_format}"
+
+            # Wartości mieszczące się w 4 bajtach są zapisane w samym wpisie, dłuższe pod wskazanym adresem
+            if count * value_size <= 4:
+                values = struct.unpack_from(value_format, entries, 12 * index + 8)
+            else:
+                values_offset, = struct.unpack_from(byte_order + "I", entries, 12 * index + 8)
+                position = file.tell()
+                file.seek(values_offset)
+                values = struct.unpack(value_format, file.read(count * value_size))
+                file.seek(position)
+
+            tags[tag] = values
+
+    width = tags[TIFF_IMAGE_WIDTH][0]
+    height = tags[TIFF_IMAGE_LENGTH][0]
+    channels = tags.get(TIFF_SAMPLES_PER_PIXEL, (1,))[0]
+    bits = tags.get(TIFF_BITS_PER_SAMPLE, (1,))
+    compression = tags.get(TIFF_COMPRESSION, (1,))[0]
+    photometric = tags.get(TIFF_PHOTOMETRIC, (None,))[0]
+    planar = tags.get(TIFF_PLANAR_CONFIGURATION, (1,))[0]
+
+    if compression != 1 or planar != 1 or TIFF_TILE_WIDTH in tags or any(b != 8 for b in bits):
+        return None
+    if not ((channels == 1 and photometric == 1) or (channels == 3 and photometric == 2)):
+        return None
+
+    # Paski muszą leżeć w pliku jeden za drugim, aby cały obraz był jednym ciągłym blokiem
+    strip_offsets = tags[TIFF_STRIP_OFFSETS]
+    strip_byte_counts = tags[TIFF_STRIP_BYTE_COUNTS]
+    for offset, byte_count, next_offset in zip(strip_offsets, strip_byte_counts, strip_offsets[1:]):
+        if offset + byte_count != next_offset:
+            return None
+
+    shape = (height, width) if channels == 1 else (height, width, 3)
+    image = np.memmap(file_path, dtype=np.uint8, mode="r", offset=strip_offsets[0], shape=shape)
+
+    # TIFF przechowuje RGB, a OpenCV BGR, odwracam kanały widokiem bez kopiowania
+    return image[:, :, ::-1] if channels == 3 else image
+
+
+def downsample_for_display(image: np.ndarray, max_width: int, max_height: int) -> np.ndarray:
+    """
+    Pomniejsza obraz do podglądu, biorąc co n-ty wiersz i kolumnę.
+    Dla np.memmap czytane są tylko wybrane wiersze, a nie cały plik.
+
+    :param image: obraz (np.ndarray lub np.memmap)
+    :param max_width: maksymalna szerokość podglądu
+    :param max_height: maksymalna wysokość podglądu
+    :return: ciągła tablica z podglądem
+    """
+    height, width = image.shape[:2]
+    step = max(1, -(-height // max_height), -(-width // max_width))  # dzielenie z zaokrągleniem w górę
+
+    return np.ascontiguousarray(image[::step, ::step])
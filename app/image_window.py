@@ -1,18 +1,21 @@
 # image_window.py
 import numpy as np
-from PyQt6.QtGui import QResizeEvent, QCloseEvent
-from PyQt6.QtWidgets import QMainWindow, QLabel, QScrollArea, QFileDialog, QInputDialog, QMessageBox
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtGui import QResizeEvent, QCloseEvent, QPixmap
+from PyQt6.QtWidgets import QMainWindow, QLabel, QScrollArea, QFileDialog, QInputDialog, QMessageBox, QStackedWidget
+from PyQt6.QtCore import Qt, QSize, QTimer
 import cv2
 
 from histogram_plot_dialog import HistogramPlotDialog
 from image_selection_dialog import ImageSelectionDialog
 from utils import convert_cv_to_pixmap
-from algorithms import generate_lut_histogram, linear_streching_histogram, \
-    linear_saturation_streching_histogram, histogram_equalization, point_negation, point_posterize, \
-    point_binary_threshold, point_keep_gray_threshold, multi_image_addition, scalar_operation, absolute_difference, \
-    logical_operation, convert_to_binary_mask, convert_to_8bit_mask, KERNELS, \
-    apply_linear_filter, apply_laplacian_sharpening, apply_median_filter, apply_canny_edge_detection
+from view_renderer import ImagePyramid, PyramidRenderer, RESIZE_SETTLE_MS
+from tiled_viewer import TiledImageView, LARGE_IMAGE_PIXELS
+from algorithms import generate_lut_histogram, multi_image_addition, absolute_difference, logical_operation, \
+    apply_kernel_bank, sobel_gradients, gradient_magnitude_orientation, Gradients, KERNELS
+from versioned_image import VersionedImage
+from pipeline import Step, PointStep, BORDER_TYPES, to_grayscale, LinearStretch, SaturationStretch, HistogramEqualization, \
+    Negation, Posterize, BinaryThreshold, KeepGrayThreshold, ScalarOperation, BinaryMask, EightBitMask, \
+    LinearFilter, LaplacianSharpening, MedianFilter, RankFilter, CannyEdgeDetection
 
 
 class ImageWindow(QMainWindow):
@@ -22,9 +25,28 @@ class ImageWindow(QMainWindow):
         self.main_app_window = main_app_window  # Referencja do okna głównego zawierającego listę otwartych okien
         self._child_windows = []  # Tablica przechowująca okna wynikowe operacji lub wykresy
 
-        self.cv_image = cv_image  # Przechowuje oryginał w formacie OpenCV (tablica NumPy)
-        self.pixmap = convert_cv_to_pixmap(cv_image)  # Przechowuje pixmap-ę
-        self.view_mode = "aspect_fit"  # Ustawiam aktualny tryb aspect_fit/fit/original
+        # Przechowuje obraz w formacie OpenCV (tablica NumPy) razem z wersją i zapamiętanym histogramem,
+        # dostępny przez właściwość cv_image
+        self.image_state = VersionedImage(cv_image)
+        # Pixmap-a całego obrazu jest tworzona dopiero, gdy jest potrzebna (właściwość pixmap)
+        self._pixmap: QPixmap | None = None
+        self._pixmap_version = None
+
+        # Duże obrazy od razu w widoku kafelkowym, bez pixmap-y całego obrazu
+        height, width = cv_image.shape[:2]
+        # Ustawiam aktualny tryb aspect_fit/fit/original
+        self.view_mode = "original" if height * width > LARGE_IMAGE_PIXELS else "aspect_fit"
+
+        # Piramida obrazu dla trybu aspect_fit i widoku kafelkowego, budowana leniwie dla aktualnej wersji obrazu
+        self._pyramid: ImagePyramid | None = None
+        self._pyramid_version = None
+        self._renderer: PyramidRenderer | None = None
+
+        # Wygładzone skalowanie dopiero, gdy rozmiar okna przestanie się zmieniać
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(RESIZE_SETTLE_MS)
+        self._resize_timer.timeout.connect(lambda: self.view_aspect_fit_resize_event(smooth=True))
 
         # Ustawienie GUI do wyświetlania
         self.scroll_area = QScrollArea()  # Ustawienie scroll-u, gdy zmniejszę okno
@@ -32,21 +54,70 @@ class ImageWindow(QMainWindow):
         self.label_image.setAlignment(Qt.AlignmentFlag.AlignCenter)  # Ustawia wyrównanie obrazu w QLabel na środek
         self.scroll_area.setWidget(self.label_image)  # Osadza QLabel w obszarze przewijania scroll_area
         self.scroll_area.setWidgetResizable(True)  # Włącza zmianę wielkości okna
-        self.setCentralWidget(self.scroll_area)  # Ustawia QScrollArea jako jedyny, wypełniający
+
+        # Widok kafelkowy z powiększaniem i przesuwaniem dla trybu original
+        self.tiled_view = TiledImageView()
+
+        # Przełączanie pomiędzy QScrollArea (aspect_fit, fit) a widokiem kafelkowym (original)
+        self.view_stack = QStackedWidget()
+        self.view_stack.addWidget(self.scroll_area)
+        self.view_stack.addWidget(self.tiled_view)
+        self.setCentralWidget(self.view_stack)  # Ustawia QStackedWidget jako jedyny, wypełniający
 
         self.show_image()  # Wyświetlenie obrazu
 
+        # Duży obraz jest na początku dopasowany do okna
+        if self.view_mode == "original":
+            self.tiled_view.fit_to_view()
+
         self.create_menus()  # Menu okna ze zdjęciem
 
+    @property
+    def cv_image(self) -> np.ndarray:
+        return self.image_state.image
+
+    @cv_image.setter
+    def cv_image(self, image: np.ndarray) -> None:
+        # Każde podstawienie obrazu to nowa wersja, więc zapamiętany histogram i statystyki są unieważniane
+        self.image_state.replace(image)
+
+    @property
+    def pixmap(self) -> QPixmap | None:
+        """Pixmap-a całego obrazu, tworzona raz na wersję obrazu i tylko wtedy, gdy widok jej potrzebuje"""
+        if self._pixmap_version != self.image_state.version:
+            self._pixmap = convert_cv_to_pixmap(self.cv_image)
+            self._pixmap_version = self.image_state.version
+        return self._pixmap
+
+    def image_pyramid(self) -> ImagePyramid:
+        """Piramida aktualnej wersji obrazu, wspólna dla trybu aspect_fit i widoku kafelkowego"""
+        if self._pyramid is None or self._pyramid_version != self.image_state.version:
+            self._pyramid = ImagePyramid(self.cv_image)
+            self._pyramid_version = self.image_state.version
+        return self._pyramid
+
     def show_image(self):
         """Odświeża widok w oknie na podstawie self.cv_image"""
-        if self.pixmap:
+        self.update_view()
+
+        # Dopasowanie rozmiaru okna do zdjęcia z marginesami 20 px, maksymalna wielkość okna to 800x600px
+        height, width = self.cv_image.shape[:2]
+        self.resize(min(width + 20, 800), min(height + 20, 600))
+
+    def update_view(self):
+        """Ustawia zawartość widoku dla aktualnego trybu, bez zmiany rozmiaru okna"""
+        if self.view_mode == "original":
+            self.view_stack.setCurrentWidget(self.tiled_view)
+            self.tiled_view.set_pyramid(self.image_pyramid(), self.image_state.version)
+            return
+
+        self.view_stack.setCurrentWidget(self.scroll_area)
+        if self.view_mode == "aspect_fit":
+            self.view_aspect_fit_resize_event()
+        elif self.pixmap:
             # Ustawienie pixmap-y jako zawartości obiektu QLabel
             self.label_image.setPixmap(self.pixmap)
 
-            # Dopasowanie rozmiaru okna do zdjęcia z marginesami 20 px, maksymalna wielkość okna to 800x600px
-            self.resize(min(self.pixmap.width() + 20, 800), min(self.pixmap.height() + 20, 600))
-
     def closeEvent(self, event: QCloseEvent):
         # Funkcja dla main_app do usuwania okna z listy
         if self.main_app_window is not None:
@@ -104,6 +175,9 @@ class ImageWindow(QMainWindow):
         ui_point_negation = lab1_zad4_menu.addAction("Negacja")
         ui_point_negation.triggered.connect(lambda: self.on_point_negation_triggered(self.cv_image))
 
+        ui_region_negation = lab1_zad4_menu.addAction("Negacja fragmentu obrazu (ROI)")
+        ui_region_negation.triggered.connect(lambda: self.on_region_negation_triggered())
+
         ui_point_posterize = lab1_zad4_menu.addAction("Redukcja poziomów szarości (posteryzacja)")
         ui_point_posterize.triggered.connect(lambda: self.on_point_posterize_triggered(self.cv_image))
 
@@ -152,15 +226,24 @@ class ImageWindow(QMainWindow):
         ui_prewitt = lab2_zad3_menu.addAction("Detekcja krawędzi - Prewitt")
         ui_prewitt.triggered.connect(lambda: self.on_filter_category_triggered("Detekcja Krawędzi - Prewitt"))
 
+        ui_compass = lab2_zad3_menu.addAction("Detekcja krawędzi - Prewitt (wszystkie kierunki)")
+        ui_compass.triggered.connect(lambda: self.on_compass_edge_detection_triggered("Detekcja Krawędzi - Prewitt"))
+
         ui_sobel = lab2_zad3_menu.addAction("Detekcja krawędzi - Sobel")
         ui_sobel.triggered.connect(lambda: self.on_filter_category_triggered("Detekcja krawędzi - Sobel"))
 
+        ui_gradient = lab2_zad3_menu.addAction("Gradient Sobela (moduł i kierunek)")
+        ui_gradient.triggered.connect(lambda: self.on_gradient_triggered())
+
         # Lab 2 - Zadanie 4
         lab2_zad4_menu = lab2_menu.addMenu("Zad 4")
 
         ui_median_filter = lab2_zad4_menu.addAction("Mediana")
         ui_median_filter.triggered.connect(lambda: self.on_median_filter_triggered())
 
+        ui_rank_filter = lab2_zad4_menu.addAction("Filtr statystyczny (percentyl)")
+        ui_rank_filter.triggered.connect(lambda: self.on_rank_filter_triggered())
+
         # Lab 2 - Zadanie 5
         lab2_zad4_menu = lab2_menu.addMenu("Zad 5")
 
@@ -175,21 +258,25 @@ class ImageWindow(QMainWindow):
         self.main_app_window.open_image_dialog()
 
     def on_file_duplicate_triggered(self):
-
         # Bez użycia cv_image.copy() przekazana zostałaby referencja i wtedy edytując jedno zdjęcie zmiany byłyby na 2
-        duplicated_image = ImageWindow(self.cv_image.copy(), title=f'(Copy) {self.windowTitle()}',
-                                       main_app_window=self.main_app_window)
-        duplicated_image.show()
+        self.open_new_window(self.cv_image.copy(), f'(Copy) {self.windowTitle()}')
+
+    def open_new_window(self, image: np.ndarray, title: str) -> "ImageWindow":
+        """Otwiera obraz w nowym oknie, które jest pamiętane przez główne okno aplikacji"""
+        new_window = ImageWindow(image, title=title, main_app_window=self.main_app_window)
+        new_window.show()
 
         # Dodanie okna do listy przechowywanych referencji dla garbage collector-a, żeby nie usuwał
-        self.main_app_window.open_windows.append(duplicated_image)
+        self.main_app_window.open_windows.append(new_window)
 
         def cleanup():
-            if duplicated_image in self.main_app_window.open_windows:
-                self.main_app_window.open_windows.remove(duplicated_image)
+            if new_window in self.main_app_window.open_windows:
+                self.main_app_window.open_windows.remove(new_window)
 
         # Kiedy okno jest zamknięte przez użytkownika zostaje usunięte z listy
-        duplicated_image.destroyed.connect(cleanup)
+        new_window.destroyed.connect(cleanup)
+
+        return new_window
 
     def on_file_save_triggered(self):
 
@@ -215,6 +302,7 @@ class ImageWindow(QMainWindow):
         self.label_image.setMinimumSize(40, 40)
         self.scroll_area.setWidgetResizable(True)
         self.label_image.setScaledContents(False)
+        self.update_view()
 
     def on_view_fit_triggered(self):
         self.view_mode = 'fit'
@@ -224,18 +312,14 @@ class ImageWindow(QMainWindow):
         self.scroll_area.setWidgetResizable(True)
         # Wymusza to, że QLabel będzie mogło zmniejszać rozmiar pixmap-y
         self.label_image.setMinimumSize(1, 1)
+        self.update_view()
 
     def on_view_original_triggered(self):
+        # Widok kafelkowy w rozmiarze oryginalnym: kółko myszy powiększa, przeciąganie przesuwa,
+        # podwójne kliknięcie przełącza na dopasowanie do okna
         self.view_mode = 'original'
-        # Usuwam ustawienie 1,1 z opcji fit
-        self.label_image.setMinimumSize(0, 0)
-        # Wyłączam skalowanie
-        self.label_image.setScaledContents(False)
-        # Ustawia Resize dla obiektu ze zdjęciem
-        self.scroll_area.setWidgetResizable(True)
-
-        # Zmienia rozmiar tak, aby pomieścić swoją zawartość
-        self.label_image.adjustSize()
+        self.update_view()
+        self.tiled_view.set_zoom(1.0)
 
     # ------------------------------
     # MENU VIEW HELPERS METHODS
@@ -244,13 +328,17 @@ class ImageWindow(QMainWindow):
         """Nadpisanie metody udostępnianej przez PyQt wywoływanej po zmianie wielkości okna"""
 
         if self.view_mode == "aspect_fit" and self.scroll_area.widgetResizable():
-            self.view_aspect_fit_resize_event()
+            # W trakcie przeciągania krawędzi okna szybki podgląd, wygładzony obraz po RESIZE_SETTLE_MS
+            self.view_aspect_fit_resize_event(smooth=False)
+            self._resize_timer.start()
 
         super().resizeEvent(event)
 
-    def view_aspect_fit_resize_event(self):
+    def view_aspect_fit_resize_event(self, smooth: bool = True):
         """Wywoływana w nadpisaniu metody resizeEvent za każdym razem,
-        gdy podczas trybu widoku = aspect_fit zmienia się wielkość okna"""
+        gdy podczas trybu widoku = aspect_fit zmienia się wielkość okna
+        :param smooth: True - skalowanie z wygładzaniem, False - szybki podgląd metodą najbliższego sąsiada
+        """
 
         # Pobieram aktualny maksymalny obszar roboczy jako 2D obiekt QSize
         full_view_size = self.scroll_area.viewport().size()
@@ -270,12 +358,16 @@ class ImageWindow(QMainWindow):
         # Zapisanie obliczonych rozmiarów do obiektu QSize
         max_view_size = QSize(width_scaled_with_margin, height_scaled_with_margin)
 
-        # Obliczenie nowej pixmap-y
-        scaled_pixmap = self.pixmap.scaled(
-            max_view_size,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
-        )
+        # Piramida jest budowana od nowa tylko po zmianie obrazu, gotowa pixmap-a jest użyta jako poziom 0
+        if self._renderer is None or self._renderer.version != self.image_state.version:
+            pixmap = self._pixmap if self._pixmap_version == self.image_state.version else None
+            self._renderer = PyramidRenderer(self.image_pyramid(), pixmap, self.image_state.version)
+
+        # Obliczenie nowej pixmap-y z najbliższego poziomu piramidy zamiast z pełnej rozdzielczości
+        if smooth:
+            scaled_pixmap = self._renderer.render(max_view_size)
+        else:
+            scaled_pixmap = self._renderer.preview(max_view_size)
 
         # Ustawienie nowej pixmap-y w QLabel-u
         self.label_image.setPixmap(scaled_pixmap)
@@ -290,7 +382,11 @@ class ImageWindow(QMainWindow):
     # Zadanie 2
     def on_action_histogram_triggered(self, image_data):
         # Ta funkcja zostanie wywołana PRZY KLIKNIĘCIU
-        histogram_data = generate_lut_histogram(image_data)
+        # Dla aktualnego obrazu histogram jest brany z pamięci podręcznej, liczony raz na wersję obrazu
+        if image_data is self.cv_image:
+            histogram_data = self.image_state.histogram()
+        else:
+            histogram_data = generate_lut_histogram(image_data)
         histogram_dialog = None
         try:
             histogram_dialog = HistogramPlotDialog(histogram_data, self)
@@ -299,32 +395,92 @@ class ImageWindow(QMainWindow):
             return
 
         if histogram_dialog:
+            # Zamknięcie okna je usuwa, więc obserwator histogramu nie zostaje po zamknięciu
+            histogram_dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
             histogram_dialog.show()
 
             self._child_windows.append(histogram_dialog)
 
+            # Histogram aktualnego obrazu odświeża się sam po każdej zmianie obrazu lub jego fragmentu
+            refresh = None
+            if image_data is self.cv_image:
+                def refresh(image_state, _region):
+                    # Ukryte okno nie jest odświeżane, histogram nie jest wtedy liczony
+                    if histogram_dialog.isVisible():
+                        histogram_dialog.set_histogram_data(image_state.histogram())
+
+                self.image_state.subscribe(refresh)
+
             def cleanup():
                 if histogram_dialog in self._child_windows:
                     self._child_windows.remove(histogram_dialog)
+                if refresh is not None:
+                    self.image_state.unsubscribe(refresh)
 
-            # Usunięcie referencji, gdy użytkownik zamknie okno
+            # Usunięcie referencji i obserwatora, gdy użytkownik zamknie okno
+            histogram_dialog.finished.connect(cleanup)
             histogram_dialog.destroyed.connect(cleanup)
 
+    def apply_step(self, step: Step, image_data: np.ndarray | None = None) -> None:
+        """
+        Wykonuje krok z pipeline.py na obrazie i odświeża widok
+        :param step: krok z parametrami zebranymi od użytkownika
+        :param image_data: obraz wejściowy, domyślnie self.cv_image
+        """
+        if image_data is None:
+            image_data = self.cv_image
+
+        # Operacje punktowe zależne od histogramu (rozciąganie, equalizacja) biorą go z pamięci podręcznej
+        if isinstance(step, PointStep) and step.needs_histogram and image_data is self.cv_image:
+            self.cv_image = step.apply_with_histograms(image_data, self.image_state.histograms())
+        else:
+            self.cv_image = step.apply(image_data)
+        self.show_image()
+
+    def apply_step_to_region(self, step: Step, region: tuple[slice, slice]) -> None:
+        """
+        Wykonuje krok z pipeline.py tylko na fragmencie obrazu. Obraz jest zmieniany w miejscu, a zapamiętany
+        histogram jest poprawiany tylko o zmieniony fragment (VersionedImage.update_region)
+        :param step: krok zachowujący rozmiar i typ obrazu (np. operacja punktowa)
+        :param region: (wiersze, kolumny) jako wycinki
+        """
+        self.image_state.update_region(region, step.apply(self.cv_image[region]))
+        self.show_image()
+
+    def ask_region(self, title: str) -> tuple[slice, slice] | None:
+        """
+        Okno do wpisania prostokąta (x, y, szerokość, wysokość), przycinanego do rozmiaru obrazu
+        :return: (wiersze, kolumny) jako wycinki lub None, gdy użytkownik anulował lub podał błędne dane
+        """
+        height, width = self.cv_image.shape[:2]
+        text, ok = QInputDialog.getText(self, title, "Podaj fragment: x, y, szerokość, wysokość",
+                                        text=f"0, 0, {width // 2}, {height // 2}")
+        if not ok:
+            return None
+
+        try:
+            x, y, region_width, region_height = (int(value) for value in text.replace(";", ",").split(","))
+        except ValueError:
+            QMessageBox.critical(self, "Błąd", "Fragment musi być podany jako cztery liczby: x, y, szerokość, wysokość")
+            return None
+
+        left, top = max(x, 0), max(y, 0)
+        right, bottom = min(x + region_width, width), min(y + region_height, height)
+        if left >= right or top >= bottom:
+            QMessageBox.critical(self, "Błąd", "Fragment leży poza obrazem")
+            return None
+
+        return slice(top, bottom), slice(left, right)
+
     # Zadanie 3
     def on_action_linear_streching_triggered(self, image_data):
-        self.cv_image = linear_streching_histogram(image_data)
-        self.pixmap = convert_cv_to_pixmap(self.cv_image)
-        self.show_image()
+        self.apply_step(LinearStretch(), image_data)
 
     def on_action_linear_saturation_streching_triggered(self, image_data):
-        self.cv_image = linear_saturation_streching_histogram(image_data)
-        self.pixmap = convert_cv_to_pixmap(self.cv_image)
-        self.show_image()
+        self.apply_step(SaturationStretch(), image_data)
 
     def on_histogram_equalization_triggered(self, image_data):
-        self.cv_image = histogram_equalization(image_data)
-        self.pixmap = convert_cv_to_pixmap(self.cv_image)
-        self.show_image()
+        self.apply_step(HistogramEqualization(), image_data)
 
     # Zadanie 4
 
@@ -339,8 +495,7 @@ class ImageWindow(QMainWindow):
                                          "Operacja wymaga obrazu w odcieniach szarości. Czy skonwertować?",
                                          QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             if reply == QMessageBox.StandardButton.Yes:
-                self.cv_image = cv2.cvtColor(self.cv_image, cv2.COLOR_BGR2GRAY)
-                self.pixmap = convert_cv_to_pixmap(self.cv_image)
+                self.cv_image = to_grayscale(self.cv_image)
                 self.show_image()
                 return True
             else:
@@ -348,18 +503,19 @@ class ImageWindow(QMainWindow):
         return True
 
     def on_point_negation_triggered(self, image_data: np.ndarray):
-        self.cv_image = point_negation(image_data)
-        self.pixmap = convert_cv_to_pixmap(self.cv_image)
-        self.show_image()
+        self.apply_step(Negation(), image_data)
+
+    def on_region_negation_triggered(self):
+        region = self.ask_region("Negacja fragmentu")
+        if region is not None:
+            self.apply_step_to_region(Negation(), region)
 
     def on_point_posterize_triggered(self, image_data: np.ndarray):
         # Okno, w którym użytkownik wpisuje ilość poziomó∑
         levels, ok = QInputDialog.getInt(self, "Posteryzacja",
                                          "Podaj liczbę poziomów:", value=4, min=2, max=255, step=1)
         if ok:
-            self.cv_image = point_posterize(image_data, levels)
-            self.pixmap = convert_cv_to_pixmap(self.cv_image)
-            self.show_image()
+            self.apply_step(Posterize(levels=levels), image_data)
 
     def on_point_binary_threshold_triggered(self):
         is_image_grayscale = self.ensure_grayscale()
@@ -368,13 +524,12 @@ class ImageWindow(QMainWindow):
         if not is_image_grayscale:
             return False
 
+        # Podpowiedź progu metodą Otsu, liczona z zapamiętanego histogramu
         threshold, ok = QInputDialog.getInt(self, "Progowanie binarne",
                                             "Podaj próg progowania(0-255): ",
-                                            value=127, min=0, max=255)
+                                            value=self.image_state.otsu_threshold(), min=0, max=255)
         if ok:
-            self.cv_image = point_binary_threshold(self.cv_image, threshold)
-            self.pixmap = convert_cv_to_pixmap(self.cv_image)
-            self.show_image()
+            self.apply_step(BinaryThreshold(threshold=threshold))
 
     def on_keep_gray_threshold_triggered(self, ):
         is_image_grayscale = self.ensure_grayscale()
@@ -383,13 +538,12 @@ class ImageWindow(QMainWindow):
         if not is_image_grayscale:
             return False
 
+        # Podpowiedź progu metodą Otsu, liczona z zapamiętanego histogramu
         threshold, ok = QInputDialog.getInt(self, "Progowanie z zachowanie szarości",
                                             "Podaj próg progowania(0-255): ",
-                                            value=127, min=0, max=255)
+                                            value=self.image_state.otsu_threshold(), min=0, max=255)
         if ok:
-            self.cv_image = point_keep_gray_threshold(self.cv_image, threshold)
-            self.pixmap = convert_cv_to_pixmap(self.cv_image)
-            self.show_image()
+            self.apply_step(KeepGrayThreshold(threshold=threshold))
 
     # ------------------------------
     # MENU LAB2 OPTIONS METHODS
@@ -442,7 +596,6 @@ class ImageWindow(QMainWindow):
 
         try:
             self.cv_image = multi_image_addition(all_images, saturate=is_saturate)
-            self.pixmap = convert_cv_to_pixmap(self.cv_image)
             self.show_image()
         except ValueError as e:
             QMessageBox.critical(self, "Błąd wielkości zdjęć", str(e))
@@ -474,9 +627,7 @@ class ImageWindow(QMainWindow):
             is_saturated = (reply == QMessageBox.StandardButton.Yes)
 
         # Wykonanie operacji
-        self.cv_image = scalar_operation(self.cv_image, value, operations_map[operation_name], is_saturated)
-        self.pixmap = convert_cv_to_pixmap(self.cv_image)
-        self.show_image()
+        self.apply_step(ScalarOperation(value=value, operation=operations_map[operation_name], saturate=is_saturated))
 
     def on_absolute_difference_triggered(self):
         other_images = self.select_additional_images()
@@ -493,7 +644,6 @@ class ImageWindow(QMainWindow):
 
         try:
             self.cv_image = absolute_difference(self.cv_image, other_images)
-            self.pixmap = convert_cv_to_pixmap(self.cv_image)
             self.show_image()
         except ValueError as e:
             QMessageBox.critical(self, "Błąd rozmiaru. Wybrałeś zdjęcia o różnej wielkości lub kolorowy i"
@@ -531,7 +681,6 @@ class ImageWindow(QMainWindow):
         if selected_operation == 'not':
             try:
                 self.cv_image = logical_operation(self.cv_image, image2=None, operation='not')
-                self.pixmap = convert_cv_to_pixmap(self.cv_image)
                 self.show_image()
             except ValueError as e:
                 QMessageBox.critical(self, "Błąd", str(e))
@@ -550,12 +699,10 @@ class ImageWindow(QMainWindow):
         other_image: np.ndarray = other_images[0]
 
         # Konwersja drugiego obrazu na szary, jeżeli jest kolorowy
-        if len(other_image.shape) == 3:
-            other_image = cv2.cvtColor(other_image, cv2.COLOR_BGR2GRAY)
+        other_image = to_grayscale(other_image)
 
         try:
             self.cv_image = logical_operation(self.cv_image, other_image, selected_operation)
-            self.pixmap = convert_cv_to_pixmap(self.cv_image)
             self.show_image()
         except ValueError as e:
             QMessageBox.critical(self, "Błąd operacji", str(e))
@@ -570,18 +717,50 @@ class ImageWindow(QMainWindow):
                                 "Konwersja na zakres 0-1\n"
                                 "Obraz stanie się wizualnie czarny")
 
-        self.cv_image = convert_to_binary_mask(self.cv_image)
-        self.pixmap = convert_cv_to_pixmap(self.cv_image)
-        self.show_image()
+        self.apply_step(BinaryMask())
 
     def on_convert_to_8bit_triggered(self):
         # Jeżeli nie zostałą dokonana konwersja na szaroodcieniowy
         if not self.ensure_grayscale():
             return
 
-        self.cv_image = convert_to_8bit_mask(self.cv_image)
-        self.pixmap = convert_cv_to_pixmap(self.cv_image)
-        self.show_image()
+        self.apply_step(EightBitMask())
+
+    def ask_border_type(self) -> tuple[int, int] | None:
+        """
+        Pyta użytkownika o typ obramowania i wartość ramki
+        :return: krotka (typ obramowania z pipeline.BORDER_TYPES, wartość ramki) albo None, gdy anulowano
+        """
+        border_options = ["BORDER_REFLECT (Lustrzane)",
+                          "BORDER_CONSTANT (Stała po za obrazem)",
+                          "BORDER_OVERWRITE (Stała na krawędzi obrazu)"]
+        border_choice, ok = QInputDialog.getItem(self,
+                                                 "Wybieranie typu obramowania",
+                                                 "Wybierz typ obramowania",
+                                                 border_options, 0, False)
+        if not ok:
+            return None
+
+        # Nazwa obramowania to pierwsze słowo opcji, np. "BORDER_REFLECT"
+        border_type = BORDER_TYPES[border_choice.split()[0]]
+
+        # Domyślna wartość wypełnienia ramki
+        border_value = 0
+
+        if "CONSTANT" in border_choice:
+            border_value, ok = QInputDialog.getInt(self,
+                                                   "Wartość n",
+                                                   "Wybierz wartość n do obliczenia ramki z marginesu",
+                                                   border_value, 0, 255)
+        elif "OVERWRITE" in border_choice:
+            border_value, ok = QInputDialog.getInt(self,
+                                                   "Wartość ramki",
+                                                   "Wybierz stałą jasność jaką chcesz wypełnić ramkę",
+                                                   border_value, 0, 255)
+        if not ok:
+            return None
+
+        return border_type, border_value
 
     # Zadanie 3
     def on_filter_category_triggered(self, category_name: str) -> None:
@@ -612,114 +791,132 @@ class ImageWindow(QMainWindow):
         kernel = masks_dictionary[mask_name]
 
         # Wybranie typu obramowania
-        border_options = ["BORDER_REFLECT (Lustrzane)",
-                          "BORDER_CONSTANT (Stała po za obrazem)",
-                          "BORDER_OVERWRITE (Stała na krawędzi obrazu)"]
-        border_choice, ok2 = QInputDialog.getItem(self,
-                                                  "Wybieranie typu obramowania",
-                                                  "Wybierz typ obramowania",
-                                                  border_options, 0, False)
-        # Domyślna wartość wypełnienia ramki
-        border_value = 0
-
-        if not ok2:
+        border = self.ask_border_type()
+        if border is None:
             return
-
-        if "REFLECT" in border_choice:
-            border_type = cv2.BORDER_REFLECT
-        elif "CONSTANT" in border_choice:
-            border_type = cv2.BORDER_CONSTANT
-            value, ok3 = QInputDialog.getInt(self,
-                                             "Wartość n",
-                                             "Wybierz wartość n do obliczenia ramki z marginesu", border_value, 0, 255)
-            if not ok3:
-                return
-            border_value = value
-
-        else:  # "BORDER_OVERWRITE" is in border_choice
-            border_type = 9999  # wartość ustalona dla rozróżnienia
-
-            value, ok3 = QInputDialog.getInt(self,
-                                             "Wartość ramki",
-                                             "Wybierz stałą jasność jaką chcesz wypełnić ramkę", border_value, 0, 255)
-            if not ok3:
-                return
-            border_value = value
+        border_type, border_value = border
 
         try:
             if category_name == "Wyostrzanie":
-                self.cv_image = apply_laplacian_sharpening(self.cv_image, kernel, border_type, border_value)
+                step = LaplacianSharpening(kernel=kernel, border_type=border_type, border_value=border_value)
 
             else:
-                self.cv_image = apply_linear_filter(self.cv_image, kernel, border_type, border_value)
+                step = LinearFilter(kernel=kernel, border_type=border_type, border_value=border_value)
 
-            self.pixmap = convert_cv_to_pixmap(self.cv_image)
-            self.show_image()
+            self.apply_step(step)
         except ValueError as e:
             QMessageBox.critical(self, "Błąd operacji", str(e))
         except Exception as e:
             QMessageBox.critical(self, "Nieoczekiwany błąd", str(e))
 
+    def on_compass_edge_detection_triggered(self, category_name: str) -> None:
+        """
+        Wszystkie maski kompasowe naraz. Obraz w oknie zamienia się na największą odpowiedź,
+        a mapa kierunków (numer maski z największą odpowiedzią) otwiera się w nowym oknie
+        """
+        if not self.ensure_grayscale():
+            return
+
+        border = self.ask_border_type()
+        if border is None:
+            return
+        border_type, border_value = border
+
+        try:
+            kernels = KERNELS[category_name]
+            max_response, direction_index = apply_kernel_bank(self.cv_image, list(kernels.values()), border_type,
+                                                              border_value)
+        except ValueError as e:
+            QMessageBox.critical(self, "Błąd operacji", str(e))
+            return
+
+        self.cv_image = max_response
+        self.show_image()
+
+        # Numery kierunków rozciągnięte na pełny zakres jasności, aby były widoczne
+        direction_step = 255 // max(len(kernels) - 1, 1)
+        directions_image = direction_index * np.uint8(direction_step)
+        self.open_new_window(directions_image, f"Kierunki ({', '.join(kernels)}) {self.windowTitle()}")
+
+    def get_gradients(self) -> Gradients:
+        """
+        Pochodne Sobela aktualnego obrazu. Są liczone raz i zapamiętywane, dopóki obraz w oknie się nie zmieni,
+        więc gradient i metoda Canny'ego na tym samym obrazie nie liczą ich dwa razy
+        """
+        return self.image_state.cached("gradients", sobel_gradients)
+
+    def on_gradient_triggered(self) -> None:
+        """Moduł i kierunek gradientu otwierane w nowych oknach, obraz w tym oknie zostaje bez zmian"""
+        if not self.ensure_grayscale():
+            return
+
+        magnitude, orientation = gradient_magnitude_orientation(self.get_gradients())
+
+        # Moduł obcięty do 0-255, kierunek 0-360 stopni przeskalowany na 0-255
+        magnitude_image = np.clip(magnitude, 0, 255).astype(np.uint8)
+        orientation_image = (orientation * (255 / 360)).astype(np.uint8)
+
+        self.open_new_window(magnitude_image, f"Moduł gradientu {self.windowTitle()}")
+        self.open_new_window(orientation_image, f"Kierunek gradientu {self.windowTitle()}")
+
     # Zadanie 4
     def on_median_filter_triggered(self):
         if not self.ensure_grayscale():
             return
 
-        # Zdefiniowanie wielkości kernelów dla operacji mediany
-        sizes = ["3x3", "5x5", "7x7", "9x9"]
-        size, ok = QInputDialog.getItem(self,
-                                        "Mediana",
-                                        "Wybierz wielkość", sizes, 0, False)
-        if not ok:
+        kernel_size = self.ask_kernel_size("Mediana")
+        if kernel_size is None:
             return
 
-        kernel_size = int(size[0])
-
         # Wybranie typu obramowania
-        border_options = ["BORDER_REFLECT (Lustrzane)",
-                          "BORDER_CONSTANT (Stała po za obrazem)",
-                          "BORDER_OVERWRITE (Stała na krawędzi obrazu)"]
-        border_choice, ok2 = QInputDialog.getItem(self,
-                                                  "Wybieranie typu obramowania",
-                                                  "Wybierz typ obramowania",
-                                                  border_options, 0, False)
-        # Domyślna wartość wypełnienia ramki
-        border_value = 0
+        border = self.ask_border_type()
+        if border is None:
+            return
+        border_type, border_value = border
 
-        if not ok2:
+        try:
+            self.apply_step(MedianFilter(kernel_size=kernel_size, border_type=border_type, border_value=border_value))
+        except ValueError as e:
+            QMessageBox.critical(self, "Błąd", str(e))
+
+    def on_rank_filter_triggered(self):
+        if not self.ensure_grayscale():
+            return
+
+        kernel_size = self.ask_kernel_size("Filtr statystyczny")
+        if kernel_size is None:
             return
 
-        if "REFLECT" in border_choice:
-            border_type = cv2.BORDER_REFLECT
-        elif "CONSTANT" in border_choice:
-            border_type = cv2.BORDER_CONSTANT
-            value, ok3 = QInputDialog.getInt(self,
-                                             "Wartość n",
-                                             "Wybierz wartość n do obliczenia ramki z marginesu", border_value, 0, 255)
-            if not ok3:
-                return
-            border_value = value
-
-        else:  # "BORDER_OVERWRITE" is in border_choice
-            border_type = 9999  # wartość ustalona dla rozróżnienia
-
-            value, ok3 = QInputDialog.getInt(self,
-                                             "Wartość ramki",
-                                             "Wybierz stałą jasność jaką chcesz wypełnić ramkę", border_value, 0, 255)
-            if not ok3:
-                return
-            border_value = value
+        # 0 - minimum, 50 - mediana, 100 - maksimum
+        percentile, ok = QInputDialog.getDouble(self,
+                                                "Filtr statystyczny",
+                                                "Percentyl (0 - minimum, 50 - mediana, 100 - maksimum)",
+                                                50.0, 0.0, 100.0, 1)
+        if not ok:
+            return
+
+        border = self.ask_border_type()
+        if border is None:
+            return
+        border_type, border_value = border
 
         try:
-            self.cv_image = apply_median_filter(image=self.cv_image,
-                                                kernel_size=kernel_size,
-                                                border_type=border_type,
-                                                border_value=border_value)
-            self.pixmap = convert_cv_to_pixmap(self.cv_image)
-            self.show_image()
+            self.apply_step(RankFilter(kernel_size=kernel_size, percentile=percentile, border_type=border_type,
+                                       border_value=border_value))
         except ValueError as e:
             QMessageBox.critical(self, "Błąd", str(e))
 
+    def ask_kernel_size(self, title: str) -> int | None:
+        """
+        Pyta o bok maski filtru statystycznego, dowolna liczba nieparzysta od 3
+        :return: bok maski albo None, jeżeli użytkownik anulował
+        """
+        kernel_size, ok = QInputDialog.getInt(self, title, "Wybierz wielkość maski (liczba nieparzysta)", 3, 3, 255, 2)
+        if not ok:
+            return None
+
+        return kernel_size
+
     # Zadanie 5
     def on_canny_edge_detection_triggered(self):
         if not self.ensure_grayscale():
@@ -739,15 +936,10 @@ class ImageWindow(QMainWindow):
         if not ok2:
             return
 
-        # Jeżeli dolna wartość jest większa to dokonuję zamiany
-        if threshold1 > threshold2:
-            threshold2 = threshold1
-            threshold1 = threshold2
-            # threshold1, threshold2 = threshold2, threshold1 - można też tak w python
-
+        # Jeżeli dolna wartość jest większa, to CannyEdgeDetection sam dokonuje zamiany
         try:
-            self.cv_image = apply_canny_edge_detection(self.cv_image, threshold1, threshold2)
-            self.pixmap = convert_cv_to_pixmap(self.cv_image)
+            step = CannyEdgeDetection(threshold1=threshold1, threshold2=threshold2)
+            self.cv_image = step.apply_with_gradients(self.cv_image, self.get_gradients())
             self.show_image()
         except ValueError as e:
             QMessageBox.critical(self, "Błąd", str(e))
\ No newline at end of file
@@ -0,0 +1,157 @@
+# lut_table_model.py
+import numpy as np
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt6.QtGui import QAction, QKeySequence, QGuiApplication
+from PyQt6.QtWidgets import QTableView, QHeaderView, QFileDialog, QMenu
+
+
+class LutTableModel(QAbstractTableModel):
+    """
+    Model tabeli lut (indeks, wartość) czytający dane bezpośrednio z tablicy numpy.
+
+    Komórki nie są osobnymi obiektami (jak QTableWidgetItem), widok pyta model tylko o widoczne wiersze,
+    więc otwarcie tabeli nie zależy od ilości przedziałów (256 dla 8 bitów, 65536 dla 16 bitów).
+    Sortowanie i filtrowanie zmienia tylko tablicę numerów wierszy (self._rows), dane nie są kopiowane.
+    """
+
+    def __init__(self, lut_data: np.ndarray, index_label: str, value_label: str, parent=None):
+        super().__init__(parent)
+        self._data = np.asarray(lut_data).ravel()
+        self._labels = (index_label, value_label)
+
+        # Numery przedziałów w kolejności wyświetlania
+        self._rows = np.arange(self._data.size)
+        self._nonzero_only = False
+        self._sort_column = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else int(self._rows.size)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else 2
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            lut_index = int(self._rows[index.row()])
+            if index.column() == 0:
+                return str(lut_index)
+            return str(int(self._data[lut_index]))
+
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._labels[section]
+        return str(section)
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        # Tablica lut jest tylko do odczytu
+        return Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder) -> None:
+        """Sortowanie po indeksie lub wartości przez np.argsort, stabilne, więc równe wartości zostają po indeksie"""
+        self._sort_column = column
+        self._sort_order = order
+
+        self.layoutAboutToBeChanged.emit()
+        self._rows = self._ordered_rows()
+        self.layoutChanged.emit()
+
+    def set_nonzero_only(self, enabled: bool) -> None:
+        """Pokazuje tylko przedziały z wartością różną od zera (np. jasności występujące w obrazie)"""
+        if enabled == self._nonzero_only:
+            return
+
+        self._nonzero_only = enabled
+        self.beginResetModel()
+        self._rows = self._ordered_rows()
+        self.endResetModel()
+
+    def _ordered_rows(self) -> np.ndarray:
+        rows = np.flatnonzero(self._data) if self._nonzero_only else np.arange(self._data.size)
+
+        if self._sort_column == 1:
+            rows = rows[np.argsort(self._data[rows], kind="stable")]
+        if self._sort_column in (0, 1) and self._sort_order == Qt.SortOrder.DescendingOrder:
+            rows = rows[::-1]
+
+        return rows
+
+    def lut_rows(self, rows: list[int] | None = None) -> np.ndarray:
+        """
+        Dane wierszy w kolejności wyświetlania jako tablica (wiersze, 2): indeks i wartość
+        :param rows: numery wierszy widoku, domyślnie wszystkie
+        """
+        lut_indexes = self._rows if rows is None else self._rows[np.asarray(rows, dtype=np.intp)]
+        return np.column_stack((lut_indexes, self._data[lut_indexes]))
+
+    def to_text(self, rows: list[int] | None = None, separator: str = "\t") -> str:
+        """Wiersze jako tekst z nagłówkiem, do schowka (tabulator) lub pliku CSV (przecinek)"""
+        table = self.lut_rows(rows)
+        lines = [separator.join(self._labels)]
+        lines.extend(f"{index}{separator}{value}" for index, value in table.tolist())
+        return "\n".join(lines) + "\n"
+
+    def export_csv(self, file_path: str) -> None:
+        """Zapis wszystkich wyświetlanych wierszy do pliku CSV jednym wywołaniem np.savetxt"""
+        np.savetxt(file_path, self.lut_rows(), fmt="%d", delimiter=",", header=",".join(self._labels),
+                   comments="")
+
+
+class LutTableView(QTableView):
+    """
+    Widok tabeli lut z modelem LutTableModel: sortowanie po kliknięciu w nagłówek,
+    kopiowanie zaznaczonych wierszy (Ctrl+C) i menu kontekstowe z eksportem do CSV
+    """
+
+    def __init__(self, lut_data: np.ndarray, index_label: str, value_label: str, row_height: int = 20, parent=None):
+        super().__init__(parent)
+        self.lut_model = LutTableModel(lut_data, index_label, value_label, self)
+        self.setModel(self.lut_model)
+
+        self.setSortingEnabled(True)
+        self.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+
+        # Stała wysokość wierszy, widok nie musi mierzyć zawartości każdego wiersza
+        self.verticalHeader().setDefaultSectionSize(row_height)
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.verticalHeader().hide()
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+
+        copy_action = QAction("Kopiuj zaznaczone", self)
+        copy_action.setShortcut(QKeySequence.StandardKey.Copy)
+        copy_action.triggered.connect(self.copy_selection)
+        self.addAction(copy_action)
+        self._copy_action = copy_action
+
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.customContextMenuRequested.connect(self._show_context_menu)
+
+    def selected_rows(self) -> list[int]:
+        return sorted(index.row() for index in self.selectionModel().selectedRows())
+
+    def copy_selection(self) -> None:
+        """Kopiuje zaznaczone wiersze do schowka, bez zaznaczenia całą tabelę"""
+        rows = self.selected_rows() or None
+        QGuiApplication.clipboard().setText(self.lut_model.to_text(rows))
+
+    def export_csv(self) -> None:
+        file_path, _ = QFileDialog.getSaveFileName(self, "Zapisz tablicę lut jako...", "lut.csv", "CSV (*.csv)")
+        if file_path:
+            self.lut_model.export_csv(file_path)
+
+    def _show_context_menu(self, position) -> None:
+        menu = QMenu(self)
+        menu.addAction(self._copy_action)
+        menu.addAction("Eksportuj do CSV", self.export_csv)
+        menu.exec(self.viewport().mapToGlobal(position))
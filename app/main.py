@@ -59,7 +59,8 @@ class MainWindow(QMainWindow):
 
         if file_path:
 
-            # imread (image read) wczytuje obraz jako BGR
+            # imread (image read) wczytuje obraz jako BGR. Okno dostaje własną kopię w pamięci, a nie np.memmap,
+            # bo zapis (cv2.imwrite) do tego samego pliku lub zmiana pliku przez inny program zmieniałyby obraz w oknie
             cv_img = smart_image_read(file_path)
 
             if cv_img is not None:
@@ -1,11 +1,12 @@
 # multi_lut_dialog.py
 import numpy as np
 from PyQt6.QtCore import Qt
-from PyQt6.QtWidgets import QDialog, QHBoxLayout, QWidget, QVBoxLayout, QLabel, QTableWidget, QHeaderView, \
-    QTableWidgetItem
+from PyQt6.QtWidgets import QDialog, QHBoxLayout, QWidget, QVBoxLayout, QLabel, QCheckBox
 
 from typing import Dict
 
+from lut_table_model import LutTableView
+
 """
 Example:
 
@@ -61,36 +62,14 @@ class MultiLutDialog(QDialog):
         title_label.setStyleSheet("font-weight: bold; font-size: 12pt; margin-bottom: 5px;")
         column_layout.addWidget(title_label)
 
-        # Definicja tabeli
-        table = QTableWidget()
-        data_count = len(data_array)
-        table.setRowCount(data_count)
-        table.setColumnCount(2)
-
-        # Ustawienie tytułów dla argumentów
-        table.setHorizontalHeaderLabels([index_label, value_label])
-
-        # Wysokość wiersza
-        table.verticalHeader().setDefaultSectionSize(20)
-        # Blokuje zmianę wysokości wiersza
-        table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
-
-        # Ustawienie flag by nie można było zmieniać tablicy lut
-        flags = Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
-
-        # Iteracja po danych i wypełnienie tabeli
-        for i in range(data_count):
-            item_index = QTableWidgetItem(str(i))
-            item_index.setFlags(flags)
-            table.setItem(i, 0, item_index)
-
-            val = int(data_array[i])
-            item_val = QTableWidgetItem(str(val))
-            item_val.setFlags(flags)
-            table.setItem(i, 1, item_val)
+        # Definicja tabeli, wartości są czytane bezpośrednio z tablicy numpy przez model,
+        # bez tworzenia obiektu dla każdej komórki
+        table = LutTableView(data_array, index_label, value_label, row_height=20)
 
-        # Wypełnia całą dostępną przestrzeń równomiernie
-        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        # Filtr ukrywający wiersze z zerową wartością
+        nonzero_checkbox = QCheckBox("Tylko wartości niezerowe")
+        nonzero_checkbox.toggled.connect(table.lut_model.set_nonzero_only)
+        column_layout.addWidget(nonzero_checkbox)
 
         # Dodaje widget tabeli do QWidgetu, który jest kolumną
         column_layout.addWidget(table)
@@ -0,0 +1,460 @@
+# pipeline.py
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, asdict, replace
+
+import cv2
+import numpy as np
+
+from algorithms import KERNELS, POINT_OPERATION_LUTS, histogram_equalization, apply_point_operations, \
+    convert_to_binary_mask, convert_to_8bit_mask, apply_linear_filter, apply_laplacian_sharpening, apply_median_filter, \
+    apply_rank_filter, apply_compass_edge_detection, apply_gradient_magnitude, apply_canny_edge_detection, \
+    Gradients
+from borders import BORDER_OVERWRITE
+from tiling import process_in_bands
+
+# Nazwy obramowań używane w GUI i w plikach JSON
+BORDER_TYPES = {
+    "BORDER_REFLECT": cv2.BORDER_REFLECT,
+    "BORDER_CONSTANT": cv2.BORDER_CONSTANT,
+    "BORDER_OVERWRITE": BORDER_OVERWRITE,
+}
+
+SCALAR_OPERATIONS = ("addition", "multiplication", "division")
+
+
+def to_grayscale(image: np.ndarray) -> np.ndarray:
+    """Konwersja obrazu BGR na odcienie szarości, obraz szaroodcieniowy jest zwracany bez zmian"""
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+
+def border_type_from_name(border: str | int) -> int:
+    """
+    Zamienia nazwę obramowania (np. "BORDER_REFLECT") na wartość przyjmowaną przez funkcje filtrów
+    :param border: nazwa z BORDER_TYPES albo gotowa wartość
+    :return: wartość cv2.BORDER_* lub BORDER_OVERWRITE
+    """
+    if isinstance(border, str):
+        if border not in BORDER_TYPES:
+            raise ValueError(f"Nieznany typ obramowania: {border}")
+        return BORDER_TYPES[border]
+
+    if border not in BORDER_TYPES.values():
+        raise ValueError(f"Nieobsługiwany typ obramowania: {border}")
+    return border
+
+
+def _check_range(name: str, value: int, minimum: int, maximum: int) -> None:
+    if not minimum <= value <= maximum:
+        raise ValueError(f"{name} musi być w zakresie {minimum}-{maximum}, podano {value}")
+
+
+@dataclass(frozen=True)
+class Step(ABC):
+    """
+    Pojedynczy krok przetwarzania z parametrami. Parametry są sprawdzane przy tworzeniu kroku,
+    a sam krok można wykonać na dowolnej liczbie obrazów.
+    """
+
+    # Nazwa kroku w plikach JSON (STEP_TYPES)
+    name = ""
+
+    # Czy krok wymaga obrazu w odcieniach szarości (w GUI przed nim wywoływane jest ensure_grayscale)
+    requires_grayscale = False
+
+    def apply(self, image: np.ndarray) -> np.ndarray:
+        if self.requires_grayscale and image.ndim == 3:
+            raise ValueError(f"Operacja {self.name} wymaga obrazu w odcieniach szarości")
+        return self._apply(image)
+
+    @abstractmethod
+    def _apply(self, image: np.ndarray) -> np.ndarray:
+        """Właściwa operacja kroku, obraz jest już sprawdzony przez apply"""
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        return self.apply(image)
+
+    def to_spec(self) -> dict:
+        """Krok jako słownik do zapisania w JSON"""
+        return {"step": self.name, **asdict(self)}
+
+
+@dataclass(frozen=True)
+class PointStep(Step):
+    """
+    Krok będący operacją punktową. Kolejne takie kroki w Pipeline są składane w jedną tablicę lut
+    i nakładane na obraz jednym przejściem (apply_point_operations).
+    """
+
+    @property
+    def point_operation(self) -> tuple[str, dict]:
+        return self.name, asdict(self)
+
+    @property
+    def needs_histogram(self) -> bool:
+        """Czy tablica lut zależy od histogramu obrazu (rozciąganie, equalizacja)"""
+        return POINT_OPERATION_LUTS[self.name][1]
+
+    def _apply(self, image: np.ndarray) -> np.ndarray:
+        return apply_point_operations(image, [self.point_operation])
+
+    def apply_with_histograms(self, image: np.ndarray, histograms: list[np.ndarray]) -> np.ndarray:
+        """Jak apply, ale z histogramem każdego kanału policzonym wcześniej dla tego samego obrazu"""
+        if self.requires_grayscale and image.ndim == 3:
+            raise ValueError(f"Operacja {self.name} wymaga obrazu w odcieniach szarości")
+        return apply_point_operations(image, [self.point_operation], histograms)
+
+
+@dataclass(frozen=True)
+class ToGrayscale(Step):
+    name = "to_grayscale"
+
+    def _apply(self, image: np.ndarray) -> np.ndarray:
+        return to_grayscale(image)
+
+
+@dataclass(frozen=True)
+class LinearStretch(PointStep):
+    name = "linear_streching_histogram"
+
+
+@dataclass(frozen=True)
+class SaturationStretch(PointStep):
+    name = "linear_saturation_streching_histogram"
+    low_percent: float = 2.5
+    high_percent: float = 97.5
+
+    def __post_init__(self):
+        if not 0 <= self.low_percent < self.high_percent <= 100:
+            raise ValueError(f"Niepoprawne percentyle: {self.low_percent}, {self.high_percent}")
+
+
+@dataclass(frozen=True)
+class HistogramEqualization(PointStep):
+    name = "histogram_equalization"
+
+    def _apply(self, image: np.ndarray) -> np.ndarray:
+        return histogram_equalization(image)[0]
+
+
+@dataclass(frozen=True)
+class Negation(PointStep):
+    name = "point_negation"
+
+
+@dataclass(frozen=True)
+class Posterize(PointStep):
+    name = "point_posterize"
+    levels: int = 4
+
+    def __post_init__(self):
+        _check_range("Liczba poziomów", self.levels, 2, 255)
+
+
+@dataclass(frozen=True)
+class BinaryThreshold(PointStep):
+    name = "point_binary_threshold"
+    requires_grayscale = True
+    threshold: int = 127
+
+    def __post_init__(self):
+        _check_range("Próg", self.threshold, 0, 255)
+
+
+@dataclass(frozen=True)
+class KeepGrayThreshold(PointStep):
+    name = "point_keep_gray_threshold"
+    requires_grayscale = True
+    threshold: int = 127
+
+    def __post_init__(self):
+        _check_range("Próg", self.threshold, 0, 255)
+
+
+@dataclass(frozen=True)
+class ScalarOperation(PointStep):
+    name = "scalar_operation"
+    value: int = 10
+    operation: str = "addition"
+    saturate: bool = True
+
+    def __post_init__(self):
+        if self.operation not in SCALAR_OPERATIONS:
+            raise ValueError(f"Nieznana operacja skalarna: {self.operation}")
+        _check_range("Wartość", self.value, 0, 255)
+
+
+@dataclass(frozen=True)
+class BinaryMask(Step):
+    name = "convert_to_binary_mask"
+    requires_grayscale = True
+
+    def _apply(self, image: np.ndarray) -> np.ndarray:
+        return convert_to_binary_mask(image)
+
+
+@dataclass(frozen=True)
+class EightBitMask(Step):
+    name = "convert_to_8bit_mask"
+    requires_grayscale = True
+
+    def _apply(self, image: np.ndarray) -> np.ndarray:
+        return convert_to_8bit_mask(image)
+
+
+@dataclass(frozen=True)
+class BorderedStep(Step):
+    """Wspólne parametry obramowania dla filtrów sąsiedztwa"""
+    border_type: int = cv2.BORDER_REFLECT
+    border_value: int = 0
+
+    # Ilość wątków dla process_in_bands, None - domyślna
+    workers: int | None = field(default=None, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "border_type", border_type_from_name(self.border_type))
+        _check_range("Wartość obramowania", self.border_value, 0, 255)
+
+
+@dataclass(frozen=True)
+class LinearFilter(BorderedStep):
+    name = "apply_linear_filter"
+    requires_grayscale = True
+
+    # Maska jest przechowywana jako krotka krotek, bo np.ndarray w zamrożonej dataclass nie ma hash(),
+    # a == porównuje tablice element po elemencie zamiast zwrócić True/False
+    kernel: tuple[tuple[float, ...], ...] = field(default_factory=lambda: KERNELS["Wygładzanie"]["Uśrednienie 3x3"])
+
+    def __post_init__(self):
+        super().__post_init__()
+        kernel = np.asarray(self.kernel, dtype=np.float32)
+        if kernel.ndim != 2 or kernel.shape[0] % 2 == 0 or kernel.shape[1] % 2 == 0:
+            raise ValueError(f"Maska musi być macierzą 2D o nieparzystych wymiarach, podano {kernel.shape}")
+        object.__setattr__(self, "kernel", tuple(tuple(row) for row in kernel.tolist()))
+
+    @property
+    def kernel_array(self) -> np.ndarray:
+        """Maska jako tablica float32 dla funkcji filtrów"""
+        return np.array(self.kernel, dtype=np.float32)
+
+    def _apply(self, image: np.ndarray) -> np.ndarray:
+        return process_in_bands(image, apply_linear_filter, workers=self.workers, kernel=self.kernel_array,
+                                border_type=self.border_type, border_value=self.border_value)
+
+    def to_spec(self) -> dict:
+        spec = super().to_spec()
+        spec["kernel"] = [list(row) for row in self.kernel]
+        return spec
+
+
+@dataclass(frozen=True)
+class LaplacianSharpening(LinearFilter):
+    name = "apply_laplacian_sharpening"
+    kernel: tuple[tuple[float, ...], ...] = field(default_factory=lambda: KERNELS["Wyostrzanie"]["Maska 1"])
+
+    def _apply(self, image: np.ndarray) -> np.ndarray:
+        return process_in_bands(image, apply_laplacian_sharpening, workers=self.workers, kernel=self.kernel_array,
+                                border_type=self.border_type, border_value=self.border_value)
+
+
+@dataclass(frozen=True)
+class CompassEdgeDetection(BorderedStep):
+    """Wszystkie maski kategorii z KERNELS naraz, wynikiem jest największa odpowiedź w każdym pixel-u"""
+    name = "apply_compass_edge_detection"
+    requires_grayscale = True
+    category: str = "Detekcja Krawędzi - Prewitt"
+
+    def __post_init__(self):
+        super().__post_init__()
+        if self.category not in KERNELS:
+            raise ValueError(f"Nieznana kategoria masek: {self.category!r}")
+
+    @property
+    def kernels(self) -> list[np.ndarray]:
+        return list(KERNELS[self.category].values())
+
+    def _apply(self, image: np.ndarray) -> np.ndarray:
+        return process_in_bands(image, apply_compass_edge_detection, workers=self.workers, kernels=self.kernels,
+                                border_type=self.border_type, border_value=self.border_value)
+
+
+@dataclass(frozen=True)
+class MedianFilter(BorderedStep):
+    name = "apply_median_filter"
+    requires_grayscale = True
+    kernel_size: int = 3
+
+    def __post_init__(self):
+        super().__post_init__()
+        if self.kernel_size < 3 or self.kernel_size % 2 == 0:
+            raise ValueError(f"Rozmiar maski mediany musi być nieparzysty i >= 3, podano {self.kernel_size}")
+
+    def _apply(self, image: np.ndarray) -> np.ndarray:
+        return process_in_bands(image, apply_median_filter, workers=self.workers, kernel_size=self.kernel_size,
+                                border_type=self.border_type, border_value=self.border_value)
+
+
+@dataclass(frozen=True)
+class RankFilter(BorderedStep):
+    name = "apply_rank_filter"
+    requires_grayscale = True
+    kernel_size: int = 3
+    percentile: float = 50.0
+
+    def __post_init__(self):
+        super().__post_init__()
+        if self.kernel_size < 3 or self.kernel_size % 2 == 0:
+            raise ValueError(f"Rozmiar maski musi być nieparzysty i >= 3, podano {self.kernel_size}")
+        _check_range("Percentyl", self.percentile, 0, 100)
+
+    def _apply(self, image: np.ndarray) -> np.ndarray:
+        return process_in_bands(image, apply_rank_filter, workers=self.workers, kernel_size=self.kernel_size,
+                                percentile=self.percentile, border_type=self.border_type,
+                                border_value=self.border_value)
+
+
+@dataclass(frozen=True)
+class GradientMagnitude(Step):
+    """Moduł gradientu Sobela sqrt(Gx^2 + Gy^2), bez ucinania ujemnych pochodnych jak przy masce Sobel X/Y"""
+    name = "apply_gradient_magnitude"
+    requires_grayscale = True
+
+    def _apply(self, image: np.ndarray) -> np.ndarray:
+        return process_in_bands(image, apply_gradient_magnitude)
+
+
+@dataclass(frozen=True)
+class CannyEdgeDetection(Step):
+    name = "apply_canny_edge_detection"
+    requires_grayscale = True
+    threshold1: int = 50
+    threshold2: int = 150
+
+    def __post_init__(self):
+        _check_range("Próg 1", self.threshold1, 0, 255)
+        _check_range("Próg 2", self.threshold2, 0, 255)
+
+        # Jeżeli dolna wartość jest większa to dokonuję zamiany
+        if self.threshold1 > self.threshold2:
+            low, high = self.threshold2, self.threshold1
+            object.__setattr__(self, "threshold1", low)
+            object.__setattr__(self, "threshold2", high)
+
+    def _apply(self, image: np.ndarray) -> np.ndarray:
+        return apply_canny_edge_detection(image, self.threshold1, self.threshold2)
+
+    def apply_with_gradients(self, image: np.ndarray, gradients: Gradients) -> np.ndarray:
+        """Jak apply, ale z pochodnymi policzonymi wcześniej (sobel_gradients) dla tego samego obrazu"""
+        if image.ndim == 3:
+            raise ValueError(f"Operacja {self.name} wymaga obrazu w odcieniach szarości")
+        return apply_canny_edge_detection(image, self.threshold1, self.threshold2, gradients)
+
+
+# Nazwa kroku w JSON: klasa kroku
+STEP_TYPES = {step_class.name: step_class for step_class in (
+    ToGrayscale, LinearStretch, SaturationStretch, HistogramEqualization, Negation, Posterize, BinaryThreshold,
+    KeepGrayThreshold, ScalarOperation, BinaryMask, EightBitMask, LinearFilter, LaplacianSharpening,
+    CompassEdgeDetection, GradientMagnitude, MedianFilter, RankFilter, CannyEdgeDetection,
+)}
+
+
+def step_from_spec(spec: dict) -> Step:
+    """
+    Tworzy krok ze słownika, np. {"step": "apply_median_filter", "kernel_size": 5, "border_type": "BORDER_REFLECT"}
+    Maskę filtra można podać jako macierz liczb albo jako [kategoria, nazwa maski] z KERNELS.
+
+    :param spec: słownik z kluczem "step" (nazwa z STEP_TYPES) i parametrami kroku
+    :return: krok
+    """
+    params = dict(spec)
+    name = params.pop("step", None)
+
+    if name not in STEP_TYPES:
+        raise ValueError(f"Nieznana operacja: {name!r}")
+
+    kernel = params.get("kernel")
+    if isinstance(kernel, (list, tuple)) and len(kernel) == 2 and all(isinstance(k, str) for k in kernel):
+        category, mask_name = kernel
+        if category not in KERNELS or mask_name not in KERNELS[category]:
+            raise ValueError(f"Nie znaleziono maski: {category} / {mask_name}")
+        params["kernel"] = KERNELS[category][mask_name]
+
+    try:
+        return STEP_TYPES[name](**params)
+    except TypeError as e:
+        raise ValueError(f"Niepoprawne parametry operacji {name}: {e}") from e
+
+
+class Pipeline:
+    """
+    Łańcuch kroków wykonywany na tablicach NumPy, bez zależności od PyQt6.
+    Sąsiednie operacje punktowe są składane w jedną tablicę lut.
+    """
+
+    def __init__(self, steps: list[Step] | None = None, coerce_grayscale: bool = False):
+        """
+        :param steps: lista kroków
+        :param coerce_grayscale: jeżeli True, obraz kolorowy jest automatycznie zamieniany na szary przed krokiem,
+            który tego wymaga, zamiast zgłaszać błąd
+        """
+        self.steps = list(steps or [])
+        self.coerce_grayscale = coerce_grayscale
+
+    @classmethod
+    def from_spec(cls, spec: list[dict] | dict, coerce_grayscale: bool = False) -> "Pipeline":
+        """Tworzy łańcuch z listy słowników (lub słownika z kluczem "steps"), np. z pliku JSON"""
+        steps = spec["steps"] if isinstance(spec, dict) else spec
+        steps_objects = []
+        for index, step in enumerate(steps):
+            try:
+                steps_objects.append(step_from_spec(step))
+            except ValueError as e:
+                raise ValueError(f"Krok {index + 1}: {e}") from e
+        return cls(steps_objects, coerce_grayscale)
+
+    def to_spec(self) -> dict:
+        return {"steps": [step.to_spec() for step in self.steps]}
+
+    def then(self, step: Step) -> "Pipeline":
+        """Zwraca nowy łańcuch z dodanym krokiem na końcu"""
+        return Pipeline(self.steps + [step], self.coerce_grayscale)
+
+    def with_workers(self, workers: int) -> "Pipeline":
+        """
+        Zwraca nowy łańcuch, w którym filtry sąsiedztwa (BorderedStep) używają zadanej ilości wątków.
+        Potrzebne w procesach roboczych, gdzie domyślna ilość wątków (wszystkie rdzenie) w każdym procesie
+        dawałaby procesy * rdzenie wątków naraz
+        """
+        steps = [replace(step, workers=workers) if isinstance(step, BorderedStep) else step for step in self.steps]
+        return Pipeline(steps, self.coerce_grayscale)
+
+    def apply(self, image: np.ndarray) -> np.ndarray:
+        pending_point_steps: list[PointStep] = []
+
+        for step in self.steps:
+            if self.coerce_grayscale and step.requires_grayscale and image.ndim == 3:
+                image = self._flush(image, pending_point_steps)
+                image = to_grayscale(image)
+
+            if isinstance(step, PointStep):
+                if step.requires_grayscale and image.ndim == 3:
+                    raise ValueError(f"Operacja {step.name} wymaga obrazu w odcieniach szarości")
+                pending_point_steps.append(step)
+                continue
+
+            image = self._flush(image, pending_point_steps)
+            image = step.apply(image)
+
+        return self._flush(image, pending_point_steps)
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        return self.apply(image)
+
+    @staticmethod
+    def _flush(image: np.ndarray, pending_point_steps: list[PointStep]) -> np.ndarray:
+        """Wykonuje zebrane operacje punktowe jednym przejściem cv2.LUT i czyści listę"""
+        if not pending_point_steps:
+            return image
+
+        operations = [step.point_operation for step in pending_point_steps]
+        pending_point_steps.clear()
+        return apply_point_operations(image, operations)
@@ -0,0 +1,355 @@
+# rank_filter.py
+import cv2
+import numpy as np
+
+# Histogram jest dwupoziomowy: jeden przedział zgrubny obejmuje 2^HISTOGRAM_LEVEL_BITS sąsiednich przedziałów
+# dokładnych, więc wybór jasności spośród 256 przegląda 16 + 16 przedziałów
+HISTOGRAM_LEVEL_BITS = 4
+
+# Ilość przedziałów dokładnych histogramu dwupoziomowego (8 bitów jasności)
+HISTOGRAM_BINS = 256
+
+# Obraz 16-bitowy potrzebuje w każdej kolumnie histogramów 65536 i 4096 przedziałów. Obraz jest dzielony
+# na pionowe pasy, tak aby histogramy kolumn jednego pasa zajmowały najwyżej tyle bajtów
+COLUMN_HISTOGRAMS_MAX_BYTES = 64 * 2 ** 20
+
+# Największa ilość różnych jasności obrazu innego typu niż uint8/uint16 (zamienianych na numery poziomów)
+MAX_LEVELS = 65536
+
+
+def rank_from_percentile(kernel_size: int, percentile: float) -> int:
+    """
+    Numer pozycji (od 0) w posortowanym otoczeniu dla zadanego percentyla
+    0 - minimum, 50 - mediana, 100 - maksimum
+    """
+    if not 0 <= percentile <= 100:
+        raise ValueError(f"Percentyl musi być z zakresu 0-100, podano {percentile}")
+
+    return int(round(percentile / 100 * (kernel_size * kernel_size - 1)))
+
+
+def rank_filter(image: np.ndarray, kernel_size: int, percentile: float = 50.0,
+                border_type: int = cv2.BORDER_REPLICATE, border_value: int = 0) -> np.ndarray:
+    """
+    Filtr statystyczny (rankingowy) dla dowolnej nieparzystej maski kwadratowej i dowolnego percentyla.
+    Działa dla obrazów całkowitych, w tym 16-bitowych, obraz wielokanałowy jest filtrowany kanał po kanale.
+
+    Algorytm Perreault i Hébert (histogram przesuwny o stałym koszcie):
+    1. Każda kolumna obrazu ma histogram jasności z kernel_size wierszy wokół bieżącego wiersza. Po przejściu
+       do następnego wiersza w każdej kolumnie jeden pixel wychodzi, a jeden wchodzi (dwie zmiany na kolumnę)
+    2. Histogram okna to suma kernel_size sąsiednich histogramów kolumn. Przesunięcie okna o kolumnę w prawo
+       dodaje histogram kolumny wchodzącej i odejmuje wychodzącej, dla całego wiersza robi to cv2.boxFilter
+       w poziomie na tablicy (przedziały, kolumny)
+    3. Jasność na pozycji rank jest wybierana zejściem po histogramie dwupoziomowym (_select_bins)
+
+    Koszt na pixel (poza wąskimi pasmami przy krawędziach obrazu):
+    - do 256 poziomów jasności (każdy obraz 8-bitowy): O(ilość poziomów), histogramy 16 + 256 przedziałów
+    - obrazy 16-bitowe: starszy bajt jak wyżej, młodsze bity z leniwych poziomów 4096 i 65536 przedziałów
+      (_rank_filter_16bit), koszt stały dla gładkich obrazów, w najgorszym razie (szum) O(16 * kernel_size)
+    Obramowanie jest obsługiwane przez indeksy (cv2.borderInterpolate), bez powiększonej kopii obrazu.
+
+    :param image: obraz wejściowy (typ całkowity, np. uint8 lub uint16)
+    :param kernel_size: bok maski, nieparzysty
+    :param percentile: 0 - minimum, 50 - mediana, 100 - maksimum
+    :param border_type: typ obramowania OpenCV (BORDER_REPLICATE, BORDER_REFLECT, BORDER_CONSTANT, ...)
+    :param border_value: jasność ramki dla BORDER_CONSTANT
+    :return: obraz po filtracji, ten sam typ co wejściowy
+    """
+    if kernel_size < 1 or kernel_size % 2 == 0:
+        raise ValueError(f"Rozmiar maski musi być nieparzysty, podano {kernel_size}")
+    if not np.issubdtype(image.dtype, np.integer):
+        raise ValueError(f"Filtr rankingowy obsługuje tylko obrazy całkowite, podano {image.dtype}")
+
+    rank = rank_from_percentile(kernel_size, percentile)
+
+    if image.ndim == 3:
+        channels = [rank_filter(np.ascontiguousarray(image[:, :, c]), kernel_size, percentile, border_type,
+                                border_value) for c in range(image.shape[2])]
+        return np.dstack(channels)
+
+    # Wynik może być tylko jedną z jasności obrazu (lub ramki), więc wystarczą poziomy, które występują
+    if image.dtype in (np.uint8, np.uint16):
+        levels = np.flatnonzero(np.bincount(image.ravel(), minlength=256)).astype(image.dtype)
+    else:
+        levels = np.unique(image)
+    if border_type == cv2.BORDER_CONSTANT:
+        levels = np.union1d(levels, np.array([border_value], dtype=image.dtype))
+
+    if len(levels) <= HISTOGRAM_BINS:
+        # Numer poziomu zamiast jasności: histogram ma tyle przedziałów, ile jest poziomów
+        indexes = np.searchsorted(levels, image).astype(np.uint8)
+        border_index = int(np.searchsorted(levels, border_value)) if border_type == cv2.BORDER_CONSTANT else 0
+        return levels[_rank_filter_8bit(indexes, kernel_size, rank, border_type, border_index, len(levels))]
+
+    if image.dtype == np.uint16:
+        return _rank_filter_16bit(image, kernel_size, rank, border_type, border_value)
+
+    if len(levels) > MAX_LEVELS:
+        raise ValueError(f"Filtr rankingowy obsługuje najwyżej {MAX_LEVELS} różnych jasności, "
+                         f"obraz ma {len(levels)}")
+
+    indexes = np.searchsorted(levels, image).astype(np.uint16)
+    border_index = int(np.searchsorted(levels, border_value)) if border_type == cv2.BORDER_CONSTANT else 0
+    return levels[_rank_filter_16bit(indexes, kernel_size, rank, border_type, border_index)]
+
+
+def _border_indexes(length: int, radius: int, border_type: int) -> np.ndarray:
+    """
+    Indeksy w obrazie dla pozycji -radius .. length + radius - 1 obrazu obramowanego (cv2.borderInterpolate).
+    Dla BORDER_CONSTANT pozycje poza obrazem mają indeks -1
+    """
+    return np.array([cv2.borderInterpolate(position, length, border_type)
+                     for position in range(-radius, length + radius)], dtype=np.intp)
+
+
+def _padded_row_reader(image: np.ndarray, radius: int, border_type: int, border_value: int, columns: np.ndarray):
+    """
+    Funkcja zwracająca wybrane kolumny jednego wiersza obrazu obramowanego, bez obramowania całego obrazu
+    :param columns: indeksy kolumn w obrazie (_border_indexes), -1 oznacza ramkę
+    :return: funkcja: numer wiersza obrazu obramowanego (0 - pierwszy wiersz ramki) -> jasności
+    """
+    rows = _border_indexes(image.shape[0], radius, border_type)
+    outside = columns < 0
+    has_outside = bool(outside.any())
+    source_columns = np.where(outside, 0, columns)
+
+    def read_row(padded_row: int) -> np.ndarray:
+        row = rows[padded_row]
+        if row < 0:
+            return np.full(columns.size, border_value, dtype=image.dtype)
+
+        values = image[row, source_columns]
+        if has_outside:
+            values[outside] = border_value
+        return values
+
+    return read_row
+
+
+def _column_count_type(kernel_size: int):
+    """Histogram kolumny liczy najwyżej kernel_size pixel-i"""
+    return np.uint8 if kernel_size <= np.iinfo(np.uint8).max else np.uint16
+
+
+def _window_counts(column_histograms: np.ndarray, kernel_size: int) -> np.ndarray:
+    """
+    Histogramy okien dla kolejnych kolumn: suma kernel_size sąsiednich histogramów kolumn (cv2.boxFilter w poziomie,
+    czyli dodanie kolumny wchodzącej i odjęcie wychodzącej przy każdym przesunięciu)
+    :param column_histograms: tablica (przedziały, kolumny) razem z kolumnami ramki
+    :return: tablica int32 (przedziały, kolumny - 2 * promień)
+    """
+    radius = kernel_size // 2
+    counts = cv2.boxFilter(column_histograms, cv2.CV_32S, (kernel_size, 1), normalize=False,
+                           borderType=cv2.BORDER_CONSTANT)
+    return counts[:, radius:counts.shape[1] - radius]
+
+
+def _select_bins(coarse: np.ndarray, fine: np.ndarray, kernel_size: int, rank: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Zejście po histogramie dwupoziomowym dla wszystkich okien wiersza naraz.
+    1. Suma narastająca histogramu zgrubnego wskazuje przedział zgrubny, w którym leży pozycja rank
+    2. Suma narastająca 16 przedziałów dokładnych wewnątrz niego wskazuje przedział dokładny
+
+    :param coarse: histogramy kolumn zgrubne (przedziały / 16, kolumny)
+    :param fine: histogramy kolumn dokładne (przedziały, kolumny)
+    :return: krotka (numer przedziału dokładnego, ilość pixel-i okna w niższych przedziałach)
+    """
+    coarse_cdf = np.cumsum(_window_counts(coarse, kernel_size), axis=0)
+    columns = np.arange(coarse_cdf.shape[1])
+
+    bucket = np.count_nonzero(coarse_cdf <= rank, axis=0)
+    below = np.where(bucket > 0, coarse_cdf[bucket - 1, columns], 0)
+
+    sub_bins = np.arange(1 << HISTOGRAM_LEVEL_BITS)[:, None]
+    block = _window_counts(fine, kernel_size)[(bucket << HISTOGRAM_LEVEL_BITS) + sub_bins, columns]
+    block_cdf = np.cumsum(block, axis=0)
+
+    sub_bin = np.count_nonzero(block_cdf <= rank - below, axis=0)
+    below += np.where(sub_bin > 0, block_cdf[sub_bin - 1, columns], 0)
+
+    return (bucket << HISTOGRAM_LEVEL_BITS) + sub_bin, below
+
+
+def _rank_filter_8bit(image: np.ndarray, kernel_size: int, rank: int, border_type: int, border_value: int,
+                      levels: int) -> np.ndarray:
+    """
+    Filtr rankingowy dla obrazu o jasnościach 0 .. levels - 1 (levels <= 256).
+    Wiersz po wierszu: aktualizacja histogramów kolumn (dwie zmiany na kolumnę) i wybór jasności dla całego
+    wiersza przez _select_bins. Koszt na pixel O(levels), niezależny od rozmiaru maski.
+
+    :param image: obraz uint8 (jeden kanał)
+    :param levels: ilość poziomów jasności
+    :return: obraz uint8 po filtracji
+    """
+    radius = kernel_size // 2
+    height, width = image.shape
+
+    columns = _border_indexes(width, radius, border_type)
+    read_row = _padded_row_reader(image, radius, border_type, border_value, columns)
+    column_index = np.arange(columns.size)
+
+    # Przedziały dokładne dopełnione do wielokrotności 16, aby każdy przedział zgrubny miał pełny blok
+    coarse_bins = -(-levels >> HISTOGRAM_LEVEL_BITS)
+    count_type = _column_count_type(kernel_size)
+    coarse = np.zeros((coarse_bins, columns.size), dtype=count_type)
+    fine = np.zeros((coarse_bins << HISTOGRAM_LEVEL_BITS, columns.size), dtype=count_type)
+
+    def update_row(padded_row: int, add: bool) -> None:
+        values = read_row(padded_row)
+        # Każda kolumna zmienia dokładnie jeden przedział, więc indeksy się nie powtarzają i wystarczy zwykłe +=
+        if add:
+            coarse[values >> HISTOGRAM_LEVEL_BITS, column_index] += 1
+            fine[values, column_index] += 1
+        else:
+            coarse[values >> HISTOGRAM_LEVEL_BITS, column_index] -= 1
+            fine[values, column_index] -= 1
+
+    result = np.empty((height, width), dtype=np.uint8)
+    for padded_row in range(kernel_size):
+        update_row(padded_row, True)
+
+    for y in range(height):
+        if y > 0:
+            update_row(y - 1, False)
+            update_row(y + kernel_size - 1, True)
+        result[y] = _select_bins(coarse, fine, kernel_size, rank)[0]
+
+    return result
+
+
+def _select_in_blocks(column_histograms: np.ndarray, prefix: np.ndarray, remaining: np.ndarray,
+                      kernel_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Leniwy poziom histogramu (jak poziom dokładny u Perreault i Hébert): dla każdego wyniku wiersza liczony jest
+    histogram okna tylko 16 przedziałów bloku wybranego poziom wyżej (prefix).
+    Wyniki o tym samym bloku leżące blisko siebie tworzą odcinek, dla którego bloki kolumn od pierwszego
+    do ostatniego wyniku (+ 2 * promień) są pobierane raz. Odcinki wszystkich bloków są sklejane w jedną tablicę,
+    a sumy okien daje jedna tablica sum narastających (cv2.integral), okno wyniku nigdy nie wychodzi poza swój
+    odcinek. cv2.integral sumuje też po przedziałach, więc różnica dwóch jej wierszy to od razu dystrybuanta
+    bloku. Koszt na wynik: 16 * (1 + 2 * promień / długość odcinka), czyli stały, gdy sąsiednie wyniki mają
+    ten sam blok, a najwyżej 16 * kernel_size dla wyników odosobnionych (szum, strome zbocza).
+
+    :param column_histograms: histogramy kolumn (kolumny, przedziały), 16 przedziałów bloku leży obok siebie
+    :param prefix: numer bloku dla każdego wyniku wiersza
+    :param remaining: pozycja szukanej jasności wewnątrz bloku (ilość pixel-i okna w bloku poniżej niej)
+    :return: krotka (numer przedziału, pozycja wewnątrz przedziału)
+    """
+    block_bins = 1 << HISTOGRAM_LEVEL_BITS
+    columns, bins = column_histograms.shape
+
+    # Wyniki posortowane po bloku, wewnątrz bloku po kolumnie. Przerwa dłuższa niż maska zaczyna nowy odcinek,
+    # bo policzenie okna od nowa kosztuje mniej niż przesuwanie go przez kolumny bez wyników
+    order = np.argsort(prefix, kind="stable")
+    keys = prefix[order]
+    new_segment = np.ones(order.size, dtype=bool)
+    new_segment[1:] = (keys[1:] != keys[:-1]) | (np.diff(order) > kernel_size)
+    segment = np.cumsum(new_segment) - 1
+
+    starts = np.flatnonzero(new_segment)
+    first = order[starts]
+    last = order[np.append(starts[1:], order.size) - 1]
+    lengths = last - first + kernel_size
+    offsets = np.cumsum(lengths) - lengths
+
+    # Bloki kolumn odcinków ułożone jeden za drugim. Blok jest pobierany jako jeden element (np.void)
+    segment_columns = np.arange(offsets[-1] + lengths[-1]) + np.repeat(first - offsets, lengths)
+    segment_blocks = np.repeat(keys[starts], lengths)
+    block_type = np.dtype((np.void, block_bins * column_histograms.itemsize))
+    flat_blocks = column_histograms.reshape(-1).view(block_type)
+    gathered = np.take(flat_blocks, segment_columns * (bins // block_bins) + segment_blocks)
+    gathered = gathered.view(column_histograms.dtype).reshape(-1, block_bins)
+
+    # cv2.integral liczy sumy uint8 w int32, a uint16 (maski powyżej 255) tylko w float64, dokładnie
+    depth = cv2.CV_32S if gathered.dtype == np.uint8 else cv2.CV_64F
+    sums = cv2.integral(gathered, sdepth=depth)[:, 1:]
+
+    # Okno wyniku zaczyna się w sklejonej tablicy w wierszu window_start
+    window_start = offsets[segment] + order - first[segment]
+    block_cdf = (sums[window_start + kernel_size] - sums[window_start]).astype(np.int64)
+    sorted_remaining = remaining[order]
+
+    sub_bin = np.count_nonzero(block_cdf <= sorted_remaining[:, None], axis=1)
+    below = np.where(sub_bin > 0, block_cdf[np.arange(order.size), sub_bin - 1], 0)
+
+    result_bins = np.empty_like(prefix)
+    result_bins[order] = (keys << HISTOGRAM_LEVEL_BITS) + sub_bin
+    result_remaining = np.empty_like(remaining)
+    result_remaining[order] = sorted_remaining - below
+    return result_bins, result_remaining
+
+
+def _rank_filter_16bit(image: np.ndarray, kernel_size: int, rank: int, border_type: int,
+                       border_value: int) -> np.ndarray:
+    """
+    Filtr rankingowy dla obrazu uint16 z dowolną ilością jasności. Histogram ma cztery poziomy po 4 bity
+    (16, 256, 4096 i 65536 przedziałów na kolumnę):
+    1. Starszy bajt wyniku: poziomy 16 i 256 jak w _rank_filter_8bit, koszt stały O(256) na pixel
+    2. Kolejne 4 bity i najmłodsze 4 bity: poziomy leniwe (_select_in_blocks), każdy przegląda 16 przedziałów
+       bloku wybranego wyżej. Koszt jest stały, gdy sąsiednie wyniki mają te same starsze bity (gładkie obrazy,
+       duże maski), a w najgorszym razie (szum) rośnie do O(16 * kernel_size) na pixel
+
+    Histogramy 65536 przedziałów zajmują 64 KB (uint8) na kolumnę, dlatego obraz jest liczony w pionowych pasach
+    o szerokości wynikającej z COLUMN_HISTOGRAMS_MAX_BYTES.
+
+    :param image: obraz uint16 (jeden kanał)
+    :return: obraz uint16 po filtracji
+    """
+    radius = kernel_size // 2
+    width = image.shape[1]
+    result = np.empty_like(image)
+
+    # Pas musi mieć więcej kolumn niż margines 2 * promień, inaczej nie policzyłby żadnego wyniku
+    count_type = _column_count_type(kernel_size)
+    column_bytes = ((1 << 16) + (1 << 12)) * np.dtype(count_type).itemsize
+    strip_columns = max(COLUMN_HISTOGRAMS_MAX_BYTES // column_bytes, 2 * kernel_size)
+    strip_width = strip_columns - 2 * radius
+
+    all_columns = _border_indexes(width, radius, border_type)
+    for left in range(0, width, strip_width):
+        right = min(left + strip_width, width)
+        _rank_filter_16bit_strip(image, kernel_size, rank, border_type, border_value,
+                                 all_columns[left:right + 2 * radius], result[:, left:right])
+
+    return result
+
+
+def _rank_filter_16bit_strip(image: np.ndarray, kernel_size: int, rank: int, border_type: int, border_value: int,
+                             columns: np.ndarray, out: np.ndarray) -> None:
+    """
+    Jeden pionowy pas _rank_filter_16bit
+    :param columns: indeksy kolumn pasa razem z marginesem (_border_indexes)
+    :param out: widok na kolumny wyniku pasa
+    """
+    count_type = _column_count_type(kernel_size)
+    read_row = _padded_row_reader(image, radius=kernel_size // 2, border_type=border_type,
+                                  border_value=border_value, columns=columns)
+    column_index = np.arange(columns.size)
+
+    # Poziomy od najgrubszego: jasność przesunięta o 12, 8, 4 i 0 bitów. Dwa pierwsze są liczone w całości
+    # (_select_bins, układ przedziały x kolumny), dwa leniwe w układzie kolumny x przedziały (_select_in_blocks)
+    shifts = [16 - level * HISTOGRAM_LEVEL_BITS for level in range(1, 5)]
+    histograms = [np.zeros((1 << (16 - shift), columns.size), dtype=count_type) for shift in shifts[:2]]
+    histograms += [np.zeros((columns.size, 1 << (16 - shift)), dtype=count_type) for shift in shifts[2:]]
+
+    def update_row(padded_row: int, add: bool) -> None:
+        values = read_row(padded_row)
+        for level, (histogram, shift) in enumerate(zip(histograms, shifts)):
+            index = (values >> shift, column_index) if level < 2 else (column_index, values >> shift)
+            if add:
+                histogram[index] += 1
+            else:
+                histogram[index] -= 1
+
+    for padded_row in range(kernel_size):
+        update_row(padded_row, True)
+
+    for y in range(out.shape[0]):
+        if y > 0:
+            update_row(y - 1, False)
+            update_row(y + kernel_size - 1, True)
+
+        value, below = _select_bins(histograms[0], histograms[1], kernel_size, rank)
+        remaining = rank - below
+        for histogram in histograms[2:]:
+            value, remaining = _select_in_blocks(histogram, value, remaining, kernel_size)
+        out[y] = value
@@ -1,8 +1,10 @@
 # single_lut_dialog.py
 import numpy as np
-from PyQt6.QtWidgets import QDialog, QTableWidget, QTableWidgetItem, QVBoxLayout, QLabel, QHeaderView
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QCheckBox
 from PyQt6.QtCore import Qt
 
+from lut_table_model import LutTableView
+
 
 class SingleLutDialog(QDialog):
     def __init__(self, lut_data: np.ndarray, lut_index_label: str, lut_value_label: str, parent=None):
@@ -22,35 +24,13 @@ class SingleLutDialog(QDialog):
         self.title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.title_label.setStyleSheet("font-weight: bold; font-size: 14pt;")
 
-        self.table_widget = QTableWidget()
+        # Tabela czyta wartości bezpośrednio z tablicy numpy, bez tworzenia obiektu dla każdej komórki
+        self.table_widget = LutTableView(self.lut_data, self.lut_index_label, self.lut_value_label, row_height=15)
+
+        # Filtr ukrywający wiersze z zerową wartością
+        self.nonzero_checkbox = QCheckBox("Tylko wartości niezerowe")
+        self.nonzero_checkbox.toggled.connect(self.table_widget.lut_model.set_nonzero_only)
 
         self.main_layout.addWidget(self.title_label)
+        self.main_layout.addWidget(self.nonzero_checkbox)
         self.main_layout.addWidget(self.table_widget)
-
-        self.fill_table()
-
-    def fill_table(self):
-        # Odczytanie ilości indeksów
-        lut_index_count = len(self.lut_data)
-
-        # Zdefiniowanie wielkości tabeli
-        self.table_widget.setRowCount(lut_index_count)
-        self.table_widget.setColumnCount(2)
-
-        # Ustawienie nagłówków kolumn
-        self.table_widget.setHorizontalHeaderLabels([self.lut_index_label, self.lut_value_label])
-
-        self.table_widget.verticalHeader().setDefaultSectionSize(15)
-
-        # Wypełnienie komórek
-        for i in range(lut_index_count):
-            # Kolumna z indexem tabeli lut
-            item_index = QTableWidgetItem(str(i))
-            item_index.setFlags(Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled)
-            self.table_widget.setItem(i, 0, item_index)
-
-            value = int(self.lut_data[i])
-            item_value = QTableWidgetItem(str(value))
-            self.table_widget.setItem(i, 1, item_value)
-
-        self.table_widget.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
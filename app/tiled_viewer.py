@@ -0,0 +1,216 @@
+# tiled_viewer.py
+import math
+from collections import OrderedDict
+
+from PyQt6.QtCore import QPointF, QRectF, Qt
+from PyQt6.QtGui import QColor, QMouseEvent, QPainter, QPaintEvent, QPixmap, QResizeEvent, QWheelEvent
+from PyQt6.QtWidgets import QSizePolicy, QWidget
+
+from utils import convert_cv_to_pixmap
+from view_renderer import ImagePyramid
+
+# Bok kafelka w pixel-ach poziomu piramidy
+TILE_SIZE = 256
+
+# Ile ekranów kafelków jest pamiętanych (przewijanie w tę i z powrotem nie konwertuje kafelków ponownie)
+TILE_CACHE_SCREENS = 4
+
+# Obrazy większe od tej ilości pixel-i otwierają się od razu w widoku kafelkowym, bez pixmap-y całego obrazu
+LARGE_IMAGE_PIXELS = 50_000_000
+
+# Zakres powiększenia (pixel-e ekranu na pixel obrazu)
+MIN_ZOOM = 1 / 1024
+MAX_ZOOM = 64.0
+
+# Zmiana powiększenia na jeden ząbek kółka myszy (120 jednostek angleDelta)
+ZOOM_STEP = 1.25
+
+
+class TiledImageView(QWidget):
+    """
+    Widok obrazu z powiększaniem (kółko myszy) i przesuwaniem (przeciąganie), rysujący tylko widoczne kafelki.
+
+    Algorytm rysowania:
+    1. Dla aktualnego powiększenia wybierany jest poziom piramidy (ImagePyramid), który ma co najmniej
+       jeden pixel na pixel ekranu, więc kafelki są skalowane najwyżej 2x
+    2. Z poziomu są wybierane tylko kafelki TILE_SIZE x TILE_SIZE przecinające się z ekranem
+    3. Kafelek jest konwertowany do QPixmap z widoku tablicy numpy (bez kopii całego obrazu) i pamiętany w LRU
+
+    Pamięć zależy od rozmiaru okna (ilość pamiętanych kafelków), a nie od rozmiaru obrazu.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+
+        self._pyramid: ImagePyramid | None = None
+        self._version = None
+
+        # Powiększenie i punkt obrazu (współrzędne pełnej rozdzielczości) w środku widoku
+        self.zoom = 1.0
+        self._center = QPointF(0, 0)
+
+        # Po dopasowaniu do okna kolejne zmiany rozmiaru okna też dopasowują, aż użytkownik powiększy lub przesunie
+        self._keep_fit = False
+
+        self._tiles: OrderedDict[tuple[int, int, int], QPixmap] = OrderedDict()
+        self._drag_position: QPointF | None = None
+
+    def set_pyramid(self, pyramid: ImagePyramid, version, fit: bool = False) -> None:
+        """
+        Ustawia obraz do wyświetlenia
+        :param pyramid: piramida obrazu
+        :param version: wersja obrazu, kafelki innej wersji są usuwane
+        :param fit: dopasowanie całego obrazu do widoku, w przeciwnym razie powiększenie i położenie zostają
+        """
+        if version == self._version and pyramid is self._pyramid:
+            return
+
+        previous_shape = self._pyramid.image.shape[:2] if self._pyramid is not None else None
+        self._pyramid = pyramid
+        self._version = version
+        self._tiles.clear()
+
+        if fit:
+            self.fit_to_view()
+        elif previous_shape != pyramid.image.shape[:2]:
+            # Obraz o innym rozmiarze pokazywany od środka, w rozmiarze oryginalnym
+            height, width = pyramid.image.shape[:2]
+            self.zoom = 1.0
+            self._center = QPointF(width / 2, height / 2)
+
+        self.update()
+
+    def fit_to_view(self) -> None:
+        """Powiększenie, przy którym cały obraz mieści się w widoku"""
+        if self._pyramid is None:
+            return
+
+        self._keep_fit = True
+        height, width = self._pyramid.image.shape[:2]
+        self.zoom = min(max(self.width(), 1) / width, max(self.height(), 1) / height, 1.0)
+        self._center = QPointF(width / 2, height / 2)
+        self.update()
+
+    def set_zoom(self, zoom: float, anchor: QPointF | None = None) -> None:
+        """
+        Zmienia powiększenie, punkt obrazu pod anchor (współrzędne widżetu) zostaje w tym samym miejscu ekranu
+        :param zoom: pixel-e ekranu na pixel obrazu
+        :param anchor: punkt widżetu, domyślnie środek
+        """
+        self._keep_fit = False
+        zoom = min(max(zoom, MIN_ZOOM), MAX_ZOOM)
+        if anchor is None:
+            self.zoom = zoom
+            self.update()
+            return
+
+        image_point = self.widget_to_image(anchor)
+        self.zoom = zoom
+        center_offset = anchor - QPointF(self.width() / 2, self.height() / 2)
+        self._center = image_point - center_offset / zoom
+        self.update()
+
+    def widget_to_image(self, point: QPointF) -> QPointF:
+        """Współrzędne pixel-a obrazu (pełna rozdzielczość) dla punktu widżetu"""
+        return self._center + (point - QPointF(self.width() / 2, self.height() / 2)) / self.zoom
+
+    def _tile(self, level: int, row: int, column: int) -> QPixmap:
+        key = (level, row, column)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+
+        # Kafelek to widok na poziom piramidy, kopiowany jest tylko do QPixmap
+        image = self._pyramid.level(level)
+        tile = convert_cv_to_pixmap(image[row * TILE_SIZE:(row + 1) * TILE_SIZE,
+                                          column * TILE_SIZE:(column + 1) * TILE_SIZE])
+        self._tiles[key] = tile
+
+        # Limit pamięci zależny od ilości kafelków na ekranie
+        visible = (math.ceil(self.width() / TILE_SIZE) + 1) * (math.ceil(self.height() / TILE_SIZE) + 1)
+        while len(self._tiles) > TILE_CACHE_SCREENS * visible:
+            self._tiles.popitem(last=False)
+
+        return tile
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(64, 64, 64))
+
+        if self._pyramid is None:
+            painter.end()
+            return
+
+        # Powiększenie pixel-i pokazuje je jako kwadraty, pomniejszenie z poziomu piramidy jest wygładzane
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, self.zoom < 1)
+
+        full_height, full_width = self._pyramid.image.shape[:2]
+        level = self._pyramid.level_for_scale(self.zoom)
+        level_image = self._pyramid.level(level)
+        level_height, level_width = level_image.shape[:2]
+
+        # Skala poziomu względem pełnej rozdzielczości (dla nieparzystych rozmiarów nie jest dokładnie 1 / 2^level)
+        scale_x, scale_y = level_width / full_width, level_height / full_height
+
+        # Widoczny fragment obrazu w pixel-ach poziomu
+        top_left = self.widget_to_image(QPointF(0, 0))
+        bottom_right = self.widget_to_image(QPointF(self.width(), self.height()))
+        first_column = max(int(top_left.x() * scale_x) // TILE_SIZE, 0)
+        first_row = max(int(top_left.y() * scale_y) // TILE_SIZE, 0)
+        last_column = min(int(math.ceil(bottom_right.x() * scale_x)) // TILE_SIZE, (level_width - 1) // TILE_SIZE)
+        last_row = min(int(math.ceil(bottom_right.y() * scale_y)) // TILE_SIZE, (level_height - 1) // TILE_SIZE)
+
+        origin = QPointF(self.width() / 2, self.height() / 2) - self._center * self.zoom
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                tile = self._tile(level, row, column)
+
+                # Położenie kafelka na ekranie, liczone z krawędzi w pełnej rozdzielczości, więc kafelki się stykają
+                left = origin.x() + column * TILE_SIZE / scale_x * self.zoom
+                top = origin.y() + row * TILE_SIZE / scale_y * self.zoom
+                right = origin.x() + (column * TILE_SIZE + tile.width()) / scale_x * self.zoom
+                bottom = origin.y() + (row * TILE_SIZE + tile.height()) / scale_y * self.zoom
+
+                painter.drawPixmap(QRectF(left, top, right - left, bottom - top), tile,
+                                   QRectF(0, 0, tile.width(), tile.height()))
+
+        painter.end()
+
+    def resizeEvent(self, event: QResizeEvent) -> None:
+        super().resizeEvent(event)
+        if self._keep_fit:
+            self.fit_to_view()
+        self.update()
+
+    def wheelEvent(self, event: QWheelEvent) -> None:
+        # Płynne powiększanie: także ułamkowe ząbki (touchpad) zmieniają powiększenie proporcjonalnie
+        steps = event.angleDelta().y() / 120
+        if steps:
+            self.set_zoom(self.zoom * ZOOM_STEP ** steps, event.position())
+        event.accept()
+
+    def mousePressEvent(self, event: QMouseEvent) -> None:
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._drag_position = event.position()
+            self.setCursor(Qt.CursorShape.ClosedHandCursor)
+
+    def mouseMoveEvent(self, event: QMouseEvent) -> None:
+        if self._drag_position is not None:
+            self._keep_fit = False
+            self._center -= (event.position() - self._drag_position) / self.zoom
+            self._drag_position = event.position()
+            self.update()
+
+    def mouseReleaseEvent(self, event: QMouseEvent) -> None:
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._drag_position = None
+            self.unsetCursor()
+
+    def mouseDoubleClickEvent(self, event: QMouseEvent) -> None:
+        # Podwójne kliknięcie przełącza pomiędzy dopasowaniem do okna a rozmiarem oryginalnym
+        if self.zoom == 1.0:
+            self.fit_to_view()
+        else:
+            self.set_zoom(1.0, event.position())
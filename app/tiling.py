@@ -0,0 +1,210 @@
+# tiling.py
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, NamedTuple
+
+import cv2
+import numpy as np
+
+from algorithms import apply_linear_filter, apply_laplacian_sharpening, apply_median_filter, \
+    apply_rank_filter, apply_compass_edge_detection, apply_gradient_magnitude, apply_canny_edge_detection
+
+# Domyślny bok kafelka w pixel-ach. Kafelek 1024x1024 RGB to 3 MB, więc nawet kilka kopii roboczych
+# operacji mieści się w pamięci podręcznej i nie zależy od rozmiaru obrazu
+DEFAULT_TILE_SIZE = 1024
+
+# Domyślna ilość wątków dla process_in_bands
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Ilość pasm przypadających na jeden wątek oraz minimalna wysokość pasma
+BANDS_PER_WORKER = 4
+MIN_BAND_HEIGHT = 64
+
+# Margines dla metody Canny'ego. Gradient i tłumienie niemaksymalne potrzebują kilku pixel-i, ale progowanie
+# z histerezą jest globalne: słaba krawędź zostaje, jeżeli łączy się z silną na dowolną odległość, także przez
+# sąsiedni kafelek. Żaden skończony margines tego nie gwarantuje, więc Canny po kafelkach jest przybliżeniem
+# (różnice to pojedyncze słabe krawędzie przy szwach), a ten margines jedynie zmniejsza ich ilość
+CANNY_HALO = 16
+
+
+class Tile(NamedTuple):
+    """
+    Opis jednego kafelka
+    source - wycinek obrazu wejściowego razem z marginesem (halo)
+    target - wycinek obrazu wynikowego, który kafelek uzupełnia
+    inner - położenie target wewnątrz source, czyli to, co zostaje po odcięciu marginesu
+    """
+    source: tuple[slice, slice]
+    target: tuple[slice, slice]
+    inner: tuple[slice, slice]
+
+
+def iter_tiles(height: int, width: int, tile_height: int, tile_width: int, halo: int) -> Iterator[Tile]:
+    """
+    Dzieli obraz na kafelki z marginesem. Margines jest przycinany do granic obrazu, dzięki czemu na krawędziach
+    obrazu operacja sama stosuje swoje obramowanie, a wewnątrz widzi prawdziwych sąsiadów z kafelków obok.
+
+    :param height: wysokość obrazu
+    :param width: szerokość obrazu
+    :param tile_height: wysokość kafelka (bez marginesu)
+    :param tile_width: szerokość kafelka (bez marginesu)
+    :param halo: szerokość marginesu, co najmniej promień maski operacji
+    :return: generator kafelków
+    """
+    for top in range(0, height, tile_height):
+        bottom = min(top + tile_height, height)
+        source_top = max(top - halo, 0)
+        source_bottom = min(bottom + halo, height)
+
+        for left in range(0, width, tile_width):
+            right = min(left + tile_width, width)
+            source_left = max(left - halo, 0)
+            source_right = min(right + halo, width)
+
+            yield Tile(
+                source=(slice(source_top, source_bottom), slice(source_left, source_right)),
+                target=(slice(top, bottom), slice(left, right)),
+                inner=(slice(top - source_top, bottom - source_top), slice(left - source_left, right - source_left)),
+            )
+
+
+def neighbourhood_halo(operation: Callable, **params) -> int:
+    """
+    Szerokość marginesu potrzebna operacji, aby wynik kafelkowy był taki sam jak dla całego obrazu.
+    Wyjątkiem jest apply_canny_edge_detection, dla której wynik kafelkowy jest tylko przybliżeniem (CANNY_HALO)
+    :param operation: funkcja z algorithms.py
+    :param params: parametry operacji
+    :return: szerokość marginesu w pixel-ach
+    """
+    if operation in (apply_linear_filter, apply_laplacian_sharpening):
+        kernel = params["kernel"]
+        return max(kernel.shape[0] // 2, kernel.shape[1] // 2)
+
+    if operation is apply_compass_edge_detection:
+        return max(max(kernel.shape[0] // 2, kernel.shape[1] // 2) for kernel in params["kernels"])
+
+    if operation in (apply_median_filter, apply_rank_filter):
+        return params["kernel_size"] // 2
+
+    # Operator Sobela 3x3
+    if operation is apply_gradient_magnitude:
+        return 1
+
+    if operation is apply_canny_edge_detection:
+        return CANNY_HALO
+
+    # Operacje punktowe nie potrzebują sąsiadów
+    return 0
+
+
+def process_in_tiles(image: np.ndarray, operation: Callable, tile_size: int = DEFAULT_TILE_SIZE,
+                     halo: int | None = None, out: np.ndarray | None = None, workers: int = 1,
+                     **params) -> np.ndarray:
+    """
+    Wykonuje operację kafelek po kafelku i zapisuje wynik do jednego obrazu wynikowego.
+
+    Obraz wejściowy może być np.memmap - wtedy w pamięci jest tylko aktualnie przetwarzany kafelek. Obraz wynikowy
+    (out) również może być np.memmap, dzięki czemu zużycie pamięci zależy od rozmiaru kafelka, a nie obrazu.
+
+    Algorytm:
+    1. Podział obrazu na kafelki z marginesem równym promieniowi maski (neighbourhood_halo)
+    2. Operacja wykonywana na kafelku razem z marginesem
+    3. Odcięcie marginesu i zapis środka kafelka w odpowiednie miejsce obrazu wynikowego
+
+    Wynik jest identyczny jak dla całego obrazu dla filtrów liniowych, rankingowych, kompasowych i gradientu.
+    Dla metody Canny'ego histereza nie widzi krawędzi spoza marginesu, więc wynik jest przybliżony (CANNY_HALO).
+
+    :param image: obraz wejściowy (np.ndarray lub np.memmap)
+    :param operation: funkcja z algorithms.py przyjmująca obraz jako pierwszy argument, np. apply_median_filter
+    :param tile_size: bok kafelka w pixel-ach
+    :param halo: szerokość marginesu, domyślnie wyliczana przez neighbourhood_halo
+    :param out: opcjonalny obraz wynikowy (np. np.memmap), musi mieć ten sam wymiar co wynik operacji
+    :param workers: ilość wątków przetwarzających kafelki naraz
+    :param params: parametry operacji, np. kernel=..., border_type=..., border_value=...
+    :return: obraz wynikowy
+    """
+    if halo is None:
+        halo = neighbourhood_halo(operation, **params)
+
+    if tile_size <= 0:
+        raise ValueError(f"Rozmiar kafelka musi być dodatni, podano {tile_size}")
+
+    height, width = image.shape[:2]
+    tiles = iter_tiles(height, width, tile_size, tile_size, halo)
+
+    return _run_tiles(image, operation, tiles, out, workers, params)
+
+
+def process_in_bands(image: np.ndarray, operation: Callable, workers: int | None = None,
+                     halo: int | None = None, out: np.ndarray | None = None, **params) -> np.ndarray:
+    """
+    Wykonuje operację równolegle na poziomych pasmach obrazu.
+
+    OpenCV zwalnia GIL podczas filtrowania, więc pasma liczone w wątkach faktycznie działają na wielu rdzeniach.
+    Na czas liczenia pasm w puli OpenCV działa jednowątkowo (_run_tiles), aby workers wątków pasm nie uruchamiało
+    jeszcze po cv2.getNumThreads() własnych wątków OpenCV na tych samych rdzeniach.
+    Każde pasmo ma margines (halo) z wierszy sąsiednich pasm, a wyniki są zapisywane w jeden, wcześniej
+    zaalokowany obraz wynikowy, bez sklejania kopii.
+
+    :param image: obraz wejściowy
+    :param operation: funkcja z algorithms.py, np. apply_linear_filter
+    :param workers: ilość wątków, domyślnie DEFAULT_WORKERS. Mniejsza wartość zostawia rdzenie innym procesom
+    :param halo: szerokość marginesu, domyślnie wyliczana przez neighbourhood_halo
+    :param out: opcjonalny obraz wynikowy
+    :param params: parametry operacji
+    :return: obraz wynikowy
+    """
+    if workers is None:
+        workers = DEFAULT_WORKERS
+    workers = max(1, workers)
+
+    if halo is None:
+        halo = neighbourhood_halo(operation, **params)
+
+    height, width = image.shape[:2]
+
+    # Kilka pasm na wątek wyrównuje obciążenie, ale pasmo nie może być zbyt niskie względem marginesu
+    band_height = max(MIN_BAND_HEIGHT, 2 * halo, -(-height // (workers * BANDS_PER_WORKER)))
+    bands = iter_tiles(height, width, band_height, max(width, 1), halo)
+
+    return _run_tiles(image, operation, bands, out, workers, params)
+
+
+def _run_tiles(image: np.ndarray, operation: Callable, tiles: Iterator[Tile], out: np.ndarray | None,
+               workers: int, params: dict) -> np.ndarray:
+    """
+    Wspólna pętla dla kafelków i pasm. Pierwszy kafelek jest liczony od razu, bo dopiero jego wynik mówi, jaki typ
+    i ilość kanałów ma mieć obraz wynikowy. Pozostałe kafelki trafiają do puli wątków.
+    """
+    height, width = image.shape[:2]
+
+    def process_tile(tile: Tile) -> None:
+        # Dla np.memmap dopiero tutaj dane kafelka są czytane z dysku
+        tile_result = operation(np.ascontiguousarray(image[tile.source]), **params)
+        out[tile.target] = tile_result[tile.inner]
+
+    first_tile = next(tiles, None)
+    if first_tile is None:
+        return image.copy() if out is None else out
+
+    first_result = operation(np.ascontiguousarray(image[first_tile.source]), **params)
+    if out is None:
+        out = np.empty((height, width) + first_result.shape[2:], dtype=first_result.dtype)
+    out[first_tile.target] = first_result[first_tile.inner]
+
+    if workers > 1:
+        # Równoległość dają wątki puli, więc OpenCV wewnątrz kafelka liczy jednym wątkiem. Ustawienie jest globalne
+        # dla procesu, dlatego poprzednia wartość jest przywracana po zakończeniu puli
+        opencv_threads = cv2.getNumThreads()
+        cv2.setNumThreads(1)
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # list() wymusza zakończenie wszystkich zadań i przekazuje ewentualny wyjątek dalej
+                list(executor.map(process_tile, tiles))
+        finally:
+            cv2.setNumThreads(opencv_threads)
+    else:
+        for tile in tiles:
+            process_tile(tile)
+
+    return out
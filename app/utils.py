@@ -1,69 +1,74 @@
 # utils.py
-import cv2
 import numpy as np
+from PyQt6 import sip
 from PyQt6.QtGui import QImage, QPixmap
 
+# smart_image_read został przeniesiony do image_io (bez zależności od PyQt6), import zostaje dla zgodności
+from image_io import smart_image_read  # noqa: F401
 
-def smart_image_read(file_path):
-    """
-    Wczytuje obraz i automatycznie decyduje, czy zwrócić go jako obraz kolorowy (BGR) czy szaroodcieniowy (Grayscale)
-    """
-    img = cv2.imread(file_path)
 
-    if img is None:
-        return None
+# Formaty QImage odpowiadające układowi pixel-i w tablicy numpy (typ, ilość kanałów), bez konwersji kolorów
+QIMAGE_FORMATS = {
+    (np.dtype(np.uint8), 1): QImage.Format.Format_Grayscale8,
+    (np.dtype(np.uint16), 1): QImage.Format.Format_Grayscale16,
+    (np.dtype(np.uint8), 3): QImage.Format.Format_BGR888,
+}
 
-    if len(img.shape) == 3 and img.shape[2] == 3:
-        b, g, r = cv2.split(img)
 
-        if np.array_equal(b, g) and np.array_equal(g, r):
-            return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+def convert_cv_to_qimage(cv_img: np.ndarray) -> QImage | None:
+    """
+    Opakowuje tablicę numpy w QImage bez kopiowania pixel-i.
+    Obraz BGR z OpenCV jest pokazywany bezpośrednio jako Format_BGR888, więc nie jest potrzebna
+    konwersja cv2.cvtColor(BGR -> RGB) i kopia obrazu przy każdym odświeżeniu widoku.
 
-    return img
+    Widoki (np. wycinek ROI) są opakowywane z krokiem wiersza tablicy (strides[0]). Kopia jest robiona tylko,
+    gdy pixel-e w wierszu nie leżą obok siebie lub wiersze idą w odwrotnej kolejności (np. obraz BMP
+    zmapowany z pliku), bo tego QImage nie potrafi opisać.
 
+    QImage nie jest właścicielem pamięci, więc tablica jest zapamiętana w obiekcie QImage (atrybut _buffer)
+    i żyje tak długo jak on.
 
-def convert_cv_to_pixmap(cv_img):
-    """
-    Konwertuje obraz z formatu OpenCV (BGR/Grayscale) na QPixmap dla PyQt6 (RGB).
+    :param cv_img: obraz szary (uint8, uint16) lub BGR (uint8)
+    :return: QImage współdzielący pamięć z tablicą lub None dla braku obrazu
     """
     if cv_img is None:
         return None
 
+    channels = 1 if cv_img.ndim == 2 else cv_img.shape[2]
+    image_format = QIMAGE_FORMATS.get((cv_img.dtype, channels))
+    if image_format is None:
+        raise ValueError(f"Nieobsługiwany format obrazu do wyświetlenia: {cv_img.dtype}, kanały: {channels}")
+
+    # Pixel-e wiersza muszą leżeć w pamięci jeden za drugim, a kolejne wiersze w kolejności rosnących adresów
+    pixel_bytes = cv_img.itemsize * channels
+    row_is_packed = cv_img.strides[1] == pixel_bytes and (cv_img.ndim == 2 or cv_img.strides[2] == cv_img.itemsize)
+    if not row_is_packed or cv_img.strides[0] < cv_img.shape[1] * pixel_bytes:
+        cv_img = np.ascontiguousarray(cv_img)
+
     # Wyjmuje wysokość i szerokość z obrazu tablicy NumPy obrazu, indeks 0 i 1
     height, width = cv_img.shape[:2]
 
-    # Obsługa obrazów kolorowych (3 kanały)
-    if len(cv_img.shape) == 3:
-        # Potrzebne do utworzenia obiektu QImage (do dobrego umiejscowienia obrazu w pamięci)
-        # 3 x width, bo każdy piksel kolorowy zajmuje 3 bajty w pamięci
-        bytes_per_line = 3 * width
-
-        # Konwersja obrazu z NumPy BGR do RGB
-        rgb_img_for_pyqt6 = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
-
-        # Utworzenie obiektu PyQt image
-        q_img = QImage(
-            rgb_img_for_pyqt6.data,      # dane pixel-i, czyli bezpośrednio tablicę NumPy zawierającą ciąg kolorów
-            width,
-            height,
-            bytes_per_line,              # Definiuje w pamięci rozpoczęcie każdego następnego wiersza
-            QImage.Format.Format_RGB888  # informacja o tym, że obraz jest 24-bitowy, po 8 bitów na kolor
-        )
-
-    # Obsługa obrazów w odcieniach szarości (1 kanał)
-    else:
-        # Podobnie jak wyżej tylko tutaj mamy 1 kanał na piksel,
-        # więc szerokość obrazu określa od razu potrzebną długość bitów
-        bytes_per_line = width
-
-        # Utworzenie obiektu QImage
-        q_img = QImage(
-            cv_img.data,
-            width,
-            height,
-            bytes_per_line,                  # Definiuje w pamięci rozpoczęcie każdego następnego wiersza
-            QImage.Format.Format_Grayscale8  # Informacja o tym, w jakim formacie ma być obraz
-        )
+    q_img = QImage(
+        sip.voidptr(cv_img.ctypes.data),  # adres pierwszego pixel-a, także dla widoku wewnątrz większej tablicy
+        width,
+        height,
+        cv_img.strides[0],                # Definiuje w pamięci rozpoczęcie każdego następnego wiersza
+        image_format
+    )
+
+    # Referencja do tablicy, aby garbage collector nie zwolnił pamięci używanej przez QImage
+    q_img._buffer = cv_img
+    return q_img
+
+
+def convert_cv_to_pixmap(cv_img):
+    """
+    Konwertuje obraz z formatu OpenCV (BGR/Grayscale) na QPixmap dla PyQt6.
+    QImage jest tylko widokiem na tablicę numpy (convert_cv_to_qimage), jedyną kopią jest sama pixmap-a.
+    """
+    q_img = convert_cv_to_qimage(cv_img)
+    if q_img is None:
+        return None
 
     # Konwertuję na QPixmap, aby to wyświetlić w PyQt widget-cie i zwracam z funkcji
     return QPixmap.fromImage(q_img)
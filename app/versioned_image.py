@@ -0,0 +1,143 @@
+# versioned_image.py
+from typing import Any, Callable
+
+import numpy as np
+
+from algorithms import generate_lut_histogram, histogram_channels, otsu_threshold
+from histogram_statistics import HistogramStatistics, histogram_percentile, histogram_statistics
+
+
+class VersionedImage:
+    """
+    Obraz z numerem wersji i pamięcią podręczną wyników, które zależą tylko od pixel-i (histogram, min/max,
+    percentyle, dystrybuanta, pochodne).
+
+    Obraz jest traktowany jako niezmienny: każda operacja podstawia nowy obraz (replace), co zwiększa wersję
+    i usuwa zapamiętane wyniki. Dzięki temu histogram jest liczony raz na wersję obrazu, a nie przy każdym
+    otwarciu okna histogramu, rozciąganiu czy progowaniu.
+
+    Wyjątkiem jest zmiana fragmentu obrazu (update_region): histogram jest wtedy poprawiany tylko o różnicę
+    histogramów fragmentu przed i po zmianie, czyli w czasie zależnym od rozmiaru fragmentu, a nie obrazu.
+
+    Obserwatorzy (subscribe) są powiadamiani o każdej zmianie, np. otwarte okno histogramu odświeża się samo.
+    """
+
+    def __init__(self, image: np.ndarray):
+        self._image = image
+        self.version = 0
+        self._cache: dict[str, Any] = {}
+        self._listeners: list[Callable[["VersionedImage", tuple[slice, slice] | None], None]] = []
+
+    @property
+    def image(self) -> np.ndarray:
+        return self._image
+
+    def replace(self, image: np.ndarray) -> None:
+        """Podstawia nowy obraz, zwiększa wersję i unieważnia zapamiętane wyniki"""
+        self._image = image
+        self.version += 1
+        self._cache.clear()
+        self._notify(None)
+
+    def update_region(self, region: tuple[slice, slice], pixels: np.ndarray) -> None:
+        """
+        Zmienia fragment obrazu w miejscu i aktualizuje zapamiętany histogram w czasie O(fragment):
+        histogram += histogram(fragment po zmianie) - histogram(fragment przed zmianą)
+        Pozostałe zapamiętane wyniki są unieważniane (min/max, dystrybuanta itd. liczą się z histogramu w O(256)).
+
+        :param region: (wiersze, kolumny) jako wycinki, np. np.s_[10:50, 20:80]
+        :param pixels: nowe pixel-e fragmentu, ten sam wymiar i typ co fragment
+        """
+        if pixels.shape != self._image[region].shape:
+            raise ValueError(f"Niezgodność rozmiarów! Fragment ma wymiar {self._image[region].shape}, "
+                             f"przekazano {pixels.shape}")
+
+        # Obraz tylko do odczytu (np. np.memmap) jest kopiowany przy pierwszej zmianie
+        if not self._image.flags.writeable:
+            self._image = self._image.copy()
+
+        if "histogram" in self._cache:
+            histograms = self.histograms()
+            before = histogram_channels(self._image[region])
+            after = histogram_channels(pixels)
+            for histogram, old_counts, new_counts in zip(histograms, before, after):
+                # Tablice są wspólne dla "histogram" i "histograms", więc oba wpisy zostają aktualne
+                histogram += new_counts
+                histogram -= old_counts
+
+        self._image[region] = pixels
+        self.version += 1
+
+        kept = {key: self._cache[key] for key in ("histogram", "histograms") if key in self._cache}
+        self._cache.clear()
+        self._cache.update(kept)
+
+        self._notify(region)
+
+    def subscribe(self, listener: Callable[["VersionedImage", tuple[slice, slice] | None], None]) -> None:
+        """
+        Dodaje obserwatora wywoływanego po każdej zmianie obrazu
+        :param listener: funkcja (obraz, zmieniony fragment albo None dla całego obrazu)
+        """
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[["VersionedImage", tuple[slice, slice] | None], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, region: tuple[slice, slice] | None) -> None:
+        # Kopia listy, bo obserwator może się wyrejestrować w trakcie powiadamiania
+        for listener in list(self._listeners):
+            listener(self, region)
+
+    def cached(self, key: str, compute: Callable[[np.ndarray], Any]) -> Any:
+        """
+        Zwraca zapamiętany wynik dla aktualnej wersji obrazu albo liczy go funkcją compute(obraz)
+        :param key: nazwa wyniku
+        :param compute: funkcja licząca wynik z obrazu
+        """
+        if key not in self._cache:
+            self._cache[key] = compute(self._image)
+        return self._cache[key]
+
+    def histogram(self) -> np.ndarray | dict[str, np.ndarray]:
+        """Histogram w formacie generate_lut_histogram: tablica dla szarego, słownik blue/green/red dla BGR"""
+        return self.cached("histogram", generate_lut_histogram)
+
+    def histograms(self) -> list[np.ndarray]:
+        """Histogram każdego kanału (lista tablic (256,)), bez ponownego liczenia z pixel-i"""
+        def compute(_):
+            histogram = self.histogram()
+            if isinstance(histogram, dict):
+                return [histogram['blue'], histogram['green'], histogram['red']]
+            return [histogram]
+
+        return self.cached("histograms", compute)
+
+    def min_max(self) -> list[tuple[int, int]]:
+        """Najmniejsza i największa jasność każdego kanału, odczytana z histogramu"""
+        def compute(_):
+            result = []
+            for histogram in self.histograms():
+                nonzero = np.flatnonzero(histogram)
+                result.append((int(nonzero[0]), int(nonzero[-1])) if nonzero.size else (0, 0))
+            return result
+
+        return self.cached("min_max", compute)
+
+    def cdf(self) -> list[np.ndarray]:
+        """Dystrybuanta (suma narastająca histogramu) każdego kanału"""
+        return self.cached("cdf", lambda _: [np.cumsum(histogram, dtype=np.int64) for histogram in self.histograms()])
+
+    def otsu_threshold(self) -> int:
+        """Próg Otsu dla pierwszego kanału (dla obrazu szarego jedynego), liczony z histogramu"""
+        return self.cached("otsu_threshold", lambda _: otsu_threshold(self.histograms()[0]))
+
+    def percentile(self, percent: float) -> list[float]:
+        """Percentyl jasności każdego kanału, liczony z histogramu"""
+        return self.cached(f"percentile_{percent}",
+                           lambda _: [histogram_percentile(histogram, percent) for histogram in self.histograms()])
+
+    def statistics(self) -> list[HistogramStatistics]:
+        """Średnia, odchylenie, mediana, dominanta, entropia itd. każdego kanału, liczone z histogramu"""
+        return self.cached("statistics", lambda _: [histogram_statistics(histogram) for histogram in self.histograms()])
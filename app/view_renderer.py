@@ -0,0 +1,100 @@
+# view_renderer.py
+import cv2
+import numpy as np
+from PyQt6.QtCore import QSize, Qt
+from PyQt6.QtGui import QPixmap
+
+from utils import convert_cv_to_pixmap
+
+# Najmniejszy bok poziomu piramidy, mniejszych poziomów nie ma sensu trzymać
+PYRAMID_MIN_SIDE = 64
+
+# Czas (ms) bez kolejnej zmiany rozmiaru okna, po którym podgląd jest zastępowany wygładzonym obrazem
+RESIZE_SETTLE_MS = 150
+
+
+class ImagePyramid:
+    """
+    Piramida obrazu: poziom 0 to pełna rozdzielczość, każdy kolejny jest 2x mniejszy (uśrednianie cv2.INTER_AREA).
+    Poziomy są liczone leniwie przy pierwszym użyciu i pamiętane, razem zajmują ok. 1/3 pamięci obrazu.
+    Jedna piramida jest wspólna dla widoku dopasowanego do okna (PyramidRenderer) i widoku kafelkowego.
+    """
+
+    def __init__(self, image: np.ndarray):
+        self._levels: list[np.ndarray] = [image]
+
+        # Ilość poziomów zależy tylko od rozmiaru obrazu, więc jest znana bez liczenia poziomów
+        height, width = image.shape[:2]
+        self.level_count = 1
+        while min(width, height) // 2 >= PYRAMID_MIN_SIDE:
+            width, height = width // 2, height // 2
+            self.level_count += 1
+
+    @property
+    def image(self) -> np.ndarray:
+        return self._levels[0]
+
+    def level(self, index: int) -> np.ndarray:
+        """Poziom piramidy, brakujące poziomy są liczone z poprzedniego"""
+        while len(self._levels) <= index:
+            previous = self._levels[-1]
+            height, width = previous.shape[:2]
+            self._levels.append(cv2.resize(previous, (max(width // 2, 1), max(height // 2, 1)),
+                                           interpolation=cv2.INTER_AREA))
+        return self._levels[index]
+
+    def level_for_scale(self, scale: float) -> int:
+        """
+        Numer najmniejszego poziomu, który przy skali scale (pixel-e ekranu na pixel obrazu) nadal ma co najmniej
+        jeden pixel na pixel ekranu, więc skalowanie z niego najwyżej 2x pomniejsza i nie traci szczegółów
+        """
+        index = 0
+        while index + 1 < self.level_count and scale * 2 ** (index + 1) <= 1:
+            index += 1
+        return index
+
+
+class PyramidRenderer:
+    """
+    Skalowanie obrazu do rozmiaru widoku z wykorzystaniem piramidy obrazów (ImagePyramid).
+
+    Zamiast skalować pełną rozdzielczość przy każdej zmianie rozmiaru okna, wybierany jest najmniejszy poziom
+    piramidy nie mniejszy od docelowego rozmiaru, więc skalowanie dotyczy co najwyżej 2x większego obrazu:
+    - preview: szybkie skalowanie najbliższym sąsiadem, na czas przeciągania krawędzi okna
+    - render: skalowanie z wygładzaniem, raz po zakończeniu zmiany rozmiaru
+
+    Pixmap-y poziomów są pamiętane. Renderer jest związany z jedną wersją obrazu (version),
+    po zmianie obrazu trzeba utworzyć nowy.
+    """
+
+    def __init__(self, pyramid: ImagePyramid, pixmap: QPixmap | None = None, version: int = 0):
+        """
+        :param pyramid: piramida obrazu
+        :param pixmap: gotowa pixmap-a pełnej rozdzielczości, aby nie konwertować obrazu drugi raz
+        :param version: wersja obrazu (VersionedImage.version), dla której zbudowano piramidę
+        """
+        self.version = version
+        self.pyramid = pyramid
+        self._pixmaps: dict[int, QPixmap] = {}
+        if pixmap is not None:
+            self._pixmaps[0] = pixmap
+
+    def level_index(self, target: QSize) -> int:
+        """Numer najmniejszego poziomu, który w dopasowaniu z zachowaniem proporcji nie jest mniejszy od target"""
+        height, width = self.pyramid.image.shape[:2]
+        return self.pyramid.level_for_scale(min(target.width() / width, target.height() / height))
+
+    def level_pixmap(self, index: int) -> QPixmap:
+        if index not in self._pixmaps:
+            self._pixmaps[index] = convert_cv_to_pixmap(self.pyramid.level(index))
+        return self._pixmaps[index]
+
+    def preview(self, target: QSize) -> QPixmap:
+        """Szybki podgląd (najbliższy sąsiad) w rozmiarze dopasowanym do target z zachowaniem proporcji"""
+        return self.level_pixmap(self.level_index(target)).scaled(
+            target, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.FastTransformation)
+
+    def render(self, target: QSize) -> QPixmap:
+        """Obraz wygładzony w rozmiarze dopasowanym do target z zachowaniem proporcji"""
+        return self.level_pixmap(self.level_index(target)).scaled(
+            target, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
@@ -0,0 +1,24 @@
+# conftest.py
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Moduły aplikacji są importowane tak jak w app/main.py, bez prefiksu pakietu
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.fixture
+def gray_image(rng):
+    return rng.integers(0, 256, (97, 131), dtype=np.uint8)
+
+
+@pytest.fixture
+def color_image(rng):
+    return rng.integers(0, 256, (83, 71, 3), dtype=np.uint8)
@@ -0,0 +1,93 @@
+# test_accumulator.py
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from algorithms import ImageAccumulator, UINT16_ACCUMULATOR_LIMIT, accumulate_images, multi_image_addition
+
+
+def reference_addition(images, saturate):
+    """Pierwotny algorytm: suma float32, dla uśrednienia każdy obraz dzielony przez ilość obrazów"""
+    result = np.zeros_like(images[0], dtype=np.float32)
+    for image in images:
+        result += image.astype(np.float32) if saturate else image.astype(np.float32) / len(images)
+    return np.clip(result, 0, 255).astype(np.uint8)
+
+
+@pytest.fixture
+def images(rng):
+    return [rng.integers(0, 256, (40, 50, 3), dtype=np.uint8) for _ in range(7)]
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_saturated_sum_matches_sum_clipped_at_the_end(images, workers):
+    expected = np.clip(np.sum(images, axis=0, dtype=np.int64), 0, 255).astype(np.uint8)
+    np.testing.assert_array_equal(accumulate_images(images, saturate=True, workers=workers), expected)
+    np.testing.assert_array_equal(expected, reference_addition(images, True))
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_average_is_floor_of_exact_mean(images, workers):
+    expected = (np.sum(images, axis=0, dtype=np.int64) // len(images)).astype(np.uint8)
+    np.testing.assert_array_equal(accumulate_images(iter(images), saturate=False, workers=workers), expected)
+
+    # Pierwotne dzielenie każdego obrazu we float32 mogło zaniżyć wynik o 1 przez zaokrąglenia
+    assert np.abs(expected.astype(int) - reference_addition(images, False)).max() <= 1
+
+
+def test_saturation_clips_at_255():
+    image = np.full((4, 4), 200, dtype=np.uint8)
+    np.testing.assert_array_equal(multi_image_addition([image, image, image]), np.full((4, 4), 255))
+
+
+def test_average_does_not_overflow_past_uint16_limit():
+    count = UINT16_ACCUMULATOR_LIMIT + 10
+    accumulator = ImageAccumulator(saturate=False)
+    for _ in range(count):
+        accumulator.add(np.full((3, 3), 255, dtype=np.uint8))
+
+    assert accumulator.accumulator.dtype == np.uint32
+    np.testing.assert_array_equal(accumulator.result(), np.full((3, 3), 255))
+
+
+def test_merge_equals_single_accumulator(images):
+    left, right, whole = ImageAccumulator(False), ImageAccumulator(False), ImageAccumulator(False)
+    for index, image in enumerate(images):
+        (left if index % 2 else right).add(image)
+        whole.add(image)
+
+    np.testing.assert_array_equal(left.merge(right).result(), whole.result())
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_load_reads_paths(tmp_path, images, workers):
+    paths = []
+    for index, image in enumerate(images):
+        paths.append(str(tmp_path / f"{index}.png"))
+        cv2.imwrite(paths[-1], image)
+
+    np.testing.assert_array_equal(accumulate_images(paths, saturate=False, workers=workers, load=cv2.imread),
+                                  accumulate_images(images, saturate=False))
+
+
+def test_images_are_loaded_in_parallel(images):
+    # Dwa wczytania muszą trwać jednocześnie, inaczej bariera nie zostanie przekroczona
+    barrier = threading.Barrier(2, timeout=10)
+
+    def load(index):
+        if index in (1, 2):
+            barrier.wait()
+        return images[index]
+
+    result = accumulate_images(range(len(images)), saturate=True, workers=2, load=load)
+    np.testing.assert_array_equal(result, accumulate_images(images, saturate=True))
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_shape_mismatch_and_empty_input(images, workers):
+    with pytest.raises(ValueError, match="Niezgodność rozmiarów"):
+        accumulate_images(images + [np.zeros((2, 2, 3), dtype=np.uint8)], workers=workers)
+
+    assert accumulate_images([]) is None
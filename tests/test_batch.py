@@ -0,0 +1,77 @@
+# test_batch.py
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from batch import find_images, load_pipeline, main, process_file
+from pipeline import Pipeline
+
+SPEC = {"steps": [
+    {"step": "apply_median_filter", "kernel_size": 5, "border_type": "BORDER_REFLECT"},
+    {"step": "histogram_equalization"},
+]}
+
+
+@pytest.fixture
+def spec_path(tmp_path):
+    path = tmp_path / "pipeline.json"
+    path.write_text(json.dumps(SPEC), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def input_dir(tmp_path, rng):
+    directory = tmp_path / "in"
+    (directory / "sub").mkdir(parents=True)
+    cv2.imwrite(str(directory / "a.png"), rng.integers(0, 256, (40, 50, 3), dtype=np.uint8))
+    cv2.imwrite(str(directory / "sub" / "b.bmp"), rng.integers(0, 256, (30, 20), dtype=np.uint8))
+    (directory / "notes.txt").write_text("nie obraz")
+    return directory
+
+
+def test_find_images_skips_other_files(input_dir):
+    assert [path.name for path in find_images(input_dir)] == ["a.png", "b.bmp"]
+
+
+def test_load_pipeline_converts_color_to_gray(spec_path, rng):
+    pipeline = load_pipeline(spec_path)
+    image = rng.integers(0, 256, (20, 30, 3), dtype=np.uint8)
+
+    assert pipeline.coerce_grayscale
+    assert pipeline.apply(image).ndim == 2
+
+
+def test_process_file_reports_errors(tmp_path, spec_path):
+    broken = tmp_path / "broken.jpg"
+    broken.write_bytes(b"not an image")
+
+    input_path, seconds, error = process_file(str(broken), str(tmp_path / "out" / "broken.jpg"),
+                                              load_pipeline(spec_path))
+
+    assert input_path == str(broken) and seconds >= 0
+    assert error is not None and "ValueError" in error
+
+
+def test_main_processes_directory_tree(tmp_path, spec_path, input_dir):
+    output_dir = tmp_path / "out"
+    assert main([str(spec_path), str(input_dir), str(output_dir), "--workers", "2"]) == 0
+
+    pipeline = Pipeline.from_spec(SPEC, coerce_grayscale=True)
+    for relative in ("a.png", "sub/b.bmp"):
+        expected = pipeline.apply(cv2.imread(str(input_dir / relative)))
+        np.testing.assert_array_equal(cv2.imread(str(output_dir / relative), cv2.IMREAD_UNCHANGED), expected)
+
+
+def test_main_exit_codes(tmp_path, spec_path, input_dir):
+    (input_dir / "broken.png").write_bytes(b"not an image")
+    assert main([str(spec_path), str(input_dir), str(tmp_path / "out"), "--workers", "1"]) == 1
+
+    empty_dir = tmp_path / "empty"
+    empty_dir.mkdir()
+    assert main([str(spec_path), str(empty_dir), str(tmp_path / "out")]) == 2
+
+    bad_spec = tmp_path / "bad.json"
+    bad_spec.write_text(json.dumps({"steps": [{"step": "unknown"}]}), encoding="utf-8")
+    assert main([str(bad_spec), str(input_dir), str(tmp_path / "out")]) == 2
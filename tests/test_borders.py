@@ -0,0 +1,90 @@
+# test_borders.py
+import cv2
+import numpy as np
+import pytest
+
+from algorithms import apply_median_filter
+from borders import BORDER_OVERWRITE, filter_with_border, overwrite_border
+
+
+def median(kernel_size):
+    """cv2.medianBlur zawsze powiela krawędź, więc ignoruje żądany typ obramowania"""
+    return lambda region, _: cv2.medianBlur(region, kernel_size)
+
+
+def reference_filter(image, operation, radius, border_type, border_value):
+    """Cały obraz obramowany przez cv2.copyMakeBorder, filtrowany i przycięty"""
+    if image.ndim == 3 and np.isscalar(border_value):
+        border_value = (border_value,) * image.shape[2]
+    padded = cv2.copyMakeBorder(image, radius, radius, radius, radius, border_type, value=border_value)
+    return operation(padded, cv2.BORDER_REPLICATE)[radius:-radius, radius:-radius]
+
+
+@pytest.mark.parametrize("kernel_size", [3, 5, 7])
+@pytest.mark.parametrize("border_type, border_value", [(cv2.BORDER_REFLECT, 0), (cv2.BORDER_REFLECT_101, 0),
+                                                       (cv2.BORDER_WRAP, 0), (cv2.BORDER_CONSTANT, 0),
+                                                       (cv2.BORDER_CONSTANT, 140)])
+def test_median_edge_strips_match_padded_copy(gray_image, kernel_size, border_type, border_value):
+    radius = kernel_size // 2
+    result = filter_with_border(gray_image, median(kernel_size), (radius,) * 4, border_type, border_value,
+                                full_border_type=cv2.BORDER_REPLICATE)
+
+    np.testing.assert_array_equal(result, reference_filter(gray_image, median(kernel_size), radius, border_type,
+                                                           border_value))
+
+
+def test_linear_filter_with_asymmetric_margins(rng, gray_image):
+    kernel = rng.standard_normal((3, 7)).astype(np.float32)
+
+    def operation(region, border_type):
+        return cv2.filter2D(region, cv2.CV_32F, kernel, borderType=border_type)
+
+    result = filter_with_border(gray_image, operation, (1, 1, 3, 3), cv2.BORDER_CONSTANT, 60)
+    padded = cv2.copyMakeBorder(gray_image, 1, 1, 3, 3, cv2.BORDER_CONSTANT, value=60)
+    np.testing.assert_allclose(result, operation(padded, cv2.BORDER_CONSTANT)[1:-1, 3:-3], atol=1e-3)
+
+
+@pytest.mark.parametrize("border_value", [90, (10, 200, 30)])
+def test_color_constant_border(color_image, border_value):
+    result = filter_with_border(color_image, median(5), (2,) * 4, cv2.BORDER_CONSTANT, border_value,
+                                full_border_type=cv2.BORDER_REPLICATE)
+
+    # Skalar wypełnia wszystkie kanały (v, v, v), a nie tylko pierwszy jak samo cv2.copyMakeBorder
+    np.testing.assert_array_equal(result, reference_filter(color_image, median(5), 2, cv2.BORDER_CONSTANT,
+                                                           border_value))
+
+
+def test_small_image_is_filtered_whole(rng):
+    image = rng.integers(0, 256, (6, 9), dtype=np.uint8)
+    result = filter_with_border(image, median(5), (2,) * 4, cv2.BORDER_REFLECT_101, 0,
+                                full_border_type=cv2.BORDER_REPLICATE)
+    np.testing.assert_array_equal(result, reference_filter(image, median(5), 2, cv2.BORDER_REFLECT_101, 0))
+
+
+def test_operation_handling_border_is_called_once(gray_image):
+    calls = []
+
+    def operation(region, border_type):
+        calls.append(region.shape)
+        return cv2.medianBlur(region, 3)
+
+    filter_with_border(gray_image, operation, (1,) * 4, cv2.BORDER_REPLICATE)
+    filter_with_border(gray_image, operation, (1,) * 4, cv2.BORDER_CONSTANT, 0)
+    assert calls == [gray_image.shape] * 2
+
+
+def test_overwrite_border(gray_image):
+    result = overwrite_border(gray_image.copy(), 1, 2, 3, 4, 7)
+
+    assert (result[:1] == 7).all() and (result[-2:] == 7).all()
+    assert (result[:, :3] == 7).all() and (result[:, -4:] == 7).all()
+    np.testing.assert_array_equal(result[1:-2, 3:-4], gray_image[1:-2, 3:-4])
+
+    median_result = apply_median_filter(gray_image, 5, BORDER_OVERWRITE, 7)
+    np.testing.assert_array_equal(median_result[2:-2, 2:-2], cv2.medianBlur(gray_image, 5)[2:-2, 2:-2])
+
+
+def test_gray_image_with_tuple_border_value(gray_image):
+    result = filter_with_border(gray_image, median(3), (1,) * 4, cv2.BORDER_CONSTANT, (50, 0, 0, 0),
+                                full_border_type=cv2.BORDER_REPLICATE)
+    np.testing.assert_array_equal(result, reference_filter(gray_image, median(3), 1, cv2.BORDER_CONSTANT, 50))
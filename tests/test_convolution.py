@@ -0,0 +1,73 @@
+# test_convolution.py
+import cv2
+import numpy as np
+import pytest
+
+from convolution import analyze_kernel, apply_kernel, apply_kernel_constant_border, fft_filter
+
+
+@pytest.fixture
+def float_image(rng):
+    return rng.random((150, 170), dtype=np.float32) * 255
+
+
+@pytest.mark.parametrize("kernel_shape", [(3, 3), (15, 9), (31, 31), (33, 40)])
+@pytest.mark.parametrize("border_type", [cv2.BORDER_REFLECT_101, cv2.BORDER_REFLECT, cv2.BORDER_REPLICATE,
+                                         cv2.BORDER_CONSTANT])
+def test_fft_filter_matches_filter2d(rng, float_image, kernel_shape, border_type):
+    kernel = rng.standard_normal(kernel_shape).astype(np.float32)
+
+    expected = cv2.filter2D(float_image, cv2.CV_32F, kernel, borderType=border_type)
+    result = fft_filter(float_image, kernel, border_type)
+
+    assert result.dtype == np.float32
+    np.testing.assert_allclose(result, expected, atol=1e-2 * np.abs(kernel).sum())
+
+
+def test_fft_filter_multichannel(rng):
+    image = rng.integers(0, 256, (64, 80, 3), dtype=np.uint8)
+    kernel = rng.random((9, 9), dtype=np.float32)
+
+    expected = cv2.filter2D(image.astype(np.float32), cv2.CV_32F, kernel)
+    np.testing.assert_allclose(fft_filter(image, kernel), expected, atol=1e-2 * kernel.sum())
+
+
+@pytest.mark.parametrize("kernel, rank", [
+    (np.ones((5, 5), dtype=np.float32) / 25, 1),
+    (np.outer([1, 2, 1], [1, 0, -1]).astype(np.float32), 1),
+    (np.array([[0, 1, 0], [1, -4, 1], [0, 1, 0]], dtype=np.float32), 2),
+    (np.zeros((3, 3), dtype=np.float32), 1),
+])
+def test_analyze_kernel_reconstructs_kernel(kernel, rank):
+    decomposition = analyze_kernel(kernel)
+
+    assert decomposition.rank == rank and decomposition.separable == (rank == 1)
+    reconstructed = sum(np.outer(column, row) for column, row in zip(decomposition.columns, decomposition.rows))
+    np.testing.assert_allclose(reconstructed, kernel, atol=1e-5)
+    assert analyze_kernel(kernel.copy()) is decomposition
+
+
+@pytest.mark.parametrize("kernel", [
+    np.ones((5, 5), dtype=np.float32) / 25,                                        # separowalna
+    np.outer([1, 2, 1], [1, 0, -1]).astype(np.float32),                            # separowalna (Sobel)
+    np.array([[0, 1, 0], [1, -4, 1], [0, 1, 0]], dtype=np.float32),                # niskiego rzędu
+    np.random.default_rng(1).standard_normal((31, 31)).astype(np.float32),        # FFT
+])
+def test_apply_kernel_matches_filter2d(gray_image, kernel):
+    expected = cv2.filter2D(gray_image, cv2.CV_32F, kernel, borderType=cv2.BORDER_REFLECT)
+    result = apply_kernel(gray_image, kernel, cv2.CV_32F, cv2.BORDER_REFLECT)
+    np.testing.assert_allclose(result, expected, atol=1e-2 * np.abs(kernel).sum())
+
+    # Dla uint8 wynik może różnić się od cv2.filter2D tylko zaokrągleniem
+    difference = apply_kernel(gray_image, kernel).astype(int) - cv2.filter2D(gray_image, -1, kernel).astype(int)
+    assert np.abs(difference).max() <= 1
+
+
+@pytest.mark.parametrize("border_value", [0, 90, 255])
+def test_constant_border_uses_border_value(gray_image, border_value):
+    kernel = np.ones((5, 5), dtype=np.float32) / 25
+    padded = cv2.copyMakeBorder(gray_image, 2, 2, 2, 2, cv2.BORDER_CONSTANT, value=border_value)
+    expected = cv2.filter2D(padded, cv2.CV_32F, kernel)[2:-2, 2:-2]
+
+    result = apply_kernel_constant_border(gray_image, kernel, cv2.CV_32F, border_value)
+    np.testing.assert_allclose(result, expected, atol=1e-3)
@@ -0,0 +1,117 @@
+# test_edges.py
+import cv2
+import numpy as np
+import pytest
+
+from algorithms import KERNELS, apply_kernel_bank, apply_compass_edge_detection, sobel_gradients, \
+    gradient_magnitude_orientation, apply_gradient_magnitude, apply_canny_edge_detection
+from borders import BORDER_OVERWRITE
+from pipeline import CannyEdgeDetection
+
+PREWITT = list(KERNELS["Detekcja Krawędzi - Prewitt"].values())
+
+
+def reference_kernel_bank(image, kernels, border_type, border_value):
+    """Każda maska osobno (cv2.filter2D na obrazie obramowanym), potem max i argmax po wszystkich odpowiedziach"""
+    radius = kernels[0].shape[0] // 2
+    padded = cv2.copyMakeBorder(image, radius, radius, radius, radius, border_type, value=border_value)
+    responses = np.stack([cv2.filter2D(padded.astype(np.float32), -1, np.asarray(kernel, np.float32),
+                                       borderType=cv2.BORDER_CONSTANT)[radius:-radius, radius:-radius]
+                          for kernel in kernels])
+    # np.argmax przy remisie zwraca pierwszą maskę z listy
+    return np.clip(responses.max(axis=0), 0, 255).astype(np.uint8), responses.argmax(axis=0).astype(np.uint8)
+
+
+@pytest.mark.parametrize("border_type, border_value", [(cv2.BORDER_REFLECT, 0), (cv2.BORDER_REPLICATE, 0),
+                                                       (cv2.BORDER_CONSTANT, 0), (cv2.BORDER_CONSTANT, 90)])
+def test_prewitt_compass_matches_separate_filters(gray_image, border_type, border_value):
+    max_response, direction = apply_kernel_bank(gray_image, PREWITT, border_type, border_value)
+    expected_response, expected_direction = reference_kernel_bank(gray_image, PREWITT, border_type, border_value)
+
+    np.testing.assert_array_equal(max_response, expected_response)
+    np.testing.assert_array_equal(direction, expected_direction)
+    np.testing.assert_array_equal(apply_compass_edge_detection(gray_image, PREWITT, border_type, border_value),
+                                  max_response)
+
+
+def test_tie_goes_to_earlier_kernel():
+    # Na płaskim obrazie wszystkie odpowiedzi są zerowe, więc wygrywa pierwsza maska z listy
+    flat = np.full((20, 30), 77, dtype=np.uint8)
+    _, direction = apply_kernel_bank(flat, PREWITT, cv2.BORDER_REFLECT, 0)
+    assert not direction.any()
+
+    # Ta sama maska dwa razy i jej przeciwieństwo: remis z maską powtórzoną wygrywa wcześniejsza
+    kernels = [PREWITT[2], PREWITT[6], PREWITT[2]]
+    image = np.tile(np.arange(0, 200, 10, dtype=np.uint8), (15, 1))
+    _, direction = apply_kernel_bank(image, kernels, cv2.BORDER_REFLECT, 0)
+    assert set(np.unique(direction)) <= {0, 1}
+
+
+def test_non_integer_kernels_match_separate_filters(gray_image):
+    kernels = [np.asarray(kernel, np.float32) * 1.5 for kernel in PREWITT[:3]]
+    max_response, direction = apply_kernel_bank(gray_image, kernels, cv2.BORDER_REFLECT_101, 0)
+    expected_response, expected_direction = reference_kernel_bank(gray_image, kernels, cv2.BORDER_REFLECT_101, 0)
+
+    # Maski rozdzielne są liczone w dwóch przejściach float32, więc ucięcie do uint8 może się różnić o 1
+    np.testing.assert_allclose(max_response, expected_response, atol=1)
+    assert (max_response > 0).sum() > max_response.size // 2
+
+    responses = np.sort(np.stack([cv2.filter2D(gray_image.astype(np.float32), -1, kernel,
+                                               borderType=cv2.BORDER_REFLECT_101) for kernel in kernels]), axis=0)
+    distinct = responses[-1] - responses[-2] > 0.01
+    np.testing.assert_array_equal(direction[distinct], expected_direction[distinct])
+
+
+def test_overwrite_border(gray_image):
+    max_response, direction = apply_kernel_bank(gray_image, PREWITT, BORDER_OVERWRITE, 123)
+    expected_response, expected_direction = reference_kernel_bank(gray_image, PREWITT, cv2.BORDER_REPLICATE, 0)
+
+    assert (max_response[0] == 123).all() and (max_response[:, -1] == 123).all()
+    assert not direction[-1].any() and not direction[:, 0].any()
+    np.testing.assert_array_equal(max_response[1:-1, 1:-1], expected_response[1:-1, 1:-1])
+    np.testing.assert_array_equal(direction[1:-1, 1:-1], expected_direction[1:-1, 1:-1])
+
+
+def test_sobel_gradients_match_opencv(gray_image):
+    gradients = sobel_gradients(gray_image)
+
+    assert gradients.dx.dtype == np.int16 and gradients.dy.dtype == np.int16
+    np.testing.assert_array_equal(gradients.dx,
+                                  cv2.Sobel(gray_image, cv2.CV_16S, 1, 0, borderType=cv2.BORDER_REPLICATE))
+    np.testing.assert_array_equal(gradients.dy,
+                                  cv2.Sobel(gray_image, cv2.CV_16S, 0, 1, borderType=cv2.BORDER_REPLICATE))
+
+
+def test_magnitude_and_orientation(gray_image):
+    gradients = sobel_gradients(gray_image)
+    magnitude, orientation = gradient_magnitude_orientation(gradients)
+
+    dx, dy = gradients.dx.astype(np.float64), gradients.dy.astype(np.float64)
+    np.testing.assert_allclose(magnitude, np.hypot(dx, dy), rtol=1e-5)
+    # cv2.cartToPolar liczy kąt z dokładnością około 0.3 stopnia
+    expected = np.degrees(np.arctan2(dy, dx)) % 360
+    difference = np.abs(orientation - expected)
+    assert (np.minimum(difference, 360 - difference)[magnitude > 0] < 0.5).all()
+
+    np.testing.assert_array_equal(apply_gradient_magnitude(gray_image),
+                                  np.clip(magnitude, 0, 255).astype(np.uint8))
+
+
+@pytest.mark.parametrize("threshold1, threshold2", [(50, 150), (100, 200)])
+def test_canny_with_shared_gradients_equals_canny_on_image(gray_image, threshold1, threshold2):
+    # Obraz gładszy od szumu, aby krawędzi było mniej niż pixel-i
+    image = cv2.GaussianBlur(gray_image, (5, 5), 0)
+    expected = apply_canny_edge_detection(image, threshold1, threshold2)
+
+    assert expected.any()
+    np.testing.assert_array_equal(apply_canny_edge_detection(image, threshold1, threshold2, sobel_gradients(image)),
+                                  expected)
+
+    step = CannyEdgeDetection(threshold1=threshold2, threshold2=threshold1)
+    np.testing.assert_array_equal(step.apply_with_gradients(image, sobel_gradients(image)), step.apply(image))
+    np.testing.assert_array_equal(step.apply(image), expected)
+
+
+def test_canny_with_gradients_needs_grayscale(color_image):
+    with pytest.raises(ValueError):
+        CannyEdgeDetection().apply_with_gradients(color_image, sobel_gradients(color_image[:, :, 0]))
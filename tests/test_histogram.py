@@ -0,0 +1,71 @@
+# test_histogram.py
+import numpy as np
+import pytest
+
+import algorithms
+from algorithms import generate_lut_histogram, histogram_channels
+
+
+def reference_histogram(channel):
+    """Pętla po pixel-ach jak w pierwotnej wersji generate_lut_histogram"""
+    lut = np.zeros(256, dtype=np.uint32)
+    for value in channel.flat:
+        lut[value] += 1
+    return lut
+
+
+def test_gray_matches_pixel_loop(gray_image):
+    histogram = generate_lut_histogram(gray_image)
+    assert histogram.dtype == np.uint32
+    np.testing.assert_array_equal(histogram, reference_histogram(gray_image))
+
+
+def test_color_matches_pixel_loop(color_image):
+    histogram = generate_lut_histogram(color_image)
+    for c, name in enumerate(("blue", "green", "red")):
+        np.testing.assert_array_equal(histogram[name], reference_histogram(color_image[:, :, c]))
+    np.testing.assert_array_equal(histogram_channels(color_image)[2], histogram["red"])
+
+
+@pytest.mark.parametrize("mask_dtype", [np.uint8, np.bool_])
+def test_mask_counts_only_selected_pixels(rng, color_image, mask_dtype):
+    mask = rng.integers(0, 2, color_image.shape[:2]).astype(mask_dtype)
+    histogram = generate_lut_histogram(color_image, mask=mask)
+    selected = color_image[mask > 0]
+    for c, name in enumerate(("blue", "green", "red")):
+        np.testing.assert_array_equal(histogram[name], reference_histogram(selected[:, c]))
+
+
+def test_roi_and_mask_are_cut_together(rng, gray_image):
+    mask = rng.integers(0, 2, gray_image.shape, dtype=np.uint8)
+    x, y, width, height = 10, 5, 40, 30
+    histogram = generate_lut_histogram(gray_image, mask=mask, roi=(x, y, width, height))
+    region = gray_image[y:y + height, x:x + width]
+    expected = reference_histogram(region[mask[y:y + height, x:x + width] > 0])
+    np.testing.assert_array_equal(histogram, expected)
+
+
+def test_mask_with_wrong_shape_is_rejected(gray_image):
+    with pytest.raises(ValueError):
+        generate_lut_histogram(gray_image, mask=np.ones((3, 3), np.uint8))
+
+
+@pytest.mark.parametrize("threads", [1, 4])
+def test_bands_sum_to_whole_image(monkeypatch, rng, color_image, threads):
+    # Pasma po kilka wierszy, żeby obraz testowy dzielił się na wiele pasm
+    monkeypatch.setattr(algorithms, "HISTOGRAM_MAX_CHUNK_PIXELS", color_image.shape[1] * 7)
+    mask = rng.integers(0, 2, color_image.shape[:2], dtype=np.uint8)
+    banded = generate_lut_histogram(color_image, mask=mask, threads=threads)
+    monkeypatch.undo()
+    whole = generate_lut_histogram(color_image, mask=mask)
+    for name in ("blue", "green", "red"):
+        np.testing.assert_array_equal(banded[name], whole[name])
+
+
+def test_non_uint8_is_rejected():
+    with pytest.raises(ValueError):
+        generate_lut_histogram(np.array([[1000, 60000]], dtype=np.uint16))
+
+
+def test_missing_image():
+    assert generate_lut_histogram(None) is None
@@ -0,0 +1,68 @@
+# test_histogram_statistics.py
+import math
+
+import numpy as np
+import pytest
+
+from histogram_statistics import histogram_entropy, histogram_mean, histogram_median, histogram_mode, \
+    histogram_percentile, histogram_statistics, histogram_variance
+
+
+def histogram_of(values):
+    return np.bincount(values.ravel(), minlength=256)
+
+
+@pytest.fixture(params=[(1,), (2,), (7, 9), (64, 64)])
+def values(request, rng):
+    # Obrazy o parzystej i nieparzystej ilości pixel-i, w tym jeden pixel
+    return rng.integers(0, 256, request.param).astype(np.uint8)
+
+
+def test_statistics_match_numpy(values):
+    histogram = histogram_of(values)
+    statistics = histogram_statistics(histogram)
+
+    assert statistics.count == values.size
+    assert statistics.mean == pytest.approx(np.mean(values.astype(np.float64)))
+    assert statistics.variance == pytest.approx(np.var(values.astype(np.float64)))
+    assert statistics.std == pytest.approx(np.std(values.astype(np.float64)))
+    assert statistics.median == np.median(values)
+    assert statistics.minimum == values.min() and statistics.maximum == values.max()
+    assert statistics.mode == np.argmax(histogram)
+
+    assert histogram_mean(histogram) == pytest.approx(statistics.mean)
+    assert histogram_variance(histogram) == pytest.approx(statistics.variance)
+    assert histogram_median(histogram) == statistics.median
+
+
+@pytest.mark.parametrize("percent", [0, 2.5, 33.3, 50, 97.5, 100])
+def test_percentile_matches_numpy(values, percent):
+    assert histogram_percentile(histogram_of(values), percent) == pytest.approx(np.percentile(values, percent))
+
+
+def test_mode_prefers_lowest_level_on_tie():
+    histogram = np.zeros(256, dtype=np.int64)
+    histogram[[10, 200]] = 5
+    assert histogram_mode(histogram) == 10
+
+
+def test_entropy():
+    assert histogram_entropy(np.ones(256)) == pytest.approx(8.0)
+    assert histogram_entropy(histogram_of(np.full(10, 3, dtype=np.uint8))) == 0.0
+
+    histogram = np.array([1, 1, 2] + [0] * 253)
+    assert histogram_entropy(histogram) == pytest.approx(1.5)
+
+
+def test_variance_is_exact_for_large_counts():
+    # Dwie jasności po 10^12 pixel-i: wariancja dokładnie 1
+    histogram = np.zeros(256, dtype=np.int64)
+    histogram[[100, 102]] = 10 ** 12
+    assert histogram_variance(histogram) == 1.0
+    assert histogram_statistics(histogram).std == math.sqrt(1.0)
+
+
+def test_empty_histogram():
+    statistics = histogram_statistics(np.zeros(256, dtype=np.int64))
+    assert statistics.count == 0 and statistics.mean == 0.0 and statistics.entropy == 0.0
+    assert histogram_percentile(np.zeros(256), 50) == 0.0
@@ -0,0 +1,100 @@
+# test_image_io.py
+import cv2
+import numpy as np
+import pytest
+
+from image_io import downsample_for_display, memmap_image_read, memmap_raw_read, smart_image_read
+
+
+@pytest.mark.parametrize("shape", [(37, 53, 3), (37, 53), (40, 64, 3)])
+def test_memmap_bmp_matches_imread(tmp_path, rng, shape):
+    # Szerokości 53 wymagają wyrównania wierszy do 4 bajtów, 64 nie
+    image = rng.integers(0, 256, shape, dtype=np.uint8)
+    path = str(tmp_path / "image.bmp")
+    assert cv2.imwrite(path, image)
+
+    mapped = memmap_image_read(path)
+
+    assert mapped is not None and not mapped.flags.writeable
+    np.testing.assert_array_equal(mapped, image)
+
+
+@pytest.mark.parametrize("shape", [(29, 31, 3), (29, 31)])
+def test_memmap_uncompressed_tiff_matches_imread(tmp_path, rng, shape):
+    image = rng.integers(0, 256, shape, dtype=np.uint8)
+    path = str(tmp_path / "image.tif")
+    assert cv2.imwrite(path, image, [cv2.IMWRITE_TIFF_COMPRESSION, 1])
+
+    mapped = memmap_image_read(path)
+
+    assert mapped is not None
+    np.testing.assert_array_equal(mapped, image)
+
+
+def test_unsupported_files_fall_back_to_imread(tmp_path, rng):
+    image = rng.integers(0, 256, (20, 30, 3), dtype=np.uint8)
+
+    png_path = str(tmp_path / "image.png")
+    compressed_tiff_path = str(tmp_path / "image.tif")
+    cv2.imwrite(png_path, image)
+    cv2.imwrite(compressed_tiff_path, image, [cv2.IMWRITE_TIFF_COMPRESSION, 5])
+
+    assert memmap_image_read(png_path) is None
+    assert memmap_image_read(compressed_tiff_path) is None
+    assert memmap_image_read(str(tmp_path / "missing.bmp")) is None
+
+    np.testing.assert_array_equal(smart_image_read(png_path, use_memmap=True), image)
+    np.testing.assert_array_equal(smart_image_read(compressed_tiff_path, use_memmap=True), image)
+
+
+def test_smart_image_read_converts_gray_bgr_to_grayscale(tmp_path, rng):
+    gray = rng.integers(0, 256, (20, 30), dtype=np.uint8)
+    path = str(tmp_path / "gray.png")
+    cv2.imwrite(path, cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+
+    np.testing.assert_array_equal(smart_image_read(path), gray)
+
+
+def test_memmap_raw_read(tmp_path, rng):
+    image = rng.integers(0, 256, (12, 17, 3), dtype=np.uint8)
+    path = tmp_path / "image.raw"
+    path.write_bytes(b"header" + image.tobytes())
+
+    np.testing.assert_array_equal(memmap_raw_read(str(path), 12, 17, 3, offset=6), image)
+
+
+def test_downsample_for_display_fits_in_bounds(rng):
+    image = rng.integers(0, 256, (400, 1000, 3), dtype=np.uint8)
+    preview = downsample_for_display(image[::-1], 250, 250)
+
+    assert preview.shape[0] <= 250 and preview.shape[1] <= 250 and preview.shape[2] == 3
+    assert preview.flags.c_contiguous
+
+
+def test_memmap_gray_bgr_is_returned_as_grayscale(tmp_path, rng):
+    gray = rng.integers(0, 256, (21, 34), dtype=np.uint8)
+    path = str(tmp_path / "gray.bmp")
+    cv2.imwrite(path, cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+
+    mapped = smart_image_read(path, use_memmap=True)
+
+    assert mapped.ndim == 2 and not mapped.flags.writeable
+    np.testing.assert_array_equal(mapped, smart_image_read(path))
+
+
+def test_tiff_without_strip_offsets_is_not_mapped(tmp_path, rng):
+    image = rng.integers(0, 256, (16, 24), dtype=np.uint8)
+    path = tmp_path / "image.tif"
+    cv2.imwrite(str(path), image, [cv2.IMWRITE_TIFF_COMPRESSION, 1])
+
+    # Zmiana numeru tagu StripOffsets (273) na nieznany, czyli plik bez wymaganego tagu
+    data = bytearray(path.read_bytes())
+    byte_order = "little" if data[:2] == b"II" else "big"
+    ifd_offset = int.from_bytes(data[4:8], byte_order)
+    for index in range(int.from_bytes(data[ifd_offset:ifd_offset + 2], byte_order)):
+        entry = ifd_offset + 2 + 12 * index
+        if int.from_bytes(data[entry:entry + 2], byte_order) == 273:
+            data[entry:entry + 2] = (65000).to_bytes(2, byte_order)
+    path.write_bytes(bytes(data))
+
+    assert memmap_image_read(str(path)) is None
@@ -0,0 +1,109 @@
+# test_pipeline.py
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from algorithms import KERNELS, apply_point_operations, apply_linear_filter, apply_median_filter
+from pipeline import Pipeline, Step, PointStep, LinearFilter, LaplacianSharpening, MedianFilter, Negation, \
+    Posterize, ScalarOperation, HistogramEqualization, BinaryThreshold, step_from_spec
+
+SPEC = {"steps": [
+    {"step": "scalar_operation", "value": 20, "operation": "addition", "saturate": True},
+    {"step": "point_posterize", "levels": 6},
+    {"step": "apply_median_filter", "kernel_size": 3, "border_type": "BORDER_CONSTANT", "border_value": 9},
+    {"step": "histogram_equalization"},
+    {"step": "apply_linear_filter", "kernel": ["Wygładzanie", "Uśrednienie 3x3"]},
+    {"step": "apply_canny_edge_detection", "threshold1": 150, "threshold2": 50},
+]}
+
+
+def test_step_is_abstract():
+    with pytest.raises(TypeError):
+        Step()
+
+
+def test_spec_round_trip_through_json():
+    pipeline = Pipeline.from_spec(SPEC)
+    restored = Pipeline.from_spec(json.loads(json.dumps(pipeline.to_spec())))
+
+    assert restored.steps == pipeline.steps
+    assert isinstance(restored.steps[2], MedianFilter) and restored.steps[2].border_type == cv2.BORDER_CONSTANT
+    # Progi Canny'ego są zamieniane, gdy dolny jest większy od górnego
+    assert (restored.steps[-1].threshold1, restored.steps[-1].threshold2) == (50, 150)
+
+
+def test_invalid_specs_are_rejected():
+    with pytest.raises(ValueError, match="Krok 1"):
+        Pipeline.from_spec([{"step": "unknown"}])
+    with pytest.raises(ValueError):
+        step_from_spec({"step": "point_posterize", "levels": 1})
+    with pytest.raises(ValueError):
+        step_from_spec({"step": "apply_median_filter", "kernel_size": 4})
+    with pytest.raises(ValueError):
+        step_from_spec({"step": "apply_linear_filter", "kernel": ["Wygładzanie", "brak"]})
+    with pytest.raises(ValueError):
+        step_from_spec({"step": "point_negation", "unknown": 1})
+
+
+def test_fused_point_steps_equal_sequential_steps(color_image):
+    steps = [ScalarOperation(value=40), Posterize(levels=5), Negation(), HistogramEqualization()]
+
+    expected = color_image
+    for step in steps:
+        expected = step.apply(expected)
+
+    np.testing.assert_array_equal(Pipeline(steps).apply(color_image), expected)
+
+
+def test_pipeline_equals_direct_calls(gray_image):
+    kernel = KERNELS["Wygładzanie"]["Uśrednienie 3x3"]
+    pipeline = Pipeline([Negation(), MedianFilter(kernel_size=5), LinearFilter(kernel=kernel)])
+
+    expected = apply_point_operations(gray_image, [("point_negation", {})])
+    expected = apply_median_filter(expected, 5, cv2.BORDER_REFLECT, 0)
+    expected = apply_linear_filter(expected, kernel, cv2.BORDER_REFLECT, 0)
+
+    np.testing.assert_array_equal(pipeline(gray_image), expected)
+
+
+def test_grayscale_steps(color_image):
+    with pytest.raises(ValueError):
+        Pipeline([BinaryThreshold(threshold=100)]).apply(color_image)
+
+    result = Pipeline([Negation(), BinaryThreshold(threshold=100)], coerce_grayscale=True).apply(color_image)
+    assert result.ndim == 2 and set(np.unique(result)) <= {0, 255}
+
+
+def test_with_workers_keeps_results(gray_image):
+    pipeline = Pipeline([MedianFilter(kernel_size=5), Negation()])
+    threaded = pipeline.with_workers(3)
+
+    assert threaded.steps[0].workers == 3 and pipeline.steps[0].workers is None
+    # Ilość wątków nie zmienia kroku
+    assert threaded.steps == pipeline.steps
+    np.testing.assert_array_equal(threaded.apply(gray_image), pipeline.apply(gray_image))
+
+
+def test_linear_filter_steps_are_hashable_and_compare_by_value():
+    kernel = KERNELS["Wyostrzanie"]["Maska 1"]
+    step = LaplacianSharpening(kernel=kernel)
+
+    assert step == LaplacianSharpening(kernel=kernel.tolist())
+    assert step != LaplacianSharpening(kernel=-kernel)
+    assert hash(step) == hash(LaplacianSharpening(kernel=kernel.copy()))
+    assert len({LinearFilter(), LinearFilter(), LinearFilter(kernel=np.ones((3, 3)) / 10)}) == 2
+
+    np.testing.assert_array_equal(step.kernel_array, kernel)
+    assert step.to_spec()["kernel"] == kernel.tolist()
+
+    with pytest.raises(ValueError):
+        LinearFilter(kernel=np.ones((2, 3)))
+
+
+def test_point_steps_report_histogram_dependency():
+    assert HistogramEqualization().needs_histogram
+    assert not Negation().needs_histogram
+    assert all(isinstance(step, PointStep) for step in (Negation(), Posterize(), ScalarOperation()))
+
@@ -0,0 +1,147 @@
+# test_point_operations.py
+import numpy as np
+import pytest
+
+from algorithms import apply_point_operations, compile_point_operations, histogram_channels, point_negation, \
+    point_posterize, point_binary_threshold, point_keep_gray_threshold, scalar_operation, linear_streching_histogram, \
+    linear_saturation_streching_histogram, histogram_equalization
+
+
+# Wzory z pierwotnych implementacji operacji punktowych (pixel po pixel-u), zapisane wektorowo
+
+def reference_posterize(image, levels):
+    steps = np.array([int(255 / (levels - 1) * index) for index in range(levels)], dtype=np.uint8)
+    return steps[(image.astype(np.int64) * levels) // 256]
+
+
+def reference_scalar(image, value, operation, saturate):
+    image_float = image.astype(np.float32)
+    if operation == "addition":
+        result = image_float + value if saturate else image_float * 0.5 + value * 0.5
+    elif operation == "multiplication":
+        result = image_float * value if saturate else image_float / value * value
+    else:
+        result = image_float / value
+    return np.clip(result, 0, 255).astype(np.uint8)
+
+
+def reference_linear_stretch(channel):
+    low, high = int(channel.min()), int(channel.max())
+    if low == high:
+        return channel
+    return ((channel.astype(np.float64) - low) * (255 / (high - low))).astype(np.uint8)
+
+
+def reference_saturation_stretch(channel, low_percent=2.5, high_percent=97.5):
+    low, high = np.percentile(channel, low_percent), np.percentile(channel, high_percent)
+    if low == high:
+        return channel
+    return np.clip((channel.astype(np.float64) - low) * (255 / (high - low)), 0, 255).astype(np.uint8)
+
+
+def reference_equalization(channel):
+    cdf = np.cumsum(np.bincount(channel.ravel(), minlength=256)).astype(np.float64)
+    cdf_min = cdf[np.flatnonzero(cdf)[0]]
+    lut = (cdf - cdf_min) / (channel.size - cdf_min) * 255
+    return lut[channel].astype(np.uint8)
+
+
+def per_channel(reference, image):
+    if image.ndim == 2:
+        return reference(image)
+    return np.dstack([reference(image[:, :, c]) for c in range(image.shape[2])])
+
+
+@pytest.mark.parametrize("image_name", ["gray_image", "color_image"])
+def test_simple_point_operations_match_reference(request, image_name):
+    image = request.getfixturevalue(image_name)
+
+    np.testing.assert_array_equal(point_negation(image), 255 - image)
+    for levels in (2, 3, 4, 7, 16):
+        np.testing.assert_array_equal(point_posterize(image, levels), reference_posterize(image, levels))
+    for threshold in (0, 100, 254):
+        np.testing.assert_array_equal(point_binary_threshold(image, threshold),
+                                      np.where(image > threshold, 255, 0).astype(np.uint8))
+        np.testing.assert_array_equal(point_keep_gray_threshold(image, threshold),
+                                      np.where(image > threshold, image, 0).astype(np.uint8))
+
+
+@pytest.mark.parametrize("operation", ["addition", "multiplication", "division"])
+@pytest.mark.parametrize("saturate", [True, False])
+@pytest.mark.parametrize("value", [1, 3, 50])
+def test_scalar_operation_matches_reference(gray_image, operation, saturate, value):
+    np.testing.assert_array_equal(scalar_operation(gray_image, value, operation, saturate),
+                                  reference_scalar(gray_image, value, operation, saturate))
+
+
+@pytest.mark.parametrize("image_name", ["gray_image", "color_image"])
+def test_linear_stretch_matches_reference(request, image_name):
+    # Zawężony zakres, aby rozciąganie faktycznie zmieniało obraz
+    image = (request.getfixturevalue(image_name) // 3 + 40).astype(np.uint8)
+    np.testing.assert_array_equal(linear_streching_histogram(image), per_channel(reference_linear_stretch, image))
+
+
+@pytest.mark.parametrize("image_name", ["gray_image", "color_image"])
+@pytest.mark.parametrize("low_percent, high_percent", [(2.5, 97.5), (10, 80), (0, 100)])
+def test_saturation_stretch_matches_reference(request, image_name, low_percent, high_percent):
+    image = (request.getfixturevalue(image_name) // 3 + 40).astype(np.uint8)
+    expected = per_channel(lambda channel: reference_saturation_stretch(channel, low_percent, high_percent), image)
+    np.testing.assert_array_equal(linear_saturation_streching_histogram(image, low_percent, high_percent), expected)
+
+
+@pytest.mark.parametrize("image_name", ["gray_image", "color_image"])
+def test_equalization_matches_reference(request, image_name):
+    image = (request.getfixturevalue(image_name) // 3 + 40).astype(np.uint8)
+    equalized, luts = histogram_equalization(image)
+    np.testing.assert_array_equal(equalized, per_channel(reference_equalization, image))
+
+    # Zwrócona tablica lut przekształca obraz tak samo jak cała operacja
+    if image.ndim == 2:
+        np.testing.assert_array_equal(luts[image], equalized)
+    else:
+        assert luts.shape == (3, 256)
+        np.testing.assert_array_equal(luts[1][image[:, :, 1]], equalized[:, :, 1])
+
+
+def test_constant_channel_is_left_unchanged_by_stretching(color_image):
+    # Pierwotna pętla zerowała jednolity kanał obrazu kolorowego, teraz zostaje bez zmian jak w obrazie szarym
+    image = color_image.copy()
+    image[:, :, 1] = 77
+    for stretch in (linear_streching_histogram, linear_saturation_streching_histogram):
+        np.testing.assert_array_equal(stretch(image)[:, :, 1], image[:, :, 1])
+        np.testing.assert_array_equal(stretch(image[:, :, 1]), image[:, :, 1])
+
+
+def test_saturation_stretch_rejects_invalid_percentiles(gray_image):
+    with pytest.raises(ValueError):
+        linear_saturation_streching_histogram(gray_image, 60, 40)
+
+
+@pytest.mark.parametrize("image_name", ["gray_image", "color_image"])
+def test_compiled_chain_equals_sequential_operations(request, image_name):
+    image = request.getfixturevalue(image_name)
+    operations = [
+        ("scalar_operation", {"value": 30, "operation": "addition", "saturate": True}),
+        ("linear_streching_histogram", {}),
+        ("point_posterize", {"levels": 5}),
+        ("point_negation", {}),
+        ("point_keep_gray_threshold", {"threshold": 60}),
+    ]
+
+    expected = image
+    for operation in operations:
+        expected = apply_point_operations(expected, [operation])
+
+    np.testing.assert_array_equal(apply_point_operations(image, operations), expected)
+
+
+def test_compile_point_operations_shape_and_histogram_requirement(color_image):
+    luts = compile_point_operations([("point_negation", {})], channels=3)
+    assert luts.shape == (3, 256) and luts.dtype == np.uint8
+    np.testing.assert_array_equal(luts[0], 255 - np.arange(256))
+
+    luts = compile_point_operations([("histogram_equalization", {})], histogram_channels(color_image))
+    assert luts.shape == (3, 256)
+
+    with pytest.raises(ValueError):
+        compile_point_operations([("histogram_equalization", {})])
@@ -0,0 +1,106 @@
+# test_rank_filter.py
+import cv2
+import numpy as np
+import pytest
+
+from algorithms import apply_median_filter, apply_rank_filter
+from borders import BORDER_OVERWRITE
+import rank_filter as rank_filter_module
+from rank_filter import rank_filter, rank_from_percentile
+
+BORDERS = [(cv2.BORDER_REPLICATE, 0), (cv2.BORDER_REFLECT, 0), (cv2.BORDER_REFLECT_101, 0),
+           (cv2.BORDER_CONSTANT, 0), (cv2.BORDER_CONSTANT, 200)]
+
+
+def reference_rank(image, kernel_size, percentile, border_type, border_value=0):
+    """Sortowanie całego otoczenia każdego pixel-a"""
+    radius = kernel_size // 2
+    padded = cv2.copyMakeBorder(image, radius, radius, radius, radius, border_type, value=border_value)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, (kernel_size, kernel_size))
+    windows = windows.reshape(image.shape + (kernel_size * kernel_size,))
+    return np.sort(windows, axis=-1)[..., rank_from_percentile(kernel_size, percentile)]
+
+
+@pytest.mark.parametrize("kernel_size", [3, 5, 7])
+def test_median_matches_opencv_median_blur(gray_image, kernel_size):
+    np.testing.assert_array_equal(rank_filter(gray_image, kernel_size), cv2.medianBlur(gray_image, kernel_size))
+
+
+@pytest.mark.parametrize("kernel_size", [1, 3, 9])
+@pytest.mark.parametrize("percentile", [0, 25, 50, 100])
+@pytest.mark.parametrize("border_type, border_value", BORDERS)
+def test_uint8_matches_sorted_neighbourhood(gray_image, kernel_size, percentile, border_type, border_value):
+    np.testing.assert_array_equal(rank_filter(gray_image, kernel_size, percentile, border_type, border_value),
+                                  reference_rank(gray_image, kernel_size, percentile, border_type, border_value))
+
+
+@pytest.mark.parametrize("kernel_size", [3, 7])
+@pytest.mark.parametrize("percentile", [0, 50, 90])
+@pytest.mark.parametrize("border_type, border_value", BORDERS)
+def test_uint16_full_range_matches_sorted_neighbourhood(rng, kernel_size, percentile, border_type, border_value):
+    # Więcej niż 256 poziomów, więc liczy histogram przesuwny
+    image = rng.integers(0, 65536, (70, 45), dtype=np.uint16)
+    border_value *= 300
+    np.testing.assert_array_equal(rank_filter(image, kernel_size, percentile, border_type, border_value),
+                                  reference_rank(image, kernel_size, percentile, border_type, border_value))
+
+
+def test_uint16_few_levels_matches_sorted_neighbourhood(rng):
+    image = (rng.integers(0, 50, (40, 60)) * 1000).astype(np.uint16)
+    np.testing.assert_array_equal(rank_filter(image, 5, 50), reference_rank(image, 5, 50, cv2.BORDER_REPLICATE))
+
+
+@pytest.mark.parametrize("border_type, border_value", [(cv2.BORDER_REFLECT_101, 0), (cv2.BORDER_CONSTANT, 5000)])
+def test_uint16_strips_match_sorted_neighbourhood(monkeypatch, rng, border_type, border_value):
+    # Pasy po kilka kolumn, żeby obraz testowy dzielił się na wiele pasów
+    monkeypatch.setattr(rank_filter_module, "COLUMN_HISTOGRAMS_MAX_BYTES", 20 * 2 ** 17)
+    image = rng.integers(0, 65536, (25, 70), dtype=np.uint16)
+    np.testing.assert_array_equal(rank_filter(image, 5, 30, border_type, border_value),
+                                  reference_rank(image, 5, 30, border_type, border_value))
+
+
+def test_uint16_smooth_image_matches_sorted_neighbourhood(rng):
+    # Sąsiednie wyniki mają te same starsze bity, więc poziomy leniwe liczą długie odcinki
+    y, x = np.mgrid[0:40, 0:90]
+    image = (30000 + 20000 * np.sin(x / 15) * np.cos(y / 10) + rng.normal(0, 300, x.shape)).astype(np.uint16)
+    np.testing.assert_array_equal(rank_filter(image, 9, 70, cv2.BORDER_REFLECT),
+                                  reference_rank(image, 9, 70, cv2.BORDER_REFLECT))
+
+
+def test_kernel_larger_than_255_uses_wider_counts(rng):
+    image = rng.integers(0, 65536, (6, 20), dtype=np.uint16)
+    np.testing.assert_array_equal(rank_filter(image, 257, 40, cv2.BORDER_REFLECT_101),
+                                  reference_rank(image, 257, 40, cv2.BORDER_REFLECT_101))
+
+
+@pytest.mark.parametrize("dtype, low, high", [(np.int16, -32768, 32767), (np.int32, -10 ** 6, 10 ** 6)])
+def test_other_integer_types_are_mapped_to_levels(rng, dtype, low, high):
+    image = rng.integers(low, high, (30, 40)).astype(dtype)
+    result = rank_filter(image, 5, 60, cv2.BORDER_CONSTANT, -7)
+    assert result.dtype == dtype
+    np.testing.assert_array_equal(result, reference_rank(image, 5, 60, cv2.BORDER_CONSTANT, -7))
+
+
+def test_color_image_is_filtered_per_channel(color_image):
+    expected = np.dstack([cv2.medianBlur(np.ascontiguousarray(color_image[:, :, c]), 5) for c in range(3)])
+    np.testing.assert_array_equal(rank_filter(color_image, 5), expected)
+
+
+@pytest.mark.parametrize("kernel_size", [3, 5, 7])
+@pytest.mark.parametrize("border_type", [cv2.BORDER_REFLECT, cv2.BORDER_CONSTANT, BORDER_OVERWRITE])
+def test_median_filter_equals_rank_filter_at_50(rng, gray_image, kernel_size, border_type):
+    np.testing.assert_array_equal(apply_median_filter(gray_image, kernel_size, border_type, 40),
+                                  apply_rank_filter(gray_image, kernel_size, 50, border_type, 40))
+
+    image16 = rng.integers(0, 65536, (30, 35), dtype=np.uint16)
+    np.testing.assert_array_equal(apply_median_filter(image16, kernel_size, border_type, 40),
+                                  apply_rank_filter(image16, kernel_size, 50, border_type, 40))
+
+
+def test_invalid_arguments(gray_image):
+    with pytest.raises(ValueError):
+        rank_filter(gray_image, 4)
+    with pytest.raises(ValueError):
+        rank_filter(gray_image, 3, 101)
+    with pytest.raises(ValueError):
+        rank_filter(gray_image.astype(np.float32), 3)
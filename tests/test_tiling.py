@@ -0,0 +1,90 @@
+# test_tiling.py
+import cv2
+import numpy as np
+import pytest
+
+from algorithms import KERNELS, apply_linear_filter, apply_laplacian_sharpening, apply_median_filter, \
+    apply_rank_filter, apply_compass_edge_detection, apply_gradient_magnitude
+from borders import BORDER_OVERWRITE
+from tiling import iter_tiles, process_in_bands, process_in_tiles
+
+BORDER_TYPES = [cv2.BORDER_REFLECT, cv2.BORDER_CONSTANT, BORDER_OVERWRITE]
+
+OPERATIONS = [
+    (apply_linear_filter, {"kernel": KERNELS["Wygładzanie"]["Uśrednienie 3x3"]}),
+    (apply_linear_filter, {"kernel": np.ones((7, 5), dtype=np.float32) / 35}),
+    (apply_laplacian_sharpening, {"kernel": next(iter(KERNELS["Wyostrzanie"].values()))}),
+    (apply_median_filter, {"kernel_size": 5}),
+    (apply_rank_filter, {"kernel_size": 3, "percentile": 25}),
+    (apply_compass_edge_detection, {"kernels": list(KERNELS["Detekcja Krawędzi - Prewitt"].values())}),
+]
+
+
+@pytest.fixture
+def image(rng):
+    # Rozmiar niebędący wielokrotnością kafelka, aby ostatnie kafelki były niepełne
+    return rng.integers(0, 256, (203, 157), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("operation, params", OPERATIONS)
+@pytest.mark.parametrize("border_type", BORDER_TYPES)
+def test_tiles_equal_full_image(image, operation, params, border_type):
+    params = dict(params, border_type=border_type, border_value=70)
+    expected = operation(image, **params)
+
+    np.testing.assert_array_equal(process_in_tiles(image, operation, tile_size=48, **params), expected)
+    np.testing.assert_array_equal(process_in_tiles(image, operation, tile_size=64, **params), expected)
+
+
+@pytest.mark.parametrize("operation, params", OPERATIONS)
+@pytest.mark.parametrize("border_type", BORDER_TYPES)
+def test_parallel_tiles_and_bands_equal_full_image(image, operation, params, border_type):
+    params = dict(params, border_type=border_type, border_value=70)
+    expected = operation(image, **params)
+
+    np.testing.assert_array_equal(process_in_tiles(image, operation, tile_size=64, workers=3, **params), expected)
+    np.testing.assert_array_equal(process_in_bands(image, operation, workers=4, **params), expected)
+    np.testing.assert_array_equal(process_in_bands(image, operation, workers=1, **params), expected)
+
+
+def test_bands_run_opencv_single_threaded(image):
+    opencv_threads = cv2.getNumThreads()
+    cv2.setNumThreads(4)
+    seen = []
+
+    def record_threads(band):
+        seen.append(cv2.getNumThreads())
+        return band
+
+    try:
+        process_in_bands(image, record_threads, workers=3, halo=0)
+        # Pierwsze pasmo jest liczone przed uruchomieniem puli, pozostałe w wątkach puli
+        assert len(seen) > 1 and set(seen[1:]) == {1}
+        assert cv2.getNumThreads() == 4
+    finally:
+        cv2.setNumThreads(opencv_threads)
+
+
+def test_gradient_magnitude_tiles_equal_full_image(image):
+    np.testing.assert_array_equal(process_in_tiles(image, apply_gradient_magnitude, tile_size=50),
+                                  apply_gradient_magnitude(image))
+
+
+def test_color_image_and_memmap_output(tmp_path, rng):
+    image = rng.integers(0, 256, (90, 110, 3), dtype=np.uint8)
+    params = {"kernel_size": 3, "border_type": cv2.BORDER_REFLECT, "border_value": 0}
+
+    out = np.lib.format.open_memmap(tmp_path / "out.npy", mode="w+", dtype=np.uint8, shape=image.shape)
+    result = process_in_tiles(image, apply_median_filter, tile_size=32, out=out, **params)
+
+    assert result is out
+    np.testing.assert_array_equal(out, apply_median_filter(image, **params))
+
+
+def test_iter_tiles_cover_image_once():
+    coverage = np.zeros((53, 41), dtype=np.int32)
+    for tile in iter_tiles(53, 41, 16, 16, 3):
+        coverage[tile.target] += 1
+        assert tile.source[0].start <= tile.target[0].start and tile.source[0].stop >= tile.target[0].stop
+
+    np.testing.assert_array_equal(coverage, 1)
@@ -0,0 +1,120 @@
+# test_versioned_image.py
+import cv2
+import numpy as np
+import pytest
+
+import versioned_image
+from algorithms import generate_lut_histogram, otsu_threshold
+from versioned_image import VersionedImage
+
+
+def channel_histograms(image):
+    histogram = generate_lut_histogram(image)
+    return [histogram['blue'], histogram['green'], histogram['red']] if isinstance(histogram, dict) else [histogram]
+
+
+@pytest.fixture
+def count_histograms(monkeypatch):
+    """Zlicza, ile razy histogram był liczony z pixel-i"""
+    calls = []
+
+    def counting(image, *args, **kwargs):
+        calls.append(image.shape)
+        return generate_lut_histogram(image, *args, **kwargs)
+
+    monkeypatch.setattr(versioned_image, "generate_lut_histogram", counting)
+    return calls
+
+
+def test_histogram_is_computed_once_per_version(gray_image, count_histograms):
+    state = VersionedImage(gray_image)
+    state.histogram()
+    state.histograms()
+    state.min_max()
+    state.statistics()
+    assert len(count_histograms) == 1
+
+    state.replace(255 - gray_image)
+    assert state.version == 1
+    np.testing.assert_array_equal(state.histograms()[0], channel_histograms(255 - gray_image)[0])
+    assert len(count_histograms) == 2
+
+
+def test_cached_values_are_reused_until_image_changes(gray_image):
+    state = VersionedImage(gray_image)
+    calls = []
+
+    def compute(image):
+        calls.append(image.shape)
+        return image.mean()
+
+    assert state.cached("mean", compute) == state.cached("mean", compute)
+    state.replace(gray_image[:10])
+    state.cached("mean", compute)
+    assert calls == [gray_image.shape, (10, gray_image.shape[1])]
+
+
+def test_otsu_threshold_matches_opencv(rng):
+    # Dwie grupy jasności, żeby próg był jednoznaczny
+    image = np.concatenate([rng.normal(60, 15, 4000), rng.normal(180, 20, 3000)]).clip(0, 255).astype(np.uint8)
+    image = image.reshape(70, 100)
+    expected, _ = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    assert VersionedImage(image).otsu_threshold() == int(expected)
+    assert otsu_threshold(np.zeros(256)) == 0
+
+
+
+@pytest.mark.parametrize("image_name", ["gray_image", "color_image"])
+def test_update_region_updates_histogram_incrementally(request, image_name, count_histograms):
+    image = request.getfixturevalue(image_name).copy()
+    state = VersionedImage(image)
+    state.histogram()
+
+    region = np.s_[10:40, 5:30]
+    state.update_region(region, 255 - image[region])
+    state.update_region(np.s_[0:3, 0:3], np.zeros_like(image[0:3, 0:3]))
+
+    assert len(count_histograms) == 1
+    assert state.version == 2
+    for histogram, expected in zip(state.histograms(), channel_histograms(state.image)):
+        np.testing.assert_array_equal(histogram, expected)
+
+    # Wyniki pochodne są liczone od nowa z poprawionego histogramu
+    assert state.min_max() == [(int(channel.min()), int(channel.max())) for channel in
+                               np.atleast_3d(state.image).transpose(2, 0, 1)]
+
+
+def test_update_region_copies_read_only_image(gray_image):
+    read_only = gray_image.copy()
+    read_only.flags.writeable = False
+    state = VersionedImage(read_only)
+
+    state.update_region(np.s_[0:5, 0:5], np.zeros((5, 5), dtype=np.uint8))
+
+    assert state.image is not read_only
+    assert not state.image[0:5, 0:5].any()
+    np.testing.assert_array_equal(read_only, gray_image)
+
+
+def test_update_region_rejects_wrong_shape(gray_image):
+    state = VersionedImage(gray_image.copy())
+    with pytest.raises(ValueError, match="Niezgodność rozmiarów"):
+        state.update_region(np.s_[0:5, 0:5], np.zeros((4, 5), dtype=np.uint8))
+
+
+def test_listeners_receive_changed_region(gray_image):
+    state = VersionedImage(gray_image.copy())
+    events = []
+
+    def listener(image_state, region):
+        events.append((image_state.version, region))
+
+    state.subscribe(listener)
+    region = np.s_[1:4, 2:6]
+    state.update_region(region, np.zeros((3, 4), dtype=np.uint8))
+    state.replace(gray_image)
+    state.unsubscribe(listener)
+    state.replace(gray_image)
+
+    assert events == [(1, region), (2, None)]